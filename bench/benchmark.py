@@ -0,0 +1,363 @@
+"""Cloud browser benchmarks.
+
+Generates synthetic datastores (in-memory object stores and filesystem
+trees) of a given number of keys and measures:
+
+* ``browser``: :func:`cloud_browser.views.browser` latency by page depth
+  (fraction of the listing skipped with a marker).
+* ``document``: :func:`cloud_browser.views.document` latency (and
+  throughput) by object size.
+* ``render``: Browser template render time per listed row.
+* ``peak_memory``: Peak memory allocated by Python during each datastore
+  run (with :mod:`tracemalloc`).
+
+Generating the datastore (``populate``) is timed, but not compared.
+
+Each datastore and size runs in a fresh process. Results are written as
+JSON and can be compared against a stored baseline, failing (with exit
+status ``1``) on regressions, e.g.::
+
+    $ python bench/benchmark.py --save-baseline bench/baseline.json
+    $ python bench/benchmark.py --baseline bench/baseline.json
+
+Sizes up to ``10000000`` keys are supported for the memory datastore, but
+need several GB of memory and minutes to generate.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None  # pylint: disable=C0103
+
+###############################################################################
+# Constants
+###############################################################################
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+DATASTORES = ("Memory", "Filesystem")
+DEFAULT_SIZES = {"Memory": (1000, 10000, 100000), "Filesystem": (1000, 10000)}
+
+#: Page depths, as fractions of the listing skipped.
+DEPTHS = (0, 0.5, 0.99)
+
+#: Document sizes in bytes.
+DOCUMENT_SIZES = (1024, 1024 * 1024, 16 * 1024 * 1024)
+
+#: Rows for render timing.
+RENDER_ROWS = (10, 1000)
+
+CONTAINER = "bench"
+DOC_CONTAINER = "docs"
+
+
+###############################################################################
+# Worker
+###############################################################################
+def _key(index):
+    """Return synthetic key name."""
+    return "key-%09d.txt" % index
+
+
+def _setup_django(datastore, root):
+    """Configure Django for a benchmark datastore."""
+    from django.conf import settings
+
+    settings.configure(
+        DEBUG=False,
+        SECRET_KEY="benchmark",
+        ALLOWED_HOSTS=["*"],
+        ROOT_URLCONF="cloud_browser.urls",
+        INSTALLED_APPS=[
+            "django.contrib.auth",
+            "django.contrib.contenttypes",
+            "cloud_browser",
+        ],
+        TEMPLATES=[
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "APP_DIRS": True,
+            }
+        ],
+        DATABASES={},
+        CLOUD_BROWSER_DATASTORE=datastore,
+        CLOUD_BROWSER_FILESYSTEM_ROOT=root,
+    )
+
+    import django
+
+    django.setup()
+
+
+def _populate_memory(size):
+    """Fill shared memory store."""
+    from cloud_browser.cloud.memory import get_store
+
+    data = b"x" * 100
+    store = get_store()
+    store.put_many(CONTAINER, ((_key(i), data, "text/plain") for i in range(size)))
+    for doc_size in DOCUMENT_SIZES:
+        store.put(DOC_CONTAINER, "doc-%s.bin" % doc_size, b"x" * doc_size)
+
+
+def _populate_filesystem(root, size):
+    """Create filesystem tree."""
+    container = os.path.join(root, CONTAINER)
+    os.makedirs(container)
+    for i in range(size):
+        with open(os.path.join(container, _key(i)), "wb") as file_obj:
+            file_obj.write(b"x" * 100)
+
+    docs = os.path.join(root, DOC_CONTAINER)
+    os.makedirs(docs)
+    for doc_size in DOCUMENT_SIZES:
+        with open(os.path.join(docs, "doc-%s.bin" % doc_size), "wb") as file_obj:
+            file_obj.write(b"x" * doc_size)
+
+    # Settle directory modified times (for directory indexes).
+    old = time.time() - 3600
+    for path in (root, container, docs):
+        os.utime(path, (old, old))
+
+
+def _measure(function, repeat):
+    """Return best time of repeated calls in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = default_timer()
+        function()
+        times.append(default_timer() - start)
+
+    return min(times)
+
+
+def _consume(response):
+    """Read full response body and return number of bytes."""
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def run_worker(datastore, size, repeat):
+    """Run benchmarks for datastore and size and return results."""
+    root = tempfile.mkdtemp(prefix="cloud_browser_bench_")
+    try:
+        _setup_django(datastore, root)
+        if tracemalloc is not None:
+            tracemalloc.start()
+
+        start = default_timer()
+        if datastore == "Memory":
+            _populate_memory(size)
+        else:
+            _populate_filesystem(root, size)
+        results = {"populate": {"setup_seconds": default_timer() - start}}
+
+        results.update(_bench_browser(size, repeat))
+        results.update(_bench_document(repeat))
+        results.update(_bench_render(repeat))
+
+        if tracemalloc is not None:
+            _, peak = tracemalloc.get_traced_memory()
+            results["peak_memory"] = {"bytes": peak}
+
+        return results
+    finally:
+        shutil.rmtree(root)
+
+
+def _bench_browser(size, repeat):
+    """Measure browser view latency by page depth."""
+    from django.test import RequestFactory
+
+    from cloud_browser.views import browser
+
+    factory = RequestFactory()
+    results = {}
+    for depth in DEPTHS:
+        index = int(depth * size)
+        params = {"marker": _key(index - 1)} if index else {}
+        request = factory.get("/browser/%s" % CONTAINER, params)
+
+        def _call(request=request):
+            _consume(browser(request, path=CONTAINER))
+
+        name = "browser.depth_%02d" % int(depth * 100)
+        results[name] = {"seconds": _measure(_call, repeat)}
+
+    return results
+
+
+def _bench_document(repeat):
+    """Measure document view latency and throughput by size."""
+    from django.test import RequestFactory
+
+    from cloud_browser.views import document
+
+    factory = RequestFactory()
+    results = {}
+    for doc_size in DOCUMENT_SIZES:
+        path = "%s/doc-%s.bin" % (DOC_CONTAINER, doc_size)
+        request = factory.get("/document/%s" % path)
+
+        def _call(request=request, path=path):
+            _consume(document(request, path=path))
+
+        seconds = _measure(_call, repeat)
+        results["document.%s" % doc_size] = {
+            "seconds": seconds,
+            "bytes_per_second": doc_size / seconds if seconds else None,
+        }
+
+    return results
+
+
+def _bench_render(repeat):
+    """Measure browser template render time per row."""
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory
+
+    from cloud_browser.cloud import get_connection
+
+    request = RequestFactory().get("/browser/%s" % CONTAINER)
+    container = get_connection().get_container(CONTAINER)
+    times = {}
+    for rows in RENDER_ROWS:
+        context = {
+            "path": CONTAINER,
+            "limit": rows,
+            "container_path": CONTAINER,
+            "containers": [container],
+            "container": container,
+            "object_path": "",
+            "objects": container.get_objects("", limit=rows),
+        }
+
+        def _call(context=context):
+            render_to_string("cloud_browser/browser.html", context, request=request)
+
+        times[rows] = _measure(_call, repeat)
+
+    low, high = RENDER_ROWS
+    per_row = (times[high] - times[low]) / (high - low)
+    return {"render.per_row": {"seconds": max(per_row, 0.0)}}
+
+
+###############################################################################
+# Runner
+###############################################################################
+def run(datastores, sizes, repeat):
+    """Run all benchmarks in worker processes and return results."""
+    results = {}
+    for datastore in datastores:
+        for size in sizes or DEFAULT_SIZES[datastore]:
+            print("Running %s with %s keys..." % (datastore, size), file=sys.stderr)
+            output = subprocess.check_output(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "--worker",
+                    datastore,
+                    str(size),
+                    "--repeat",
+                    str(repeat),
+                ],
+                env=dict(os.environ, PYTHONPATH=ROOT_DIR),
+            )
+            worker_results = json.loads(output.decode("utf-8"))
+            for name, metrics in worker_results.items():
+                results["%s.%s.%s" % (datastore, size, name)] = metrics
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Print comparison with baseline and return names of regressions."""
+    regressions = []
+    for name in sorted(current["results"]):
+        metrics = current["results"][name]
+        base_metrics = baseline["results"].get(name)
+        if base_metrics is None:
+            continue
+
+        for metric in ("seconds", "bytes"):
+            value, base_value = metrics.get(metric), base_metrics.get(metric)
+            if not (value and base_value):
+                continue
+
+            ratio = float(value) / base_value
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag = "  REGRESSION"
+                regressions.append(name)
+            print("%-45s %-8s %8.2fx%s" % (name, metric, ratio, flag))
+
+    return regressions
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Cloud browser benchmarks.")
+    parser.add_argument("--datastore", action="append", choices=DATASTORES)
+    parser.add_argument(
+        "--sizes", help="Comma-separated numbers of keys (default per datastore)."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results to JSON file.")
+    parser.add_argument("--baseline", help="Compare with baseline JSON file.")
+    parser.add_argument("--save-baseline", help="Write results as baseline.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown ratio over baseline (default 0.25).",
+    )
+    parser.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        datastore, size = args.worker
+        results = run_worker(datastore, int(size), args.repeat)
+        print(json.dumps(results))
+        return 0
+
+    sizes = [int(x) for x in args.sizes.split(",")] if args.sizes else None
+    results = run(args.datastore or DATASTORES, sizes, args.repeat)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as file_obj:
+                json.dump(results, file_obj, indent=2, sort_keys=True)
+
+    if not (args.output or args.save_baseline):
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.baseline:
+        with open(args.baseline) as file_obj:
+            baseline = json.load(file_obj)
+        if compare(results, baseline, args.tolerance):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -140,6 +140,57 @@ class Settings(object):
 
     * ``CLOUD_BROWSER_DATASTORE = "Filesystem"``
     * ``CLOUD_BROWSER_FILESYSTEM_ROOT``: Filesystem root to serve from.
+    * ``CLOUD_BROWSER_FILESYSTEM_INDEX_SIZE``: Maximum number of directories
+      to keep sorted name indexes for, which are rebuilt when a directory
+      is modified (defaults to ``16``, ``0`` for no indexes).
+    * ``CLOUD_BROWSER_FILESYSTEM_STAT_THREADS``: Maximum number of threads
+      to stat listed files and directories concurrently with, e.g., for
+      network filesystems (defaults to ``0``, stat one after another).
+    * ``CLOUD_BROWSER_FILESYSTEM_CATALOG``: Path of a SQLite catalog to serve
+      listings and metadata from instead of the filesystem, built and
+      refreshed with the ``cloud_browser_catalog`` management command (see
+      :mod:`cloud_browser.cloud.catalog`). Defaults to ``None``, no catalog.
+    * ``CLOUD_BROWSER_FILESYSTEM_WATCH``: Watch the filesystem root for
+      changes and invalidate cached listings and metadata of changed
+      directories (see :mod:`cloud_browser.cloud.watch`). Defaults to
+      ``False``.
+    * ``CLOUD_BROWSER_FILESYSTEM_WATCH_INTERVAL``: Number of seconds between
+      polls of directory modified times, where ``inotify`` is unavailable
+      (defaults to ``5``).
+    * ``CLOUD_BROWSER_FILESYSTEM_SENDFILE``: Offload serving documents to the
+      web server, either with ``"X-Sendfile"`` (Apache ``mod_xsendfile``,
+      lighttpd) or ``"X-Accel-Redirect"`` (nginx) with a percent-encoded
+      path (see ``XSendFileUnescape`` for Apache). Defaults to ``None``,
+      serving documents with a ``FileResponse`` (which WSGI servers may send
+      with ``os.sendfile``).
+    * ``CLOUD_BROWSER_FILESYSTEM_SENDFILE_URL``: Internal URL prefix mapped
+      to ``CLOUD_BROWSER_FILESYSTEM_ROOT`` for ``"X-Accel-Redirect"``, e.g.,
+      for nginx::
+
+          location /cloud_browser_files/ {
+              internal;
+              alias /path/to/filesystem/root/;
+          }
+
+    **Memory**: Configure in-memory datastore, e.g., for load testing (see
+    :mod:`cloud_browser.cloud.memory`).
+
+    * ``CLOUD_BROWSER_DATASTORE = "Memory"``
+    * ``CLOUD_BROWSER_MEMORY_LATENCY``: Seconds of simulated latency per
+      datastore call (defaults to ``0``).
+    * ``CLOUD_BROWSER_MEMORY_BANDWIDTH``: Simulated bytes per second for
+      reading objects (defaults to ``None``, no limit).
+    * ``CLOUD_BROWSER_MEMORY_ERROR_RATE``: Probability of a simulated
+      datastore error per call (defaults to ``0``).
+
+    **Replay**: Configure replay of a recorded datastore, e.g., for profiling
+    against production-shaped listings (see
+    :mod:`cloud_browser.cloud.replay`).
+
+    * ``CLOUD_BROWSER_DATASTORE = "Replay"``
+    * ``CLOUD_BROWSER_REPLAY_CASSETTE``: Path of cassette file to replay.
+    * ``CLOUD_BROWSER_REPLAY_LATENCY_SCALE``: Factor for recorded latencies
+      (defaults to ``1``, ``0`` to replay without delays).
 
     **View Permissions**: A standard Django view decorator object can be
     specified, which is wrapped for all browsing / viewing view -- for example,
@@ -162,14 +213,75 @@ class Settings(object):
     * ``CLOUD_BROWSER_CONTAINER_WHITELIST``: White list of names. (Iterable)
     * ``CLOUD_BROWSER_CONTAINER_BLACKLIST``: Black list of names. (Iterable)
 
+    **Caching**: Datastore results can be cached in a Django cache shared
+    between processes.
+
+    * ``CLOUD_BROWSER_CACHE_BACKEND``: Name of the Django cache to use
+      (defaults to ``"default"``).
+    * ``CLOUD_BROWSER_CONTAINER_CACHE_TIMEOUT``: Number of seconds to cache
+      the list of available containers (defaults to ``0``, no caching).
+      Cached containers can be dropped with
+      :meth:`cloud_browser.cloud.base.CloudConnection.invalidate_containers`.
+
+    Containers (with their native handles) are also kept by name in process
+    memory, so that opening a container does not list or look up
+    containers on every request.
+
+    * ``CLOUD_BROWSER_CONTAINER_INDEX_SIZE``: Maximum number of indexed
+      containers (defaults to ``1000``, ``0`` for no index).
+    * ``CLOUD_BROWSER_CONTAINER_INDEX_TIMEOUT``: Number of seconds to keep
+      indexed containers (defaults to ``300``).
+
+    Datastore connections are pooled, each request thread borrowing one
+    connection until the request finishes (see
+    :mod:`cloud_browser.cloud.pool`).
+
+    * ``CLOUD_BROWSER_CONNECTION_POOL_SIZE``: Maximum number of datastore
+      connections of request threads per process (defaults to ``10``).
+      Background query threads (see ``CLOUD_BROWSER_QUERY_THREADS``) have
+      one connection each on top of these.
+    * ``CLOUD_BROWSER_CONNECTION_POOL_TIMEOUT``: Number of seconds to wait
+      for a connection if all are in use (defaults to ``30``).
+    * ``CLOUD_BROWSER_CONNECTION_IDLE_TIMEOUT``: Number of seconds to keep
+      unused connections (defaults to ``300``).
+
+    Object listings and metadata can be cached in process memory in front of
+    any datastore (see :mod:`cloud_browser.cloud.cache`).
+
+    * ``CLOUD_BROWSER_OBJECT_CACHE_SIZE``: Maximum number of cached object
+      listings and metadata lookups, least recently used entries being
+      evicted first (defaults to ``0``, no caching).
+    * ``CLOUD_BROWSER_OBJECT_CACHE_TIMEOUT``: Number of seconds to cache
+      object listings and metadata (defaults to ``60``).
+
+    **Recording**: Datastore calls can be recorded for replay.
+
+    * ``CLOUD_BROWSER_RECORD_CASSETTE``: Path of cassette file to record
+      listings, metadata and timings of the configured datastore to
+      (defaults to ``None``, no recording).
+
     **General**: Other settings.
 
     * ``CLOUD_BROWSER_DEFAULT_LIST_LIMIT``: Default number of objects to
       diplay per browser page.
 
+    * ``CLOUD_BROWSER_DEFAULT_CONTAINER_LIST_LIMIT``: Default number of
+      containers to display per browser page.
+
+    * ``CLOUD_BROWSER_QUERY_THREADS``: Maximum number of threads (shared by
+      all requests) to list containers with, concurrently with listing
+      objects in the browser view (defaults to ``0``, listing one after the
+      other). Each thread uses a datastore connection of its own.
+
     * ``CLOUD_BROWSER_OBJECT_REDIRECT_URL``: Custom URL to which to redirect
       when clicking on an object (defaults to showing object contents).
 
+    * ``CLOUD_BROWSER_DOCUMENT_CHUNK_SIZE``: Number of bytes per chunk when
+      streaming object contents in the document view.
+
+    * ``CLOUD_BROWSER_EXPORT_PAGE_SIZE``: Number of objects to request from
+      the datastore per query when streaming a listing export.
+
     * ``CLOUD_BROWSER_STATIC_MEDIA_DIR``: If this applications static media
       (found in ``app_media``) is served up under the ``settings.MEDIA_ROOT``,
       then set a relative path from the root, and the static media will be used
@@ -177,7 +289,20 @@ class Settings(object):
     """
 
     #: Valid datastore types.
-    DATASTORES = set(("ApacheLibcloud", "AWS", "Google", "Rackspace", "Filesystem"))
+    DATASTORES = set(
+        (
+            "ApacheLibcloud",
+            "AWS",
+            "Google",
+            "Rackspace",
+            "Filesystem",
+            "Memory",
+            "Replay",
+        )
+    )
+
+    #: Valid filesystem document offload modes.
+    SENDFILE_MODES = set((None, "X-Sendfile", "X-Accel-Redirect"))
 
     #: Settings dictionary of accessor callables.
     SETTINGS = {
@@ -203,6 +328,24 @@ class Settings(object):
         "CLOUD_BROWSER_RACKSPACE_AUTHURL": BoolSetting(from_env=True),
         # Filesystem datastore settings.
         "CLOUD_BROWSER_FILESYSTEM_ROOT": Setting(),
+        "CLOUD_BROWSER_FILESYSTEM_INDEX_SIZE": Setting(default=16),
+        "CLOUD_BROWSER_FILESYSTEM_STAT_THREADS": Setting(default=0),
+        "CLOUD_BROWSER_FILESYSTEM_CATALOG": Setting(),
+        "CLOUD_BROWSER_FILESYSTEM_WATCH": BoolSetting(default=False),
+        "CLOUD_BROWSER_FILESYSTEM_WATCH_INTERVAL": Setting(default=5),
+        "CLOUD_BROWSER_FILESYSTEM_SENDFILE": Setting(valid_set=SENDFILE_MODES),
+        "CLOUD_BROWSER_FILESYSTEM_SENDFILE_URL": Setting(
+            default="/cloud_browser_files/"
+        ),
+        # Memory datastore settings.
+        "CLOUD_BROWSER_MEMORY_LATENCY": Setting(default=0),
+        "CLOUD_BROWSER_MEMORY_BANDWIDTH": Setting(),
+        "CLOUD_BROWSER_MEMORY_ERROR_RATE": Setting(default=0),
+        # Replay datastore settings.
+        "CLOUD_BROWSER_REPLAY_CASSETTE": Setting(),
+        "CLOUD_BROWSER_REPLAY_LATENCY_SCALE": Setting(default=1),
+        # Recording.
+        "CLOUD_BROWSER_RECORD_CASSETTE": Setting(),
         # View permissions.
         "CLOUD_BROWSER_VIEW_DECORATOR": Setting(),
         # Permissions lists for containers.
@@ -210,8 +353,24 @@ class Settings(object):
         "CLOUD_BROWSER_CONTAINER_BLACKLIST": Setting(),
         # Browser settings.
         "CLOUD_BROWSER_DEFAULT_LIST_LIMIT": Setting(default=20),
+        "CLOUD_BROWSER_DEFAULT_CONTAINER_LIST_LIMIT": Setting(default=100),
+        "CLOUD_BROWSER_QUERY_THREADS": Setting(default=0),
         # Hook for custom actions.
         "CLOUD_BROWSER_OBJECT_REDIRECT_URL": Setting(),
+        # Document streaming settings.
+        "CLOUD_BROWSER_DOCUMENT_CHUNK_SIZE": Setting(default=64 * 1024),
+        # Listing export settings.
+        "CLOUD_BROWSER_EXPORT_PAGE_SIZE": Setting(default=1000),
+        # Caching.
+        "CLOUD_BROWSER_CACHE_BACKEND": Setting(default="default"),
+        "CLOUD_BROWSER_CONTAINER_CACHE_TIMEOUT": Setting(default=0),
+        "CLOUD_BROWSER_CONTAINER_INDEX_SIZE": Setting(default=1000),
+        "CLOUD_BROWSER_CONTAINER_INDEX_TIMEOUT": Setting(default=300),
+        "CLOUD_BROWSER_CONNECTION_POOL_SIZE": Setting(default=10),
+        "CLOUD_BROWSER_CONNECTION_POOL_TIMEOUT": Setting(default=30),
+        "CLOUD_BROWSER_CONNECTION_IDLE_TIMEOUT": Setting(default=300),
+        "CLOUD_BROWSER_OBJECT_CACHE_SIZE": Setting(default=0),
+        "CLOUD_BROWSER_OBJECT_CACHE_TIMEOUT": Setting(default=60),
         # Static media root.
         "CLOUD_BROWSER_STATIC_MEDIA_DIR": Setting(),
     }
@@ -24,3 +24,42 @@ def get_connection_cls():
     from cloud_browser.cloud.config import Config
 
     return Config.get_connection_cls()
+
+
+def get_connection_pool(name=None):
+    """Return global connection pool.
+
+    :param name: Pool name (see :class:`cloud_browser.cloud.config.Config`) or
+        ``None`` for the pool of request threads.
+    :rtype: :class:`cloud_browser.cloud.pool.ConnectionPool`
+    """
+    from cloud_browser.cloud.config import Config
+
+    return Config.get_connection_pool(name or Config.REQUEST_POOL)
+
+
+def submit_query(function, *args):
+    """Run datastore query in a background thread.
+
+    Queries use connections of a pool of their own (sized to the number of
+    threads, ``CLOUD_BROWSER_QUERY_THREADS``), so that they do not wait on
+    the connections of requests waiting on them.
+
+    :param function: Function called with a connection and ``args``.
+    :return: Future of the result or ``None`` if background queries are
+        disabled (or unavailable).
+    :rtype: :class:`concurrent.futures.Future`
+    """
+    from cloud_browser.app_settings import settings
+    from cloud_browser.cloud.config import Config
+    from cloud_browser.common import get_executor
+
+    executor = get_executor("queries", settings.CLOUD_BROWSER_QUERY_THREADS)
+    if executor is None:
+        return None
+
+    def _query():
+        with Config.get_connection_pool(Config.QUERY_POOL).connection() as conn:
+            return function(conn, *args)
+
+    return executor.submit(_query)
@@ -1,6 +1,10 @@
-"""ApacheLibcloud datastore."""
+"""ApacheLibcloud datastore.
+
+Listings of S3-compatible drivers push the marker and delimiter down to the
+datastore, with the (private) S3 driver helpers of libcloud 2.4 to 3.x.
+Other drivers, or libcloud versions without those helpers, scan listings.
+"""
 from datetime import datetime
-from io import BytesIO
 from itertools import islice
 
 from cloud_browser.app_settings import settings
@@ -17,6 +21,9 @@ except ImportError:
 
 DATE_FORMAT = "%a, %d %b %Y %H:%M:%S %Z"
 
+# Maximum number of keys per S3 listing request.
+S3_MAX_KEYS = 1000
+
 
 ###############################################################################
 # Classes
@@ -40,17 +47,35 @@ class ApacheLibcloudExceptionWrapper(errors.CloudExceptionWrapper):
 class ApacheLibcloudObject(base.CloudObject):
     """ApacheLibcloud object wrapper."""
 
+    __slots__ = ()
+
     def _get_object(self):
         """Return native storage object."""
         return self.container.native_container.get_object(self.name)
 
     def _read(self):
         """Return contents of object."""
-        stream = self.native_obj.as_stream()
-        content = BytesIO()
-        content.writelines(stream)
-        content.seek(0)
-        return content.read()
+        return b"".join(self.native_obj.as_stream())
+
+    def _stream(self, chunk_size):
+        """Return iterator of object contents in chunks."""
+        return self.native_obj.as_stream(chunk_size=chunk_size)
+
+    def _stream_range(self, start, end, chunk_size):
+        """Return iterator of a byte range of object contents in chunks.
+
+        Ranged downloads are only available for some drivers (and libcloud
+        3.0+), so fall back to discarding bytes from the full stream.
+        """
+        driver = self.container.conn.native_conn
+        try:
+            return driver.download_object_range_as_stream(
+                self.native_obj, start, end + 1, chunk_size=chunk_size
+            )
+        except (AttributeError, NotImplementedError):
+            return super(ApacheLibcloudObject, self)._stream_range(
+                start, end, chunk_size
+            )
 
     @classmethod
     def from_libcloud(cls, container, obj):
@@ -70,6 +95,7 @@ class ApacheLibcloudObject(base.CloudObject):
             content_type=obj.extra.get("content_type"),
             last_modified=last_modified,
             obj_type=cls.type_cls.FILE,
+            etag=obj.hash,
         )
 
 
@@ -90,37 +116,140 @@ class ApacheLibcloudContainer(base.CloudContainer):
     def get_objects(
         self, path, marker=None, limit=settings.CLOUD_BROWSER_DEFAULT_LIST_LIMIT
     ):
-        """Get objects."""
-        client = self.conn.native_conn
-        path = path.rstrip(SEP) + SEP if path else ""
-        dirs = set()
+        """Get objects.
 
-        def get_files_and_directories(items):
-            for item in items:
-                suffix = item.name[len(path) :]
-                subdirs = suffix.split(SEP)
-                is_file = len(subdirs) == 1
+        Drivers for S3-compatible datastores list with a delimiter starting
+        from the marker, so only the requested page is fetched. Other drivers
+        have no delimiter or marker support, so listings are scanned (lazily)
+        with implied subdirectories collapsed, skipping everything up to the
+        marker and stopping as soon as the page is full.
+        """
+        return [obj for _, obj in self._iterate_objects(path, marker, limit)]
 
-                if is_file:
-                    yield self.obj_cls.from_libcloud(self, item)
+    @wrap_libcloud_errors
+    def _get_objects_page(self, path, state, limit):
+        """Get objects and paging state for the next page (or ``None``).
+
+        The native marker is the raw name of the last object or implied
+        subdirectory (with trailing separator), so that objects sorting
+        between a subdirectory name and its separator are not skipped.
+        """
+        marker = state.get("native_marker", state.get("marker"))
+        results = list(self._iterate_objects(path, marker, limit + 1))
+
+        state = None
+        if len(results) > limit:
+            results = results[:limit]
+            native_marker, last = results[-1]
+            state = {"marker": last.name, "native_marker": native_marker}
+
+        return [obj for _, obj in results], state
+
+    def _iterate_objects(self, path, marker, limit):
+        """Return iterator of ``(raw name, object)`` for path after marker."""
+        path = path.rstrip(SEP) + SEP if path else ""
+        marker = marker or None
+
+        if self._is_delimited():
+            entries = self._iterate_delimited(path, marker, limit + 1)
+        else:
+            entries = self._iterate_scanned(path)
+
+        def get_files_and_directories(entries):
+            dirs = set()
+            for name, item in entries:
+                # Skip up to marker, including an implied subdirectory echo
+                # of the marker itself.
+                if marker is not None and (name <= marker or name == marker + SEP):
                     continue
 
-                subdir = subdirs[0]
-                if subdir in dirs:
+                if item is not None:
+                    yield name, self.obj_cls.from_libcloud(self, item)
                     continue
 
-                dirs.add(subdir)
-                yield self.obj_cls(
-                    self,
-                    name=(path + SEP + subdir).lstrip(SEP),
-                    obj_type=self.obj_cls.type_cls.SUBDIR,
+                if name in dirs:
+                    continue
+
+                dirs.add(name)
+                yield name, self.obj_cls(
+                    self, name=name, obj_type=self.obj_cls.type_cls.SUBDIR
                 )
 
-        objs = client.iterate_container_objects(self.native_container, path)
-        objs = get_files_and_directories(objs)
-        objs = islice(objs, limit)
+        return islice(get_files_and_directories(entries), limit)
+
+    def _is_delimited(self):
+        """Return ``True`` if driver supports delimiter and marker listings."""
+        try:
+            from libcloud.storage.drivers.s3 import BaseS3StorageDriver
+        except ImportError:
+            return False
+
+        client = self.conn.native_conn
+        return isinstance(client, BaseS3StorageDriver) and all(
+            hasattr(client, name) for name in ("_get_container_path", "_to_objs")
+        )
+
+    def _iterate_scanned(self, path):
+        """Return iterator of ``(name, native object)`` for path.
 
-        return list(objs)
+        Scans all objects under path. Implied subdirectories are returned
+        with a trailing separator, a ``None`` native object and possibly
+        repeated.
+        """
+        client = self.conn.native_conn
+        for item in client.iterate_container_objects(self.native_container, path):
+            subdir, sep, _ = item.name[len(path) :].partition(SEP)
+            if sep:
+                yield path + subdir + SEP, None
+            else:
+                yield item.name, item
+
+    def _iterate_delimited(self, path, marker, page_size):
+        """Return iterator of ``(name, native object)`` for path.
+
+        Issues native S3 delimiter queries from the marker. Implied
+        subdirectories (common prefixes) are returned with a ``None`` native
+        object (and a trailing separator).
+        """
+        from libcloud.utils.xml import findall, findtext
+
+        client = self.conn.native_conn
+        namespace = client.namespace
+        container_path = client._get_container_path(  # pylint: disable=W0212
+            self.native_container
+        )
+        params = {"delimiter": SEP, "max-keys": min(page_size, S3_MAX_KEYS)}
+        if path:
+            params["prefix"] = path
+
+        while True:
+            if marker:
+                params["marker"] = marker
+
+            response = client.connection.request(container_path, params=params)
+            if not response.success():
+                raise errors.CloudException(
+                    "Unexpected status code: %s" % response.status
+                )
+
+            tree = response.object
+            objs = client._to_objs(  # pylint: disable=W0212
+                obj=tree, xpath="Contents", container=self.native_container
+            )
+            entries = [(obj.name, obj) for obj in objs]
+            entries.extend(
+                (findtext(elem, "Prefix", namespace), None)
+                for elem in findall(tree, "CommonPrefixes", namespace)
+            )
+            entries.sort(key=lambda x: x[0])
+            for entry in entries:
+                yield entry
+
+            truncated = findtext(tree, "IsTruncated", namespace) or ""
+            if not entries or truncated.lower() != "true":
+                break
+
+            marker = findtext(tree, "NextMarker", namespace) or entries[-1][0]
 
     @wrap_libcloud_errors
     def get_object(self, path):
@@ -167,13 +296,28 @@ class ApacheLibcloudConnection(base.CloudConnection):
             secure=self.secure,
         )
 
+    @property
+    def cache_id(self):
+        """Unique datastore identifier for shared cache keys."""
+        return "%s:%s:%s:%s" % (
+            self.__class__.__name__,
+            self.provider,
+            self.host,
+            self.account,
+        )
+
     @wrap_libcloud_errors
-    def _get_containers(self):
-        """Return available containers."""
-        return [
+    def _get_containers(self, marker=None, limit=None):
+        """Return available containers.
+
+        Libcloud has no paged container listing, but drivers iterate lazily
+        (in name order), so stop as soon as the page is full.
+        """
+        containers = (
             self.cont_cls.from_libcloud(self, container)
             for container in self.native_conn.iterate_containers()
-        ]
+        )
+        return base.page_by_name(containers, marker, limit)
 
     @wrap_libcloud_errors
     def _get_container(self, path):
@@ -31,6 +31,8 @@ except ImportError:
 class AwsObject(base.BotoObject):
     """AWS 'key' object wrapper."""
 
+    __slots__ = ()
+
     @classmethod
     @requires(boto, "boto")
     def is_key(cls, result):
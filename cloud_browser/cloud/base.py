@@ -1,9 +1,72 @@
 """Cloud datastore API base abstraction."""
 import mimetypes
+from array import array
+from datetime import datetime
+from hashlib import md5
+from itertools import islice
+from math import isnan
 
 from cloud_browser.app_settings import settings
 from cloud_browser.cloud import errors
-from cloud_browser.common import SEP, basename, path_join
+from cloud_browser.cloud.cache import LruCache
+from cloud_browser.common import SEP, basename, dt_to_timestamp, path_join
+
+#: Salt for signing continuation tokens.
+TOKEN_SALT = "cloud_browser.cloud.token"
+
+#: Maximum number of (compound) extensions to memoize types for.
+EXTENSION_TYPES_SIZE = 4096
+
+_EXTENSION_TYPES = {}
+
+
+def guess_type(name):
+    """Return guessed ``(content type, content encoding)`` of a file name.
+
+    Guesses only depend on the (compound) extension of the base name, e.g.,
+    ``.tar.gz``, so are memoized per extension in a bounded table. The
+    encoding is taken from the longest name (dropping extensions from the
+    right) that has one, e.g., ``gzip`` for ``dump.gz.1``.
+
+    :param name: File name or path.
+    :rtype: ``tuple`` of ``string`` (or ``None``)
+    """
+    base_name = basename(name)
+    start = base_name.find(".", len(base_name) - len(base_name.lstrip(".")) + 1)
+    if start < 0:
+        return None, None
+
+    # Names with the same extension guess the same (leading dots aside).
+    ext = base_name[start:]
+    guessed = _EXTENSION_TYPES.get(ext)
+    if guessed is None:
+        content_type, encoding = mimetypes.guess_type("x" + ext)
+        parts = ext.split(".")
+        while not encoding and len(parts) > 2:
+            parts.pop()
+            _, encoding = mimetypes.guess_type("x" + ".".join(parts))
+
+        guessed = (content_type, encoding)
+        if len(_EXTENSION_TYPES) >= EXTENSION_TYPES_SIZE:
+            _EXTENSION_TYPES.clear()
+        _EXTENSION_TYPES[ext] = guessed
+
+    return guessed
+
+
+def page_by_name(items, marker=None, limit=None):
+    """Return page of items sorted by name.
+
+    Helper for datastores that cannot page natively.
+
+    :param items: Iterable of items with a ``name`` sorted by name.
+    :param marker: Only return items with names after marker.
+    :param limit: Maximum number of items or ``None`` for all.
+    :rtype: ``list``
+    """
+    if marker is not None:
+        items = (x for x in items if x.name > marker)
+    return list(islice(items, limit))
 
 
 class CloudObjectTypes(object):
@@ -14,7 +77,24 @@ class CloudObjectTypes(object):
 
 
 class CloudObject(object):
-    """Cloud object wrapper."""
+    """Cloud object wrapper.
+
+    Objects use ``__slots__`` to keep large listings compact, so subclasses
+    should declare ``__slots__`` for any attributes they add.
+    """
+
+    __slots__ = (
+        "container",
+        "name",
+        "size",
+        "content_type",
+        "content_encoding",
+        "last_modified",
+        "type",
+        "etag",
+        "_native",
+        "_guessed",
+    )
 
     type_cls = CloudObjectTypes
 
@@ -28,6 +108,7 @@ class CloudObject(object):
         :kwarg content_encoding: Document 'content-encoding'.
         :kwarg last_modified: Last modified date.
         :kwarg obj_type: Type of object (e.g., file or subdirectory).
+        :kwarg etag: Datastore entity tag (e.g., content hash).
         """
         self.container = container
         self.name = name.rstrip(SEP)
@@ -36,15 +117,17 @@ class CloudObject(object):
         self.content_encoding = kwargs.get("content_encoding", "")
         self.last_modified = kwargs.get("last_modified", None)
         self.type = kwargs.get("obj_type", self.type_cls.FILE)
-        self.__native = None
+        self.etag = kwargs.get("etag", None)
+        self._native = None
+        self._guessed = None
 
     @property
     def native_obj(self):
         """Native storage object."""
-        if self.__native is None:
-            self.__native = self._get_object()
+        if self._native is None:
+            self._native = self._get_object()
 
-        return self.__native
+        return self._native
 
     def _get_object(self):
         """Return native storage object."""
@@ -70,26 +153,45 @@ class CloudObject(object):
         """Base name from rightmost separator."""
         return basename(self.name)
 
+    @property
+    def local_path(self):
+        """Local file path for serving contents directly (or ``None``)."""
+        return None
+
+    @classmethod
+    def dt_from_timestamp(cls, timestamp):
+        """Convert POSIX timestamp to last modified date."""
+        return datetime.utcfromtimestamp(timestamp)
+
+    @property
+    def last_modified_timestamp(self):
+        """Last modified POSIX timestamp (or ``None`` if unknown)."""
+        if self.last_modified is None:
+            return None
+
+        return dt_to_timestamp(self.last_modified)
+
+    @property
+    def guessed_types(self):
+        """Guessed ``(content type, content encoding)`` from name."""
+        if self._guessed is None:
+            self._guessed = guess_type(self.name)
+
+        return self._guessed
+
     @property
     def smart_content_type(self):
         """Smart content type."""
         content_type = self.content_type
         if content_type in (None, "", "application/octet-stream"):
-            content_type, _ = mimetypes.guess_type(self.name)
+            content_type = self.guessed_types[0]
 
         return content_type
 
     @property
     def smart_content_encoding(self):
         """Smart content encoding."""
-        encoding = self.content_encoding
-        if not encoding:
-            base_list = self.basename.split(".")
-            while (not encoding) and len(base_list) > 1:
-                _, encoding = mimetypes.guess_type(".".join(base_list))
-                base_list.pop()
-
-        return encoding
+        return self.content_encoding or self.guessed_types[1]
 
     def read(self):
         """Return contents of object."""
@@ -99,6 +201,189 @@ class CloudObject(object):
         """Return contents of object."""
         raise NotImplementedError
 
+    def stream(self, chunk_size=None):
+        """Return iterator of object contents in chunks.
+
+        :param chunk_size: Maximum number of bytes per chunk (defaults to
+            ``CLOUD_BROWSER_DOCUMENT_CHUNK_SIZE``).
+        :type  chunk_size: ``int``
+        :rtype: iterator of ``bytes``
+        """
+        if chunk_size is None:
+            chunk_size = settings.CLOUD_BROWSER_DOCUMENT_CHUNK_SIZE
+        return self._stream(chunk_size)
+
+    def _stream(self, chunk_size):
+        """Return iterator of object contents in chunks.
+
+        Defaults to a single chunk of the full contents, so datastores should
+        override this with a native streaming read.
+        """
+        yield self._read()
+
+    def stream_range(self, start, end, chunk_size=None):
+        """Return iterator of a byte range of object contents in chunks.
+
+        :param start: Offset of first byte.
+        :type  start: ``int``
+        :param end: Offset of last byte (inclusive).
+        :type  end: ``int``
+        :param chunk_size: Maximum number of bytes per chunk (defaults to
+            ``CLOUD_BROWSER_DOCUMENT_CHUNK_SIZE``).
+        :type  chunk_size: ``int``
+        :rtype: iterator of ``bytes``
+        """
+        if chunk_size is None:
+            chunk_size = settings.CLOUD_BROWSER_DOCUMENT_CHUNK_SIZE
+        return self._stream_range(start, end, chunk_size)
+
+    def _stream_range(self, start, end, chunk_size):
+        """Return iterator of a byte range of object contents in chunks.
+
+        Defaults to discarding bytes outside of the range from the full
+        stream, so datastores should override this with a native ranged read.
+        """
+        position = 0
+        for chunk in self._stream(chunk_size):
+            next_position = position + len(chunk)
+            if next_position > start:
+                yield chunk[max(start - position, 0) : end + 1 - position]
+            if next_position > end:
+                break
+            position = next_position
+
+
+class ObjectPage(object):
+    """Columnar page of objects.
+
+    Listings are stored as parallel columns of names, sizes, modified
+    timestamps and subdirectory flags (plus optional columns like content
+    types and entity tags), which datastores can fill directly. Objects are
+    only created when accessed, so large pages are cheap to list and cache.
+
+    Pages behave as read-only sequences of objects, slicing to pages.
+    """
+
+    __slots__ = ("container", "names", "sizes", "mtimes", "dirs", "extra")
+
+    #: Optional columns (object keyword arguments).
+    EXTRA_COLUMNS = ("content_type", "content_encoding", "etag")
+
+    def __init__(self, container):
+        """Initializer.
+
+        :param container: Container of objects.
+        """
+        self.container = container
+        self.names = []
+        self.sizes = array("q")
+        self.mtimes = array("d")
+        self.dirs = bytearray()
+        self.extra = {}
+
+    def append(self, name, size=0, mtime=None, is_dir=False, **extra):
+        """Add object.
+
+        :param name: Object name / path.
+        :param size: Number of bytes in object.
+        :param mtime: Last modified POSIX timestamp (or ``None``).
+        :param is_dir: Is a subdirectory?
+        :kwarg extra: Values of optional columns (see ``EXTRA_COLUMNS``).
+        """
+        index = len(self.names)
+        self.names.append(name)
+        self.sizes.append(size or 0)
+        self.mtimes.append(float("nan") if mtime is None else mtime)
+        self.dirs.append(1 if is_dir else 0)
+        for column, value in extra.items():
+            values = self.extra.get(column)
+            if values is None:
+                if value is None:
+                    continue
+                values = self.extra[column] = [None] * index
+            values.append(value)
+
+        # Pad optional columns not given.
+        for values in self.extra.values():
+            if len(values) <= index:
+                values.append(None)
+
+    @classmethod
+    def from_objects(cls, container, objects):
+        """Create page from objects."""
+        page = cls(container)
+        for obj in objects:
+            mtime = obj.last_modified_timestamp
+            if mtime is not None:
+                mtime += obj.last_modified.microsecond / 1e6
+            page.append(
+                obj.name,
+                size=obj.size,
+                mtime=mtime,
+                is_dir=obj.is_subdir,
+                **dict((k, getattr(obj, k)) for k in cls.EXTRA_COLUMNS)
+            )
+        return page
+
+    def bind(self, container):
+        """Return page with the same objects in another container.
+
+        Columns are shared, so pages can be cached as plain data (bound to no
+        container) and bound to the container of each connection using them.
+        """
+        page = self.__class__(container)
+        page.names = self.names
+        page.sizes = self.sizes
+        page.mtimes = self.mtimes
+        page.dirs = self.dirs
+        page.extra = self.extra
+        return page
+
+    def __len__(self):
+        """Number of objects."""
+        return len(self.names)
+
+    def __iter__(self):
+        """Iterate objects."""
+        for index in range(len(self.names)):
+            yield self._get(index)
+
+    def __getitem__(self, index):
+        """Get object or page of objects for slice."""
+        if isinstance(index, slice):
+            page = self.__class__(self.container)
+            page.names = self.names[index]
+            page.sizes = self.sizes[index]
+            page.mtimes = self.mtimes[index]
+            page.dirs = self.dirs[index]
+            page.extra = dict((k, v[index]) for k, v in self.extra.items())
+            return page
+
+        if index < 0:
+            index += len(self.names)
+        if not 0 <= index < len(self.names):
+            raise IndexError("page index out of range")
+
+        return self._get(index)
+
+    def _get(self, index):
+        """Create object at index."""
+        container = self.container
+        obj_cls = container.obj_cls
+        mtime = self.mtimes[index]
+        last_modified = None if isnan(mtime) else obj_cls.dt_from_timestamp(mtime)
+        kwargs = dict((k, v[index]) for k, v in self.extra.items())
+        return obj_cls(
+            container,
+            self.names[index],
+            size=self.sizes[index],
+            last_modified=last_modified,
+            obj_type=(
+                obj_cls.type_cls.SUBDIR if self.dirs[index] else obj_cls.type_cls.FILE
+            ),
+            **kwargs
+        )
+
 
 class CloudContainer(object):
     """Cloud container wrapper."""
@@ -135,6 +420,74 @@ class CloudContainer(object):
         """Get objects."""
         raise NotImplementedError
 
+    def get_objects_page(
+        self,
+        path,
+        token=None,
+        limit=settings.CLOUD_BROWSER_DEFAULT_LIST_LIMIT,
+        marker=None,
+    ):
+        """Get objects and a continuation token for the next page.
+
+        Continuation tokens are signed and opaque to clients. Besides the
+        name of the last object (used as a ``marker``), they may carry
+        datastore-native paging state, so that the next page does not have
+        to re-derive its position from a key name.
+
+        :param path: Path within container.
+        :param token: Continuation token from a previous page.
+        :param limit: Maximum number of objects.
+        :param marker: Only return objects after this name. A token that
+            does not continue from ``marker`` is ignored.
+        :return: Objects and continuation token (or ``None`` if last page).
+        :rtype:  ``tuple`` of ``list``, ``str``
+        :raises: :class:`cloud_browser.cloud.errors.InvalidTokenException`
+        """
+        state = {"marker": marker}
+        if token is not None:
+            token_state = self.load_token(token, path)
+            if marker is None or token_state.get("marker") == marker:
+                state = token_state
+
+        objects, state = self._get_objects_page(path, state, limit)
+        token = self.dump_token(state, path) if state is not None else None
+        return objects, token
+
+    def _get_objects_page(self, path, state, limit):
+        """Get objects and paging state for the next page (or ``None``).
+
+        Defaults to a key name ``marker`` with :meth:`get_objects`, so
+        datastores should override this to add native paging state. The
+        returned state must include the ``marker`` of the last object.
+        """
+        objects = self.get_objects(path, state.get("marker"), limit + 1)
+        if len(objects) <= limit:
+            return objects, None
+
+        objects = objects[:limit]
+        return objects, {"marker": objects[-1].name}
+
+    def dump_token(self, state, path):
+        """Return signed continuation token for paging state."""
+        from django.core import signing
+
+        payload = {"container": self.name, "path": path, "state": state}
+        return signing.dumps(payload, salt=TOKEN_SALT, compress=True)
+
+    def load_token(self, token, path):
+        """Return paging state from signed continuation token."""
+        from django.core import signing
+
+        try:
+            payload = signing.loads(token, salt=TOKEN_SALT)
+        except signing.BadSignature:
+            raise errors.InvalidTokenException("Invalid continuation token.")
+
+        if (payload.get("container"), payload.get("path")) != (self.name, path):
+            raise errors.InvalidTokenException("Token is for a different path.")
+
+        return payload["state"]
+
     def get_object(self, path):
         """Get single object."""
         raise NotImplementedError
@@ -155,6 +508,15 @@ class CloudConnection(object):
         self.secret_key = secret_key
         self.__native = None
 
+        #: Containers by name (or ``None`` if disabled), see
+        #: :meth:`get_container`.
+        self.container_index = None
+        index_size = settings.CLOUD_BROWSER_CONTAINER_INDEX_SIZE
+        if index_size:
+            self.container_index = LruCache(
+                index_size, settings.CLOUD_BROWSER_CONTAINER_INDEX_TIMEOUT
+            )
+
     @property
     def native_conn(self):
         """Native connection object."""
@@ -167,22 +529,138 @@ class CloudConnection(object):
         """Return native connection object."""
         raise NotImplementedError
 
-    def get_containers(self):
-        """Return available containers."""
-        permitted = lambda c: settings.container_permitted(c.name)
-        return [c for c in self._get_containers() if permitted(c)]
+    def check(self):
+        """Return whether connection is usable (e.g., before reuse from a
+        connection pool).
+
+        Defaults to ``True``, so datastores should override this with a
+        cheap native check, if any.
+        """
+        return True
+
+    @property
+    def cache_id(self):
+        """Unique datastore identifier for shared cache keys."""
+        return "%s:%s" % (self.__class__.__name__, self.account)
+
+    def cache_key(self, *parts):
+        """Return shared cache key for datastore and key parts."""
+        key = ":".join(str(x) for x in (self.cache_id,) + parts)
+        return "cloud_browser:%s" % md5(key.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _get_cache(cls):
+        """Return shared Django cache."""
+        from django.core.cache import caches
+
+        return caches[settings.CLOUD_BROWSER_CACHE_BACKEND]
+
+    def get_containers(self, marker=None, limit=None):
+        """Return available containers.
 
-    def _get_containers(self):
-        """Return available containers."""
+        If ``CLOUD_BROWSER_CONTAINER_CACHE_TIMEOUT`` is set, the permitted
+        containers are stored in the shared Django cache, so that repeated
+        listings across requests and workers skip the datastore round-trip.
+
+        :param marker: Only return containers with names after marker.
+        :param limit: Maximum number of containers or ``None`` for all.
+        """
+        timeout = settings.CLOUD_BROWSER_CONTAINER_CACHE_TIMEOUT
+        if not timeout:
+            return self._get_permitted_containers(marker, limit)
+
+        cache = self._get_cache()
+        version = self._get_containers_version(cache)
+        key = self.cache_key("containers", version, marker, limit)
+        infos = cache.get(key)
+        if infos is None:
+            containers = self._get_permitted_containers(marker, limit)
+            infos = [(c.name, c.count, c.size) for c in containers]
+            cache.set(key, infos, timeout)
+            return containers
+
+        return [self.cont_cls(self, *info) for info in infos]
+
+    def _get_containers_version(self, cache):
+        """Return current generation of cached containers."""
+        key = self.cache_key("containers", "version")
+        version = cache.get(key)
+        if version is None:
+            version = 0
+            cache.add(key, version, None)
+
+        return version
+
+    def invalidate_containers(self):
+        """Remove available containers from the container index and the
+        shared cache."""
+        if self.container_index is not None:
+            self.container_index.clear()
+
+        if not settings.CLOUD_BROWSER_CONTAINER_CACHE_TIMEOUT:
+            return
+
+        cache = self._get_cache()
+        key = self.cache_key("containers", "version")
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+    def _get_permitted_containers(self, marker=None, limit=None):
+        """Return available and permitted containers.
+
+        Datastore pages are fetched until ``limit`` permitted containers are
+        found, as white / black lists may filter out part of a page.
+        """
+        containers = []
+        while True:
+            page = self._get_containers(marker, limit)
+            containers.extend(c for c in page if settings.container_permitted(c.name))
+            if limit is None or len(page) < limit or len(containers) >= limit:
+                break
+            marker = page[-1].name
+
+        # Index listed containers, keeping any with native handles.
+        index = self.container_index
+        if index is not None:
+            for container in containers:
+                if index.get(container.name) is None:
+                    index.set(container.name, container)
+
+        return containers[:limit]
+
+    def _get_containers(self, marker=None, limit=None):
+        """Return available containers.
+
+        Datastores should return containers sorted by name, only with names
+        after ``marker`` and at most ``limit`` of them (if not ``None``).
+        """
         raise NotImplementedError
 
     def get_container(self, path):
-        """Return single container."""
+        """Return single container.
+
+        Containers are kept in the container index (if enabled with
+        ``CLOUD_BROWSER_CONTAINER_INDEX_SIZE``), so that repeated lookups
+        across requests skip the datastore round-trip and reuse native
+        container handles.
+        """
         if not settings.container_permitted(path):
             raise errors.NotPermittedException(
                 'Access to container "%s" is not permitted.' % path
             )
-        return self._get_container(path)
+
+        index = self.container_index
+        if index is None:
+            return self._get_container(path)
+
+        container = index.get(path)
+        if container is None:
+            container = self._get_container(path)
+            index.set(path, container)
+
+        return container
 
     def _get_container(self, path):
         """Return single container."""
@@ -64,6 +64,8 @@ class BotoBucketWrapper(errors.CloudExceptionWrapper):
 class BotoObject(base.CloudObject):
     """Boto 'key' object wrapper."""
 
+    __slots__ = ()
+
     #: Exception translations.
     wrap_boto_errors = BotoKeyWrapper()
 
@@ -87,6 +89,21 @@ class BotoObject(base.CloudObject):
         """Return contents of object."""
         return self.native_obj.read()
 
+    def _stream(self, chunk_size):
+        """Return iterator of object contents in chunks."""
+        key = self.native_obj
+        try:
+            for chunk in iter(lambda: key.read(chunk_size), b""):
+                yield chunk
+        finally:
+            key.close()
+
+    @wrap_boto_errors
+    def _stream_range(self, start, end, chunk_size):
+        """Return iterator of a byte range of object contents in chunks."""
+        self.native_obj.open_read(headers={"Range": "bytes=%s-%s" % (start, end)})
+        return self._stream(chunk_size)
+
     @classmethod
     def from_result(cls, container, result):
         """Create from ambiguous result."""
@@ -125,6 +142,7 @@ class BotoObject(base.CloudObject):
             content_encoding=key.content_encoding,
             last_modified=dt_from_header(key.last_modified),
             obj_type=cls.type_cls.FILE,
+            etag=key.etag,
         )
 
 
@@ -171,6 +189,35 @@ class BotoContainer(base.CloudContainer):
 
         return [self.obj_cls.from_result(self, r) for r in results]
 
+    @wrap_boto_errors
+    def _get_objects_page(self, path, state, limit):
+        """Get objects and paging state for the next page (or ``None``).
+
+        The native marker is the raw key or prefix name (with trailing
+        separator), which the datastore skips, so there is no need to
+        strip a marker echo as :meth:`get_objects` does.
+        """
+        from itertools import islice
+
+        if state.get("marker") is not None and "native_marker" not in state:
+            return super(BotoContainer, self)._get_objects_page(path, state, limit)
+
+        path = path.rstrip(SEP) + SEP if path else path
+        marker = state.get("native_marker", "")
+        result_set = self.native_container.list(path, SEP, marker)
+        results = list(islice(result_set, limit + 1))
+
+        state = None
+        if len(results) > limit:
+            results = results[:limit]
+            state = {"native_marker": results[-1].name}
+
+        objects = [self.obj_cls.from_result(self, r) for r in results]
+        if state is not None:
+            state["marker"] = objects[-1].name
+
+        return objects, state
+
     @wrap_boto_errors
     def get_object(self, path):
         """Get single object."""
@@ -202,10 +249,16 @@ class BotoConnection(base.CloudConnection):
         raise NotImplementedError("Must create boto connection.")
 
     @wrap_boto_errors
-    def _get_containers(self):
-        """Return available containers."""
-        buckets = self.native_conn.get_all_buckets()
-        return [self.cont_cls.from_bucket(self, b) for b in buckets]
+    def _get_containers(self, marker=None, limit=None):
+        """Return available containers.
+
+        Bucket listings cannot be paged, so page the full listing here.
+        """
+        buckets = sorted(self.native_conn.get_all_buckets(), key=lambda b: b.name)
+        return [
+            self.cont_cls.from_bucket(self, b)
+            for b in base.page_by_name(buckets, marker, limit)
+        ]
 
     @wrap_boto_errors
     def _get_container(self, path):
@@ -0,0 +1,265 @@
+"""Datastore listing and metadata caching.
+
+The caching layer wraps any :class:`cloud_browser.cloud.base.CloudConnection`
+and transparently caches container object listings and single object
+metadata in process memory, so that browsing the same hot prefixes does
+not re-issue identical datastore queries.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from cloud_browser.app_settings import settings
+from cloud_browser.common import SEP
+
+
+###############################################################################
+# Cache
+###############################################################################
+class LruCache(object):
+    """Thread-safe, size-bounded LRU cache with expiring entries."""
+
+    def __init__(self, max_size, timeout=None):
+        """Initializer.
+
+        :param max_size: Maximum number of entries.
+        :type  max_size: ``int``
+        :param timeout: Seconds until entries expire or ``None`` for never.
+        :type  timeout: ``int``
+        """
+        self.max_size = max_size
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Number of entries (including expired ones not yet evicted)."""
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """Return cached value or ``default`` if missing or expired."""
+        with self._lock:
+            try:
+                expires, value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires is not None and expires <= time.time():
+                self.misses += 1
+                return default
+
+            # Re-insert as most recently used.
+            self._data[key] = (expires, value)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Cache value, evicting least recently used entries if full."""
+        expires = None if self.timeout is None else time.time() + self.timeout
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (expires, value)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove entry, if any."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_matching(self, predicate):
+        """Remove all entries with keys matching predicate."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    @property
+    def hit_rate(self):
+        """Ratio of hits to lookups (or ``None`` if no lookups)."""
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else None
+
+    def stats(self):
+        """Return dictionary of cache statistics."""
+        return {
+            "size": len(self),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+
+###############################################################################
+# Datastore wrappers
+###############################################################################
+class CachedContainer(object):
+    """Container proxy caching object listings and metadata.
+
+    Listings are keyed on ``(datastore, container, path, marker, limit)``
+    (plus continuation token for pages) and
+    metadata on ``(datastore, container, path)``. All other attributes are
+    passed through to the wrapped container.
+    """
+
+    #: Listing key type.
+    OBJECTS = "objects"
+
+    #: Metadata key type.
+    OBJECT = "object"
+
+    def __init__(self, container, cache):
+        """Initializer.
+
+        :param container: Wrapped container.
+        :type  container: :class:`cloud_browser.cloud.base.CloudContainer`
+        :param cache: Shared cache.
+        :type  cache: :class:`LruCache`
+        """
+        self.wrapped = container
+        self.cache = cache
+
+    def __getattr__(self, name):
+        """Pass through to wrapped container."""
+        return getattr(self.wrapped, name)
+
+    def _key(self, *parts):
+        """Return cache key."""
+        return (parts[0], self.wrapped.conn.cache_id, self.wrapped.name) + parts[1:]
+
+    def get_objects(
+        self, path, marker=None, limit=settings.CLOUD_BROWSER_DEFAULT_LIST_LIMIT
+    ):
+        """Get objects."""
+        key = self._key(self.OBJECTS, path, marker, limit)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._load(*cached)
+
+        objects = self.wrapped.get_objects(path, marker, limit)
+        self.cache.set(key, self._dump(objects))
+        return objects
+
+    def get_objects_page(
+        self,
+        path,
+        token=None,
+        limit=settings.CLOUD_BROWSER_DEFAULT_LIST_LIMIT,
+        marker=None,
+    ):
+        """Get objects and a continuation token for the next page."""
+        key = self._key(self.OBJECTS, path, marker, limit, token)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._load(*cached[:2]), cached[2]
+
+        objects, next_token = self.wrapped.get_objects_page(path, token, limit, marker)
+        self.cache.set(key, self._dump(objects) + (next_token,))
+        return objects, next_token
+
+    def get_object(self, path):
+        """Get single object."""
+        key = self._key(self.OBJECT, path)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._load(*cached)[0]
+
+        obj = self.wrapped.get_object(path)
+        self.cache.set(key, self._dump([obj]))
+        return obj
+
+    @classmethod
+    def _dump(cls, objects):
+        """Return cache entry of objects.
+
+        Caches are shared between connections, so objects are cached as
+        plain data (a page bound to no container) and only bound to a
+        container of the connection looking them up (see :meth:`_load`).
+        """
+        from cloud_browser.cloud.base import ObjectPage
+
+        if isinstance(objects, ObjectPage):
+            return objects.bind(None), False
+
+        return ObjectPage.from_objects(None, objects), True
+
+    def _load(self, page, is_list):
+        """Return objects of cache entry in the wrapped container."""
+        page = page.bind(self.wrapped)
+        return list(page) if is_list else page
+
+
+class CachedConnection(object):
+    """Connection proxy caching object listings and metadata.
+
+    Can be used in front of any datastore connection, e.g.::
+
+        cache = LruCache(max_size=10000, timeout=60)
+        conn = CachedConnection(FilesystemConnection("/srv/files"), cache)
+
+    Containers returned by the connection are wrapped with
+    :class:`CachedContainer`. Caches may be shared between connections to
+    the same datastore.
+    """
+
+    #: Container proxy class.
+    cached_cont_cls = CachedContainer
+
+    def __init__(self, conn, cache):
+        """Initializer.
+
+        :param conn: Wrapped connection.
+        :type  conn: :class:`cloud_browser.cloud.base.CloudConnection`
+        :param cache: Shared cache.
+        :type  cache: :class:`LruCache`
+        """
+        self.wrapped = conn
+        self.cache = cache
+
+    def __getattr__(self, name):
+        """Pass through to wrapped connection."""
+        return getattr(self.wrapped, name)
+
+    def get_containers(self, marker=None, limit=None):
+        """Return available containers."""
+        return [
+            self.cached_cont_cls(c, self.cache)
+            for c in self.wrapped.get_containers(marker, limit)
+        ]
+
+    def get_container(self, path):
+        """Return single container."""
+        return self.cached_cont_cls(self.wrapped.get_container(path), self.cache)
+
+    def invalidate(self, container=None, path=None):
+        """Remove cached listings and metadata.
+
+        :param container: Container name or ``None`` for all containers.
+        :param path: Changed directory path within container or ``None`` for
+            the entire container. Listings of the path and metadata of the
+            path and its immediate children are removed.
+        """
+        cache_id = self.wrapped.cache_id
+        path = path.strip(SEP) if path is not None else None
+
+        def _matches(key):
+            kind, key_cache_id, key_container, key_path = key[:4]
+            if key_cache_id != cache_id:
+                return False
+            if container is not None and key_container != container:
+                return False
+            if path is None:
+                return True
+            if kind == CachedContainer.OBJECTS:
+                return key_path.strip(SEP) == path
+            return key_path == path or key_path.rpartition(SEP)[0] == path
+
+        self.cache.delete_matching(_matches)
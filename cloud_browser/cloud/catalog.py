@@ -0,0 +1,256 @@
+"""Filesystem catalog.
+
+For very large (or slow, e.g., network mounted) filesystem trees, the
+filesystem datastore can serve listings, counts and metadata from a local
+SQLite catalog instead of the disk being browsed. Set
+``CLOUD_BROWSER_FILESYSTEM_CATALOG`` to the catalog database path and build
+or refresh it with::
+
+    $ python manage.py cloud_browser_catalog
+
+Refreshes only re-scan directories whose modified time changed. Files
+changed in place do not change their directory, so use ``--full`` to
+periodically re-scan everything.
+"""
+import errno
+import os
+import sqlite3
+import threading
+import time
+from stat import S_ISDIR
+
+from cloud_browser.cloud.fs import INDEX_SETTLE_SECONDS, not_dot, path_to_os
+from cloud_browser.common import SEP
+
+###############################################################################
+# Constants
+###############################################################################
+#: Character after separator, bounding subtree path ranges.
+SEP_NEXT = chr(ord(SEP) + 1)
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS entries (
+        parent TEXT NOT NULL,
+        name TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        is_dir INTEGER NOT NULL,
+        PRIMARY KEY (parent, name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dirs (
+        path TEXT PRIMARY KEY,
+        mtime REAL,
+        count INTEGER NOT NULL,
+        size INTEGER NOT NULL
+    )
+    """,
+)
+
+
+###############################################################################
+# Classes
+###############################################################################
+class Catalog(object):
+    """SQLite catalog of a filesystem tree.
+
+    Paths are relative to the root directory and use ``/`` separators, with
+    containers as the top-level directories. Entries (files and
+    directories) are keyed on ``(parent, name)``, so directory listings are
+    index range queries. Directories store their modified time at the last
+    scan and the total number and size of files below them.
+    """
+
+    def __init__(self, db_path, root):
+        """Initializer.
+
+        :param db_path: SQLite database path.
+        :param root: Filesystem root directory.
+        """
+        self.db_path = db_path
+        self.root = os.path.abspath(path_to_os(root))
+        self._local = threading.local()
+
+    @property
+    def conn(self):
+        """Database connection (per thread)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+
+        return conn
+
+    def list(self, parent, marker="", limit=None):
+        """Return entry rows of directory sorted by name.
+
+        :param parent: Directory path.
+        :param marker: Only return entries with names after marker.
+        :param limit: Maximum number of entries or ``None`` for all.
+        :rtype: ``list`` of ``(name, size, mtime, is_dir)``
+        """
+        return self.conn.execute(
+            "SELECT name, size, mtime, is_dir FROM entries "
+            "WHERE parent = ? AND name > ? ORDER BY name LIMIT ?",
+            (parent.strip(SEP), marker or "", -1 if limit is None else limit),
+        ).fetchall()
+
+    def get(self, path):
+        """Return entry row ``(name, size, mtime, is_dir)`` or ``None``."""
+        parent, _, name = path.strip(SEP).rpartition(SEP)
+        return self.conn.execute(
+            "SELECT name, size, mtime, is_dir FROM entries "
+            "WHERE parent = ? AND name = ?",
+            (parent, name),
+        ).fetchone()
+
+    def totals(self, path):
+        """Return total ``(count, size)`` of files below directory path."""
+        row = self.conn.execute(
+            "SELECT count, size FROM dirs WHERE path = ?", (path.strip(SEP),)
+        ).fetchone()
+        return row if row is not None else (0, 0)
+
+    def refresh(self, full=False):
+        """Scan changed directories of filesystem tree into catalog.
+
+        :param full: Re-scan all directories (e.g., to pick up files changed
+            in place).
+        :return: Number of directories and number of re-scanned directories.
+        :rtype:  ``tuple`` of ``int``, ``int``
+        """
+        conn = self.conn
+        dirs, scanned = [], 0
+        with conn:
+            # Walk the tree top down with an explicit stack, as filesystem
+            # trees may be deeper than the recursion limit.
+            stack = [""]
+            while stack:
+                path = stack.pop()
+                result = self._refresh_dir(path, full)
+                if result is None:
+                    continue
+                mtime, is_scanned, subdirs = result
+                dirs.append((path, mtime, subdirs))
+                scanned += is_scanned
+                stack.extend(subdirs)
+
+            # Totals are re-computed bottom up, as changes in subdirectories
+            # do not change the modified times of their parents.
+            totals = {}
+            for path, mtime, subdirs in reversed(dirs):
+                count, size = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries "
+                    "WHERE parent = ? AND is_dir = 0",
+                    (path,),
+                ).fetchone()
+                for subdir in subdirs:
+                    sub_count, sub_size = totals.pop(subdir, (0, 0))
+                    count += sub_count
+                    size += sub_size
+                totals[path] = count, size
+
+                # Do not trust modified times of recently changed directories,
+                # as timestamps may be too coarse to detect further changes.
+                if time.time() - mtime <= INDEX_SETTLE_SECONDS:
+                    mtime = None
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO dirs (path, mtime, count, size) "
+                    "VALUES (?, ?, ?, ?)",
+                    (path, mtime, count, size),
+                )
+
+        return len(dirs), scanned
+
+    def _refresh_dir(self, path, full):
+        """Re-scan directory path if changed.
+
+        :return: Modified time, whether re-scanned and subdirectory paths (or
+            ``None`` if removed since its parent was scanned).
+        :rtype:  ``tuple`` of ``float``, ``bool``, ``list``
+        """
+        conn = self.conn
+        os_path = os.path.join(self.root, path_to_os(path))
+        scanned = False
+        try:
+            info = os.stat(os_path)
+            if not S_ISDIR(info.st_mode):
+                raise OSError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), os_path)
+
+            row = conn.execute(
+                "SELECT mtime FROM dirs WHERE path = ?", (path,)
+            ).fetchone()
+            if full or row is None or row[0] != info.st_mtime:
+                self._scan_dir(path, os_path)
+                scanned = True
+        except OSError as exc:
+            if not path or exc.errno not in (errno.ENOENT, errno.ENOTDIR):
+                raise
+
+            # Removed (or replaced by a file) since its parent was scanned,
+            # which the next refresh of the parent picks up.
+            parent, _, name = path.rpartition(SEP)
+            conn.execute(
+                "DELETE FROM entries WHERE parent = ? AND name = ?", (parent, name)
+            )
+            self._delete_tree(path)
+            return None
+
+        subdirs = [
+            SEP.join((path, name)).strip(SEP)
+            for (name,) in conn.execute(
+                "SELECT name FROM entries WHERE parent = ? AND is_dir = 1", (path,)
+            )
+        ]
+        return info.st_mtime, scanned, subdirs
+
+    def _scan_dir(self, path, os_path):
+        """Replace catalog entries of directory path from disk."""
+        conn = self.conn
+        old_dirs = set(
+            name
+            for (name,) in conn.execute(
+                "SELECT name FROM entries WHERE parent = ? AND is_dir = 1", (path,)
+            )
+        )
+
+        rows = []
+        for name in os.listdir(os_path):
+            if not not_dot(name):
+                continue
+            try:
+                info = os.stat(os.path.join(os_path, name))
+            except OSError:
+                # Removed since listing.
+                continue
+            is_dir = int(S_ISDIR(info.st_mode))
+            rows.append((path, name, info.st_size, info.st_mtime, is_dir))
+
+        conn.execute("DELETE FROM entries WHERE parent = ?", (path,))
+        conn.executemany(
+            "INSERT INTO entries (parent, name, size, mtime, is_dir) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+
+        for name in old_dirs - set(row[1] for row in rows if row[4]):
+            self._delete_tree(SEP.join((path, name)).strip(SEP))
+
+    def _delete_tree(self, path):
+        """Remove directory path and everything below it from catalog."""
+        lower, upper = path + SEP, path + SEP_NEXT
+        conn = self.conn
+        conn.execute(
+            "DELETE FROM entries WHERE parent = ? OR (parent > ? AND parent < ?)",
+            (path, lower, upper),
+        )
+        conn.execute(
+            "DELETE FROM dirs WHERE path = ? OR (path > ? AND path < ?)",
+            (path, lower, upper),
+        )
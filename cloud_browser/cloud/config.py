@@ -1,12 +1,23 @@
 """Cloud configuration."""
+import sys
+import threading
 
 
 class Config(object):
     """General class helper to construct connection objects."""
 
-    __connection_obj = None
+    #: Pool of connections borrowed by request threads.
+    REQUEST_POOL = "requests"
+
+    #: Pool of connections of background query threads (sized to their
+    #: number), so that requests waiting on background queries cannot take
+    #: all connections the queries need.
+    QUERY_POOL = "queries"
+
+    __connection_pools = None
     __connection_cls = None
     __connection_fn = None
+    __lock = threading.Lock()
 
     @classmethod
     def from_settings(cls):
@@ -73,14 +84,62 @@ class Config(object):
             if root is not None:
                 from cloud_browser.cloud.fs import FilesystemConnection
 
+                catalog = None
+                if settings.CLOUD_BROWSER_FILESYSTEM_CATALOG:
+                    from cloud_browser.cloud.catalog import Catalog
+
+                    catalog = Catalog(settings.CLOUD_BROWSER_FILESYSTEM_CATALOG, root)
+
                 conn_cls = FilesystemConnection
-                conn_fn = lambda: FilesystemConnection(root)
+                conn_fn = lambda: FilesystemConnection(root, catalog=catalog)
+
+        elif datastore == "Memory":
+            # In-memory (simulated) datastore
+            from cloud_browser.cloud.memory import MemoryConnection
+
+            latency = settings.CLOUD_BROWSER_MEMORY_LATENCY
+            bandwidth = settings.CLOUD_BROWSER_MEMORY_BANDWIDTH
+            error_rate = settings.CLOUD_BROWSER_MEMORY_ERROR_RATE
+            conn_cls = MemoryConnection
+            conn_fn = lambda: MemoryConnection(
+                latency=latency, bandwidth=bandwidth, error_rate=error_rate
+            )
+
+        elif datastore == "Replay":
+            # Recorded datastore
+            cassette = settings.CLOUD_BROWSER_REPLAY_CASSETTE
+            if cassette:
+                from cloud_browser.cloud.replay import ReplayConnection
+
+                latency_scale = settings.CLOUD_BROWSER_REPLAY_LATENCY_SCALE
+                conn_cls = ReplayConnection
+                conn_fn = lambda: ReplayConnection(
+                    cassette, latency_scale=latency_scale
+                )
 
         if conn_cls is None:
             raise ImproperlyConfigured(
                 "No suitable credentials found for datastore: %s." % datastore
             )
 
+        # Record datastore calls for replay.
+        record_path = settings.CLOUD_BROWSER_RECORD_CASSETTE
+        if record_path:
+            from cloud_browser.cloud.replay import Cassette, RecordingConnection
+
+            cassette = Cassette(record_path)
+            unrecorded_fn = conn_fn
+            conn_fn = lambda: RecordingConnection(unrecorded_fn(), cassette)
+
+        # Wrap connections with a shared listing and metadata cache.
+        cache_size = settings.CLOUD_BROWSER_OBJECT_CACHE_SIZE
+        if cache_size:
+            from cloud_browser.cloud.cache import CachedConnection, LruCache
+
+            cache = LruCache(cache_size, settings.CLOUD_BROWSER_OBJECT_CACHE_TIMEOUT)
+            uncached_fn = conn_fn
+            conn_fn = lambda: CachedConnection(uncached_fn(), cache)
+
         # Adjust connection function.
         conn_fn = staticmethod(conn_fn)
 
@@ -100,14 +159,81 @@ class Config(object):
             cls.__connection_cls, _ = cls.from_settings()
         return cls.__connection_cls
 
+    @classmethod
+    def get_connection_pool(cls, name=REQUEST_POOL):
+        """Return connection pool.
+
+        :param name: Pool name, ``REQUEST_POOL`` or ``QUERY_POOL``.
+        :rtype: :class:`cloud_browser.cloud.pool.ConnectionPool`
+        """
+        if cls.__connection_pools is None:
+            with cls.__lock:
+                if cls.__connection_pools is None:
+                    cls.__connection_pools = cls._create_pools()
+        return cls.__connection_pools[name]
+
+    @classmethod
+    def _create_pools(cls):
+        """Create connection pools from settings."""
+        from cloud_browser.app_settings import settings
+        from cloud_browser.cloud.pool import ConnectionPool
+        from django.core import signals
+
+        if cls.__connection_fn is None:
+            _, cls.__connection_fn = cls.from_settings()
+
+        pools = {}
+        for name, max_size in (
+            (cls.REQUEST_POOL, settings.CLOUD_BROWSER_CONNECTION_POOL_SIZE),
+            (cls.QUERY_POOL, settings.CLOUD_BROWSER_QUERY_THREADS),
+        ):
+            pools[name] = ConnectionPool(
+                cls.__connection_fn,
+                max_size=max_size,
+                timeout=settings.CLOUD_BROWSER_CONNECTION_POOL_TIMEOUT,
+                idle_timeout=settings.CLOUD_BROWSER_CONNECTION_IDLE_TIMEOUT,
+            )
+
+        # Return connections of requests when finished, dropping connections
+        # of requests failing with unexpected (e.g., socket) errors.
+        pool = pools[cls.REQUEST_POOL]
+
+        def _finished(**kwargs):  # pylint: disable=W0613
+            pool.release_thread(discard=getattr(_local, "discard", False))
+            _local.discard = False
+
+        def _failed(**kwargs):  # pylint: disable=W0613
+            from cloud_browser.cloud import errors
+
+            exc = sys.exc_info()[1]
+            _local.discard = not isinstance(exc, errors.CloudException)
+
+        _local = threading.local()
+        signals.request_finished.connect(
+            _finished, weak=False, dispatch_uid="cloud_browser_pool_finished"
+        )
+        signals.got_request_exception.connect(
+            _failed, weak=False, dispatch_uid="cloud_browser_pool_failed"
+        )
+
+        # Invalidate caches of changed filesystem directories.
+        if (
+            settings.CLOUD_BROWSER_DATASTORE == "Filesystem"
+            and settings.CLOUD_BROWSER_FILESYSTEM_WATCH
+        ):
+            from cloud_browser.cloud.watch import watch_connection
+
+            watch_connection(cls.__connection_fn(), pools=pools.values())
+
+        return pools
+
     @classmethod
     def get_connection(cls):
-        """Return connection object.
+        """Return connection object of the current thread.
+
+        Connections are borrowed from the connection pool until the current
+        request finishes.
 
         :rtype: :class:`cloud_browser.cloud.base.CloudConnection`
         """
-        if cls.__connection_obj is None:
-            if cls.__connection_fn is None:
-                _, cls.__connection_fn = cls.from_settings()
-            cls.__connection_obj = cls.__connection_fn()
-        return cls.__connection_obj
+        return cls.get_connection_pool().get()
@@ -34,6 +34,12 @@ class NoObjectException(CloudException):
     pass
 
 
+class InvalidTokenException(CloudException):
+    """Bad or tampered continuation token."""
+
+    pass
+
+
 class CloudExceptionWrapper(object):
     """Exception translator.
 
@@ -1,18 +1,32 @@
 """File-system datastore."""
 from __future__ import with_statement
 
+import heapq
 import os
 import re
+import time
+from bisect import bisect_right
+from stat import S_ISDIR
 
 from cloud_browser.app_settings import settings
 from cloud_browser.cloud import base, errors
-from cloud_browser.common import SEP
+from cloud_browser.cloud.cache import LruCache
+from cloud_browser.common import SEP, get_executor, thread_map
 
 ###############################################################################
 # Helpers / Constants
 ###############################################################################
 NO_DOT_RE = re.compile("^[^.]+")
 
+# Directory iteration without stats (Python 3.5+).
+scandir = getattr(os, "scandir", None)  # pylint: disable=C0103
+
+# Seconds after modification during which directory indexes are not cached,
+# as file system timestamps may be too coarse to detect further changes.
+INDEX_SETTLE_SECONDS = 2
+
+_DIR_INDEX = None
+
 
 def path_to_os(path):
     return path.replace(SEP, os.path.sep)
@@ -34,6 +48,20 @@ def listdir(path):
     return [os_to_path(result) for result in os.listdir(path_to_os(path))]
 
 
+def iterdir(path):
+    """Return iterator of directory entry names (without stats)."""
+    if scandir is None:
+        names = os.listdir(path_to_os(path))
+    else:
+        names = (entry.name for entry in scandir(path_to_os(path)))
+
+    return (os_to_path(name) for name in names)
+
+
+def stat(path):
+    return os.stat(path_to_os(path))
+
+
 def getmtime(path):
     return os.path.getmtime(path_to_os(path))
 
@@ -46,6 +74,94 @@ def abspath(path):
     return os.path.abspath(path_to_os(path))
 
 
+def name_marker(path, marker=None):
+    """Return entry name marker within directory for a container marker.
+
+    :param path: Directory path within container.
+    :param marker: Container path marker (or ``None``).
+    :return: Only entry names after the returned name follow the marker,
+        or ``None`` if no entries follow it.
+    """
+    if marker is None:
+        return ""
+
+    marker = marker.strip(SEP)
+    prefix = path.strip(SEP) + SEP if path.strip(SEP) else ""
+    if marker.startswith(prefix):
+        return marker[len(prefix) :]
+
+    return None if marker > prefix else ""
+
+
+def page_names(names, path, marker=None, limit=None):
+    """Return page of sorted directory entry names after marker.
+
+    :param names: Sorted entry names of directory.
+    :param path: Directory path within container.
+    :param marker: Only return names with container paths after marker.
+    :param limit: Maximum number of names or ``None`` for all.
+    """
+    after = name_marker(path, marker)
+    start = len(names) if after is None else bisect_right(names, after)
+    end = None if limit is None else start + limit
+    return names[start:end]
+
+
+class DirectoryIndex(object):
+    """Sorted directory entry names, cached until a directory changes.
+
+    Names are cached per directory and reused while the directory modified
+    time is unchanged, so paging through a large directory only stats the
+    directory instead of enumerating and sorting it for every page.
+    """
+
+    def __init__(self, max_size):
+        """Initializer.
+
+        :param max_size: Maximum number of indexed directories.
+        :type  max_size: ``int``
+        """
+        self.cache = LruCache(max_size)
+
+    def names(self, path):
+        """Return sorted (non-dot) entry names of directory."""
+        path = path.rstrip(SEP)
+        info = stat(path)
+        version = (info.st_mtime, info.st_size)
+        cached = self.cache.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        names = sorted(name for name in iterdir(path) if not_dot(name))
+        if time.time() - info.st_mtime > INDEX_SETTLE_SECONDS:
+            self.cache.set(path, (version, names))
+
+        return names
+
+    def invalidate(self, path=None):
+        """Remove index of directory path or ``None`` for all directories."""
+        if path is None:
+            self.cache.clear()
+        else:
+            self.cache.delete(path.rstrip(SEP))
+
+
+def get_stat_executor():
+    """Return shared thread pool for stat calls (or ``None`` if disabled)."""
+    return get_executor("fs_stat", settings.CLOUD_BROWSER_FILESYSTEM_STAT_THREADS)
+
+
+def get_dir_index():
+    """Return shared directory index (or ``None`` if disabled)."""
+    global _DIR_INDEX  # pylint: disable=W0603
+
+    max_size = settings.CLOUD_BROWSER_FILESYSTEM_INDEX_SIZE
+    if _DIR_INDEX is None and max_size:
+        _DIR_INDEX = DirectoryIndex(max_size)
+
+    return _DIR_INDEX
+
+
 ###############################################################################
 # Classes
 ###############################################################################
@@ -68,6 +184,8 @@ wrap_fs_obj_errors = FilesystemObjectWrapper()  # pylint: disable=C0103
 class FilesystemObject(base.CloudObject):
     """Filesystem object wrapper."""
 
+    __slots__ = ()
+
     def _get_object(self):
         """Return native storage object."""
         return object()
@@ -77,11 +195,54 @@ class FilesystemObject(base.CloudObject):
         with open(self.base_path, "rb") as file_obj:
             return file_obj.read()
 
+    def _stream(self, chunk_size):
+        """Return iterator of object contents in chunks."""
+        with open(self.base_path, "rb") as file_obj:
+            for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+                yield chunk
+
+    def _stream_range(self, start, end, chunk_size):
+        """Return iterator of a byte range of object contents in chunks."""
+        with open(self.base_path, "rb") as file_obj:
+            file_obj.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = file_obj.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    @classmethod
+    def dt_from_timestamp(cls, timestamp):
+        """Convert POSIX timestamp to last modified date (in local time)."""
+        from datetime import datetime
+
+        return datetime.fromtimestamp(timestamp)
+
+    @property
+    def last_modified_timestamp(self):
+        """Last modified POSIX timestamp (or ``None`` if unknown).
+
+        Filesystem dates are in local time.
+        """
+        from time import mktime
+
+        if self.last_modified is None:
+            return None
+
+        return int(mktime(self.last_modified.timetuple()))
+
     @property
     def base_path(self):
         """Base absolute path of container."""
         return SEP.join((self.container.base_path, self.name))
 
+    @property
+    def local_path(self):
+        """Local file path for serving contents directly."""
+        return path_to_os(self.base_path) if self.is_file else None
+
     @classmethod
     def from_path(cls, container, path):
         """Create object from path."""
@@ -89,18 +250,38 @@ class FilesystemObject(base.CloudObject):
 
         path = path.strip(SEP)
         full_path = SEP.join((container.base_path, path))
-        last_modified = datetime.fromtimestamp(getmtime(full_path))
-        obj_type = cls.type_cls.SUBDIR if is_dir(full_path) else cls.type_cls.FILE
+        info = stat(full_path)
+        last_modified = datetime.fromtimestamp(info.st_mtime)
+        obj_type = (
+            cls.type_cls.SUBDIR
+            if not_dot(full_path) and S_ISDIR(info.st_mode)
+            else cls.type_cls.FILE
+        )
 
         return cls(
             container,
             name=path,
-            size=getsize(full_path),
+            size=info.st_size,
             content_type=None,
             last_modified=last_modified,
             obj_type=obj_type,
         )
 
+    @classmethod
+    def from_catalog(cls, container, path, row):
+        """Create object from catalog entry row."""
+        from datetime import datetime
+
+        _, size, mtime, is_dir = row
+        return cls(
+            container,
+            name=path.strip(SEP),
+            size=size,
+            content_type=None,
+            last_modified=datetime.fromtimestamp(mtime),
+            obj_type=cls.type_cls.SUBDIR if is_dir else cls.type_cls.FILE,
+        )
+
 
 class FilesystemContainer(base.CloudContainer):
     """Filesystem container wrapper."""
@@ -116,7 +297,16 @@ class FilesystemContainer(base.CloudContainer):
     def get_objects(
         self, path, marker=None, limit=settings.CLOUD_BROWSER_DEFAULT_LIST_LIMIT
     ):
-        """Get objects."""
+        """Get objects.
+
+        Listings are served from the catalog, if any (see
+        :mod:`cloud_browser.cloud.catalog`), with indexed range queries.
+        Otherwise, pages are found with a binary search of the shared
+        directory index (see :class:`DirectoryIndex`). Without an index, only
+        names are enumerated and the page is selected without sorting the
+        full directory. Either way, only the returned objects are stat'ed
+        (concurrently, if ``CLOUD_BROWSER_FILESYSTEM_STAT_THREADS`` is set).
+        """
 
         def _filter(name):
             """Filter."""
@@ -124,18 +314,51 @@ class FilesystemContainer(base.CloudContainer):
                 marker is None or SEP.join((path, name)).strip(SEP) > marker.strip(SEP)
             )
 
+        page = base.ObjectPage(self)
+        catalog = self.conn.catalog
+        if catalog is not None:
+            after = name_marker(path, marker)
+            if after is None:
+                return page
+            for name, size, mtime, row_is_dir in catalog.list(
+                SEP.join((self.name, path)), after, limit
+            ):
+                page.append(SEP.join((path, name)).strip(SEP), size, mtime, row_is_dir)
+            return page
+
         search_path = SEP.join((self.base_path, path))
-        objs = [
-            self.obj_cls.from_path(self, SEP.join((path, o)))
-            for o in listdir(search_path)
-            if _filter(o)
-        ]
-        objs = sorted(objs, key=lambda x: x.base_path)
-        return objs[:limit]
+        index = get_dir_index()
+        if index is not None:
+            names = page_names(index.names(search_path), path, marker, limit)
+        else:
+            names = (o for o in iterdir(search_path) if _filter(o))
+            names = (
+                heapq.nsmallest(limit, names) if limit is not None else sorted(names)
+            )
+
+        infos = thread_map(
+            lambda o: stat(SEP.join((search_path, o))), names, get_stat_executor()
+        )
+        for name, info in zip(names, infos):
+            page.append(
+                SEP.join((path, name)).strip(SEP),
+                info.st_size,
+                info.st_mtime,
+                S_ISDIR(info.st_mode),
+            )
+
+        return page
 
     @wrap_fs_obj_errors
     def get_object(self, path):
         """Get single object."""
+        catalog = self.conn.catalog
+        if catalog is not None:
+            row = catalog.get(SEP.join((self.name, path)))
+            if row is None:
+                raise errors.NoObjectException("No object at: %s" % path)
+            return self.obj_cls.from_catalog(self, path, row)
+
         return self.obj_cls.from_path(self, path)
 
     @property
@@ -150,6 +373,12 @@ class FilesystemContainer(base.CloudContainer):
         full_path = SEP.join((conn.abs_root, path))
         return cls(conn, path, 0, getsize(full_path))
 
+    @classmethod
+    def from_catalog(cls, conn, path):
+        """Create container from catalog."""
+        count, size = conn.catalog.totals(path)
+        return cls(conn, path.strip(SEP), count, size)
+
 
 class FilesystemConnection(base.CloudConnection):
     """Filesystem connection wrapper."""
@@ -157,28 +386,45 @@ class FilesystemConnection(base.CloudConnection):
     #: Container child class.
     cont_cls = FilesystemContainer
 
-    def __init__(self, root):
-        """Initializer."""
+    def __init__(self, root, catalog=None):
+        """Initializer.
+
+        :param root: Filesystem root directory.
+        :param catalog: Catalog to serve listings and metadata from (or
+            ``None`` to read the filesystem).
+        :type  catalog: :class:`cloud_browser.cloud.catalog.Catalog`
+        """
         super(FilesystemConnection, self).__init__(None, None)
         self.root = root
         self.abs_root = abspath(root)
+        self.catalog = catalog
 
     def _get_connection(self):
         """Return native connection object."""
         return object()
 
+    @property
+    def cache_id(self):
+        """Unique datastore identifier for shared cache keys."""
+        return "%s:%s" % (self.__class__.__name__, self.abs_root)
+
     @wrap_fs_cont_errors
-    def _get_containers(self):
+    def _get_containers(self, marker=None, limit=None):
         """Return available containers."""
+        if self.catalog is not None:
+            names = [row[0] for row in self.catalog.list("", marker) if row[3]]
+            return [self.cont_cls.from_catalog(self, d) for d in names[:limit]]
 
         def full_fn(path):
             return SEP.join((self.abs_root, path))
 
-        return [
-            self.cont_cls.from_path(self, d)
-            for d in listdir(self.abs_root)
-            if is_dir(full_fn(d))
-        ]
+        executor = get_stat_executor()
+        names = sorted(
+            d for d in listdir(self.abs_root) if marker is None or d > marker
+        )
+        dirs = thread_map(lambda d: is_dir(full_fn(d)), names, executor)
+        names = [d for d, d_is_dir in zip(names, dirs) if d_is_dir][:limit]
+        return thread_map(lambda d: self.cont_cls.from_path(self, d), names, executor)
 
     @wrap_fs_cont_errors
     def _get_container(self, path):
@@ -186,4 +432,11 @@ class FilesystemConnection(base.CloudConnection):
         path = path.strip(SEP)
         if SEP in path:
             raise errors.InvalidNameException("Path contains %s - %s" % (SEP, path))
+
+        if self.catalog is not None:
+            row = self.catalog.get(path)
+            if row is None or not row[3]:
+                raise errors.NoContainerException("No container at: %s" % path)
+            return self.cont_cls.from_catalog(self, path)
+
         return self.cont_cls.from_path(self, path)
@@ -37,6 +37,8 @@ except ImportError:
 class GsObject(base.BotoObject):
     """Google Storage 'key' object wrapper."""
 
+    __slots__ = ()
+
     _gs_folder_suffix = "_$folder$"
 
     @classmethod
@@ -108,6 +110,18 @@ class GsContainer(base.BotoContainer):
 
         return objs[:limit]
 
+    def _get_objects_page(self, path, state, limit):
+        """Get objects and paging state for the next page (or ``None``).
+
+        Strips any 0-byte dummy folder object as :meth:`get_objects` does,
+        which may shorten the page by one object.
+        """
+        folder = path.split(SEP)[-1]
+        objs, state = super(GsContainer, self)._get_objects_page(path, state, limit)
+        objs = [o for o in objs if not (o.size == 0 and o.name == folder)]
+
+        return objs, state
+
 
 class GsConnection(base.BotoConnection):
     """Google Storage connection wrapper."""
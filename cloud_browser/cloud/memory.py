@@ -0,0 +1,337 @@
+"""In-memory datastore.
+
+Holds containers and objects in process memory, with a sorted key space
+listed by prefix and delimiter from a marker like S3 or Swift. Per-call
+latency, read bandwidth and error injection can be configured, so that the
+datastore behaves like a remote one under load, e.g., for profiling views
+and load testing without network access::
+
+    from cloud_browser.cloud.memory import MemoryConnection, get_store
+
+    store = get_store()
+    store.put("bucket", "path/to/file.txt", b"data", "text/plain")
+    conn = MemoryConnection(latency=0.02, bandwidth=10 * 1024 * 1024)
+"""
+import random
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from hashlib import md5
+
+from cloud_browser.app_settings import settings
+from cloud_browser.cloud import base, errors
+from cloud_browser.common import SEP, dt_to_timestamp
+
+###############################################################################
+# Constants
+###############################################################################
+#: Character after separator, bounding keys below a prefix.
+SEP_NEXT = chr(ord(SEP) + 1)
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+###############################################################################
+# Storage
+###############################################################################
+class MemoryBlob(object):
+    """Stored object data and metadata."""
+
+    __slots__ = ("data", "content_type", "last_modified", "timestamp", "etag")
+
+    def __init__(self, data, content_type=None, last_modified=None):
+        """Initializer."""
+        self.data = data
+        self.content_type = content_type
+        self.last_modified = last_modified or datetime.utcnow()
+        self.timestamp = dt_to_timestamp(self.last_modified)
+        self.etag = '"%s"' % md5(data).hexdigest()
+
+
+class MemoryBucket(object):
+    """Sorted key space of a container."""
+
+    def __init__(self):
+        """Initializer."""
+        self.keys = []
+        self.blobs = {}
+        self.size = 0
+
+    def list(self, prefix="", marker=None, delimiter=SEP):
+        """Return iterator of ``(key or common prefix, blob or None)``.
+
+        Keys are listed in order after the marker. With a delimiter, keys
+        below a common prefix are skipped over with a binary search.
+
+        .. note:: Only the ``/`` separator is supported as a delimiter.
+        """
+        keys = self.keys
+        index = bisect_left(keys, prefix)
+        if marker is not None and marker >= prefix:
+            index = bisect_right(keys, marker)
+
+        while index < len(keys):
+            key = keys[index]
+            if not key.startswith(prefix):
+                break
+
+            rest = key[len(prefix) :]
+            if delimiter and delimiter in rest:
+                common = prefix + rest.split(delimiter, 1)[0]
+                yield common + delimiter, None
+                index = bisect_left(keys, common + SEP_NEXT, index)
+                continue
+
+            yield key, self.blobs[key]
+            index += 1
+
+
+class MemoryStore(object):
+    """Thread-safe store of containers."""
+
+    def __init__(self):
+        """Initializer."""
+        self.buckets = {}
+        self.lock = threading.RLock()
+
+    def create_container(self, name):
+        """Create container (if missing) and return its bucket."""
+        with self.lock:
+            return self.buckets.setdefault(name, MemoryBucket())
+
+    def delete_container(self, name):
+        """Delete container and its objects."""
+        with self.lock:
+            self.buckets.pop(name, None)
+
+    def put(self, container, name, data, content_type=None, last_modified=None):
+        """Store object (creating container if missing)."""
+        blob = MemoryBlob(data, content_type, last_modified)
+        with self.lock:
+            bucket = self.create_container(container)
+            old_blob = bucket.blobs.get(name)
+            if old_blob is None:
+                insort(bucket.keys, name)
+            else:
+                bucket.size -= len(old_blob.data)
+            bucket.blobs[name] = blob
+            bucket.size += len(data)
+
+    def put_many(self, container, items):
+        """Store objects from iterable of ``(name, data, content_type)``.
+
+        Sorts once, so is much faster than :meth:`put` for bulk loading.
+        """
+        blobs = dict(
+            (name, MemoryBlob(data, content_type)) for name, data, content_type in items
+        )
+        with self.lock:
+            bucket = self.create_container(container)
+            bucket.blobs.update(blobs)
+            bucket.keys = sorted(bucket.blobs)
+            bucket.size = sum(len(blob.data) for blob in bucket.blobs.values())
+
+    def delete(self, container, name):
+        """Delete object, if any."""
+        with self.lock:
+            bucket = self.buckets.get(container)
+            blob = bucket.blobs.pop(name, None) if bucket is not None else None
+            if blob is not None:
+                del bucket.keys[bisect_left(bucket.keys, name)]
+                bucket.size -= len(blob.data)
+
+    def clear(self):
+        """Delete all containers."""
+        with self.lock:
+            self.buckets.clear()
+
+
+def get_store(name="default"):
+    """Return shared store by name, creating it if missing."""
+    with _STORES_LOCK:
+        return _STORES.setdefault(name, MemoryStore())
+
+
+###############################################################################
+# Classes
+###############################################################################
+class MemoryObject(base.CloudObject):
+    """Memory object wrapper."""
+
+    __slots__ = ()
+
+    def _get_object(self):
+        """Return native storage object."""
+        bucket = self.container.native_container
+        blob = bucket.blobs.get(self.name)
+        if blob is None:
+            raise errors.NoObjectException("No object at: %s" % self.name)
+        return blob
+
+    def _read(self):
+        """Return contents of object."""
+        return b"".join(self._stream(settings.CLOUD_BROWSER_DOCUMENT_CHUNK_SIZE))
+
+    def _stream(self, chunk_size):
+        """Return iterator of object contents in chunks."""
+        return self._stream_range(0, len(self.native_obj.data) - 1, chunk_size)
+
+    def _stream_range(self, start, end, chunk_size):
+        """Return iterator of a byte range of object contents in chunks."""
+        conn = self.container.conn
+        conn.simulate()
+        data = self.native_obj.data
+        for offset in range(start, min(end + 1, len(data)), chunk_size):
+            chunk = data[offset : min(offset + chunk_size, end + 1)]
+            conn.transfer(len(chunk))
+            yield chunk
+
+    @classmethod
+    def from_blob(cls, container, name, blob):
+        """Create object from stored blob."""
+        return cls(
+            container,
+            name=name,
+            size=len(blob.data),
+            content_type=blob.content_type,
+            last_modified=blob.last_modified,
+            obj_type=cls.type_cls.FILE,
+            etag=blob.etag,
+        )
+
+
+class MemoryContainer(base.CloudContainer):
+    """Memory container wrapper."""
+
+    #: Storage object child class.
+    obj_cls = MemoryObject
+
+    def _get_container(self):
+        """Return native container object."""
+        bucket = self.conn.native_conn.buckets.get(self.name)
+        if bucket is None:
+            raise errors.NoContainerException("No container: %s" % self.name)
+        return bucket
+
+    def get_objects(
+        self, path, marker=None, limit=settings.CLOUD_BROWSER_DEFAULT_LIST_LIMIT
+    ):
+        """Get objects.
+
+        :rtype: :class:`cloud_browser.cloud.base.ObjectPage`
+        """
+        _, page = self._list(path, marker, limit)
+        return page
+
+    def _get_objects_page(self, path, state, limit):
+        """Get objects and paging state for the next page (or ``None``).
+
+        The native marker is the raw key or common prefix (with trailing
+        separator) of the last object, as for S3.
+        """
+        marker = state.get("native_marker", state.get("marker"))
+        native_names, page = self._list(path, marker, limit + 1)
+
+        state = None
+        if len(page) > limit:
+            page = page[:limit]
+            state = {"marker": page.names[-1], "native_marker": native_names[limit - 1]}
+
+        return page, state
+
+    def _list(self, path, marker, limit):
+        """Return raw names and page of objects for path after marker."""
+        self.conn.simulate()
+        prefix = path.rstrip(SEP) + SEP if path else ""
+        native_names = []
+        page = base.ObjectPage(self)
+        with self.conn.native_conn.lock:
+            for name, blob in self.native_container.list(prefix, marker or None):
+                # Skip the marker (or an implied subdirectory echo of it).
+                if marker and (name <= marker or name == marker + SEP):
+                    continue
+                if limit is not None and len(native_names) >= limit:
+                    break
+
+                native_names.append(name)
+                if blob is None:
+                    page.append(name.rstrip(SEP), is_dir=True)
+                else:
+                    page.append(
+                        name,
+                        len(blob.data),
+                        blob.timestamp,
+                        content_type=blob.content_type,
+                        etag=blob.etag,
+                    )
+
+        return native_names, page
+
+    def get_object(self, path):
+        """Get single object."""
+        self.conn.simulate()
+        blob = self.native_container.blobs.get(path)
+        if blob is None:
+            raise errors.NoObjectException("No object at: %s" % path)
+        return self.obj_cls.from_blob(self, path, blob)
+
+
+class MemoryConnection(base.CloudConnection):
+    """Memory connection wrapper."""
+
+    #: Container child class.
+    cont_cls = MemoryContainer
+
+    def __init__(
+        self, store="default", latency=0, bandwidth=None, error_rate=0, seed=None
+    ):
+        """Initializer.
+
+        :param store: Name of shared store.
+        :param latency: Seconds of latency per datastore call.
+        :param bandwidth: Bytes per second for reads or ``None`` for no limit.
+        :param error_rate: Probability of a simulated error per call.
+        :param seed: Random seed for deterministic errors.
+        """
+        super(MemoryConnection, self).__init__(store, None)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    def _get_connection(self):
+        """Return native connection object."""
+        return get_store(self.account)
+
+    def simulate(self):
+        """Simulate latency and errors of a datastore call."""
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise errors.CloudException("Simulated datastore error.")
+
+    def transfer(self, num_bytes):
+        """Simulate read bandwidth for a number of bytes."""
+        if self.bandwidth:
+            time.sleep(float(num_bytes) / self.bandwidth)
+
+    def _get_containers(self, marker=None, limit=None):
+        """Return available containers."""
+        self.simulate()
+        with self.native_conn.lock:
+            buckets = sorted(self.native_conn.buckets.items())
+            return [
+                self.cont_cls(self, name, len(bucket.keys), bucket.size)
+                for name, bucket in buckets
+                if marker is None or name > marker
+            ][:limit]
+
+    def _get_container(self, path):
+        """Return single container."""
+        self.simulate()
+        bucket = self.native_conn.buckets.get(path)
+        if bucket is None:
+            raise errors.NoContainerException("No container: %s" % path)
+        return self.cont_cls(self, path, len(bucket.keys), bucket.size)
@@ -0,0 +1,184 @@
+"""Datastore connection pooling.
+
+Native connections (boto connections, cloudfiles connections, libcloud
+drivers) are not safe to share between threads, so under threaded servers
+each thread borrows its own connection from a bounded pool, e.g.::
+
+    pool = ConnectionPool(lambda: AwsConnection(account, secret_key))
+    with pool.connection() as conn:
+        conn.get_containers()
+
+Requests borrow a connection for the current thread on first use (see
+:meth:`ConnectionPool.get`), which is returned when the request finishes.
+Idle connections are evicted after a timeout and checked with
+:meth:`cloud_browser.cloud.base.CloudConnection.check` before reuse.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from cloud_browser.cloud import errors
+
+
+class ConnectionPool(object):
+    """Thread-safe, bounded pool of datastore connections."""
+
+    def __init__(self, conn_fn, max_size=10, timeout=30, idle_timeout=300):
+        """Initializer.
+
+        :param conn_fn: Function creating a new connection.
+        :param max_size: Maximum number of connections (in use or idle).
+        :type  max_size: ``int``
+        :param timeout: Seconds to wait for a connection if all are in use
+            or ``None`` to wait forever.
+        :param idle_timeout: Seconds until idle connections are evicted or
+            ``None`` for never.
+        """
+        self.conn_fn = conn_fn
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._idle = []
+        self._connections = set()
+        self._connecting = 0
+        self._leases = {}
+        self._cond = threading.Condition(threading.Lock())
+
+    def __len__(self):
+        """Number of connections (in use or idle)."""
+        return len(self._connections)
+
+    def acquire(self):
+        """Check out a connection, creating one if none are idle.
+
+        :raises: :class:`cloud_browser.cloud.errors.CloudException` if no
+            connection becomes available within the timeout.
+        """
+        deadline = None if self.timeout is None else time.time() + self.timeout
+        while True:
+            conn = self._checkout(deadline)
+            if conn is None:
+                return self._connect()
+
+            # Check idle connections outside the lock (may hit the network).
+            if self._check(conn):
+                return conn
+            self.release(conn, discard=True)
+
+    def release(self, conn, discard=False):
+        """Return a checked out connection.
+
+        :param discard: Close connection instead of keeping it idle (e.g.,
+            after a connection error).
+        """
+        with self._cond:
+            if discard:
+                self._connections.discard(conn)
+            elif conn in self._connections:
+                self._idle.append((conn, time.time()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager checking out a connection.
+
+        Connections are discarded on errors other than datastore errors
+        (e.g., socket errors).
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception as exc:
+            self.release(conn, not isinstance(exc, errors.CloudException))
+            raise
+
+        self.release(conn)
+
+    def get(self):
+        """Return connection of the current thread, checking one out if none.
+
+        The connection stays checked out until :meth:`release_thread` (or
+        until the thread exits, when it is reclaimed by the next
+        :meth:`acquire` that runs out of connections).
+        """
+        thread = threading.current_thread()
+        conn = self._leases.get(thread)
+        if conn is None:
+            conn = self.acquire()
+            with self._cond:
+                self._leases[thread] = conn
+
+        return conn
+
+    def release_thread(self, discard=False):
+        """Return connection of the current thread, if any."""
+        with self._cond:
+            conn = self._leases.pop(threading.current_thread(), None)
+        if conn is not None:
+            self.release(conn, discard)
+
+    def invalidate_containers(self):
+        """Remove available containers of all connections from caches."""
+        with self._cond:
+            connections = list(self._connections)
+
+        for conn in connections:
+            conn.invalidate_containers()
+
+    def _checkout(self, deadline):
+        """Pop an idle connection or reserve a slot for a new one (``None``)."""
+        with self._cond:
+            while True:
+                self._evict()
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    return conn
+
+                if len(self._connections) + self._connecting < self.max_size:
+                    # Reserve a slot while connecting (outside the lock).
+                    self._connecting += 1
+                    return None
+
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise errors.CloudException(
+                        "No datastore connection available (pool size %s)."
+                        % self.max_size
+                    )
+                self._cond.wait(remaining)
+
+    def _connect(self):
+        """Create a new connection in a reserved slot."""
+        conn = None
+        try:
+            conn = self.conn_fn()
+            return conn
+        finally:
+            with self._cond:
+                self._connecting -= 1
+                if conn is not None:
+                    self._connections.add(conn)
+                self._cond.notify()
+
+    def _check(self, conn):
+        """Return whether idle connection is usable."""
+        try:
+            return conn.check()
+        except Exception:  # pylint: disable=W0703
+            return False
+
+    def _evict(self):
+        """Drop expired idle connections and leases of exited threads.
+
+        Must be called with the lock held.
+        """
+        if self.idle_timeout is not None:
+            oldest = time.time() - self.idle_timeout
+            expired = [conn for conn, since in self._idle if since < oldest]
+            self._idle = [
+                (conn, since) for conn, since in self._idle if since >= oldest
+            ]
+            self._connections.difference_update(expired)
+
+        for thread in [t for t in self._leases if not t.is_alive()]:
+            self._idle.append((self._leases.pop(thread), time.time()))
@@ -40,6 +40,16 @@ except ImportError:
     cloudfiles = None  # pylint: disable=C0103
 
 
+def collapse_infos(infos):
+    """Remove duplicate dummy / implied objects."""
+    name = None
+    for info in infos:
+        name = info.get("name", name)
+        subdir = info.get("subdir", "").strip(SEP)
+        if not name or subdir != name:
+            yield info
+
+
 ###############################################################################
 # Classes
 ###############################################################################
@@ -59,6 +69,8 @@ class RackspaceExceptionWrapper(errors.CloudExceptionWrapper):
 class RackspaceObject(base.CloudObject):
     """Cloud object wrapper."""
 
+    __slots__ = ()
+
     #: Exception translations.
     wrap_rs_errors = RackspaceExceptionWrapper()
 
@@ -77,6 +89,18 @@ class RackspaceObject(base.CloudObject):
         """Return contents of object."""
         return self.native_obj.read()
 
+    @wrap_rs_errors
+    def _stream(self, chunk_size):
+        """Return iterator of object contents in chunks."""
+        return self.native_obj.stream(chunksize=chunk_size)
+
+    @wrap_rs_errors
+    def _stream_range(self, start, end, chunk_size):
+        """Return iterator of a byte range of object contents in chunks."""
+        return self.native_obj.stream(
+            chunksize=chunk_size, hdrs={"Range": "bytes=%s-%s" % (start, end)}
+        )
+
     @classmethod
     def from_info(cls, container, info_obj):
         """Create from subdirectory or file info object."""
@@ -108,6 +132,7 @@ class RackspaceObject(base.CloudObject):
             content_type=info_obj["content_type"],
             last_modified=dt_from_header(info_obj["last_modified"]),
             obj_type=cls.choose_type(info_obj["content_type"]),
+            etag=info_obj.get("hash"),
         )
 
     @classmethod
@@ -121,6 +146,7 @@ class RackspaceObject(base.CloudObject):
             content_type=file_obj.content_type,
             last_modified=dt_from_header(file_obj.last_modified),
             obj_type=cls.choose_type(file_obj.content_type),
+            etag=getattr(file_obj, "_etag", None),
         )
 
 
@@ -210,15 +236,6 @@ class RackspaceContainer(base.CloudContainer):
                 "Object limit must be less than %s" % RS_MAX_LIST_OBJECTS_LIMIT
             )
 
-        def _collapse(infos):
-            """Remove duplicate dummy / implied objects."""
-            name = None
-            for info in infos:
-                name = info.get("name", name)
-                subdir = info.get("subdir", "").strip(SEP)
-                if not name or subdir != name:
-                    yield info
-
         path = path + SEP if path else ""
         object_infos = self.native_container.list_objects_info(
             limit=limit, delimiter=SEP, prefix=path, marker=marker
@@ -231,7 +248,7 @@ class RackspaceContainer(base.CloudContainer):
                 object_infos = object_infos[1:]
 
             # Collapse subdirs and dummy objects.
-            object_infos = list(_collapse(object_infos))
+            object_infos = list(collapse_infos(object_infos))
 
             # Adjust to original limit.
             if len(object_infos) > orig_limit:
@@ -239,6 +256,46 @@ class RackspaceContainer(base.CloudContainer):
 
         return object_infos, full_query
 
+    @wrap_rs_errors
+    def _get_objects_page(self, path, state, limit):
+        """Get objects and paging state for the next page (or ``None``).
+
+        The native marker is the raw name of the last object or implied
+        subdirectory (with trailing separator), which Cloud Files skips, so
+        there is no need to query extra objects for a marker echo. Dummy
+        directory objects are collapsed as in :meth:`get_objects`, which may
+        shorten a page.
+        """
+        if state.get("marker") is not None and "native_marker" not in state:
+            return super(RackspaceContainer, self)._get_objects_page(path, state, limit)
+
+        # Enforce maximum object size.
+        if limit + 1 > RS_MAX_LIST_OBJECTS_LIMIT:
+            raise errors.CloudException(
+                "Object limit must be less than %s" % RS_MAX_LIST_OBJECTS_LIMIT
+            )
+
+        path = path + SEP if path else ""
+        object_infos = self.native_container.list_objects_info(
+            limit=limit + 1,
+            delimiter=SEP,
+            prefix=path,
+            marker=state.get("native_marker"),
+        )
+
+        state = None
+        if len(object_infos) > limit:
+            object_infos = object_infos[:limit]
+            last = object_infos[-1]
+            native_marker = last.get("subdir", last.get("name"))
+            state = {
+                "marker": native_marker.rstrip(SEP),
+                "native_marker": native_marker,
+            }
+
+        object_infos = collapse_infos(object_infos)
+        return [self.obj_cls.from_info(self, x) for x in object_infos], state
+
     @wrap_rs_errors
     def get_object(self, path):
         """Get single object."""
@@ -281,9 +338,9 @@ class RackspaceConnection(base.CloudConnection):
         return cloudfiles.get_connection(**kwargs)
 
     @wrap_rs_errors
-    def _get_containers(self):
+    def _get_containers(self, marker=None, limit=None):
         """Return available containers."""
-        infos = self.native_conn.list_containers_info()
+        infos = self.native_conn.list_containers_info(limit=limit, marker=marker)
         return [self.cont_cls(self, i["name"], i["count"], i["bytes"]) for i in infos]
 
     @wrap_rs_errors
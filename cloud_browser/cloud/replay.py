@@ -0,0 +1,507 @@
+"""Record and replay datastore.
+
+Recording wraps any configured datastore and writes the results and timings
+of its calls (container and object listings, metadata and the number of
+bytes read per document) to a local cassette file. The replay datastore
+serves a cassette with the recorded latencies, so that views can be
+profiled against production-shaped data (key lengths, fan-out, placeholder
+objects, etc.) without network access.
+
+Record while browsing a real datastore with::
+
+    CLOUD_BROWSER_RECORD_CASSETTE = "/tmp/bucket.cassette"
+
+and replay with::
+
+    CLOUD_BROWSER_DATASTORE = "Replay"
+    CLOUD_BROWSER_REPLAY_CASSETTE = "/tmp/bucket.cassette"
+
+.. note::
+    Document contents are not recorded. Replayed documents are zero bytes
+    of the recorded size, streamed at the recorded throughput. Calls that
+    were not recorded fail on replay, so browse (and page through) the
+    paths to profile while recording.
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from timeit import default_timer
+
+from cloud_browser.app_settings import settings
+from cloud_browser.cloud import base, errors
+from cloud_browser.common import dt_to_timestamp
+
+
+###############################################################################
+# Cassette
+###############################################################################
+class Cassette(object):
+    """Recorded datastore calls.
+
+    Cassettes are files of JSON lines, one per call, appended as calls are
+    recorded. Calls are keyed on their name and arguments, later records
+    replacing earlier ones.
+    """
+
+    def __init__(self, path):
+        """Initializer.
+
+        :param path: Cassette file path.
+        """
+        self.path = path
+        self._records = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def key(cls, call):
+        """Return record key for call."""
+        return json.dumps(call, sort_keys=True)
+
+    @property
+    def records(self):
+        """Dictionary of records by key (loaded on first access)."""
+        if self._records is None:
+            with self._lock:
+                if self._records is None:
+                    self._records = self._load()
+
+        return self._records
+
+    def _load(self):
+        """Return records from file."""
+        records = {}
+        try:
+            with open(self.path) as file_obj:
+                for line in file_obj:
+                    if line.strip():
+                        record = json.loads(line)
+                        records[self.key(record["call"])] = record
+        except IOError:
+            # Nothing recorded yet.
+            pass
+
+        return records
+
+    def get(self, call):
+        """Return record for call or ``None``."""
+        return self.records.get(self.key(call))
+
+    def record(self, call, **values):
+        """Record call and write to file."""
+        record = dict(values, call=call)
+        line = json.dumps(record, sort_keys=True)
+        records = self.records
+        with self._lock:
+            records[self.key(call)] = record
+            with open(self.path, "a") as file_obj:
+                file_obj.write(line + "\n")
+
+
+def dump_object(obj):
+    """Return recordable dictionary of object metadata.
+
+    Last modified dates are recorded as UTC timestamps of their (naive) date
+    and time as is, e.g., local time for the filesystem datastore, so that
+    they replay unchanged.
+    """
+    last_modified = obj.last_modified
+    if last_modified is not None:
+        last_modified = dt_to_timestamp(last_modified)
+
+    return {
+        "name": obj.name,
+        "size": obj.size,
+        "content_type": obj.content_type,
+        "content_encoding": obj.content_encoding,
+        "last_modified": last_modified,
+        "type": obj.type,
+        "etag": obj.etag,
+    }
+
+
+def load_object(container, info):
+    """Create object of container from recorded metadata."""
+    timestamp = info["last_modified"]
+    if timestamp is not None:
+        timestamp = datetime.utcfromtimestamp(timestamp)
+
+    return container.obj_cls(
+        container,
+        info["name"],
+        size=info["size"],
+        content_type=info["content_type"],
+        content_encoding=info["content_encoding"],
+        last_modified=timestamp,
+        obj_type=info["type"],
+        etag=info["etag"],
+    )
+
+
+###############################################################################
+# Recording
+###############################################################################
+def _record(cassette, call, function, dump):
+    """Call function and record its (dumped) result or error and timing."""
+    start = default_timer()
+    try:
+        result = function()
+    except errors.CloudException as exc:
+        seconds = default_timer() - start
+        cassette.record(
+            call, seconds=seconds, error=exc.__class__.__name__, message=str(exc)
+        )
+        raise
+
+    cassette.record(call, seconds=default_timer() - start, result=dump(result))
+    return result
+
+
+class RecordingObject(base.CloudObject):
+    """Recording object wrapper.
+
+    Reads are passed through to the wrapped object, recording the number of
+    bytes, the time to the first chunk and the total time.
+    """
+
+    __slots__ = ("__wrapped",)
+
+    def __init__(self, container, name, **kwargs):
+        """Initializer.
+
+        :kwarg wrapped: Wrapped object (or ``None`` to get on first use).
+        """
+        super(RecordingObject, self).__init__(container, name, **kwargs)
+        self.__wrapped = kwargs.get("wrapped")
+
+    @property
+    def wrapped(self):
+        """Wrapped object."""
+        if self.__wrapped is None:
+            # Objects loaded from caches only have metadata.
+            self.__wrapped = self.container.wrapped.get_object(self.name)
+
+        return self.__wrapped
+
+    @classmethod
+    def from_obj(cls, container, obj):
+        """Create from wrapped object."""
+        return cls(
+            container,
+            obj.name,
+            size=obj.size,
+            content_type=obj.content_type,
+            content_encoding=obj.content_encoding,
+            last_modified=obj.last_modified,
+            obj_type=obj.type,
+            etag=obj.etag,
+            wrapped=obj,
+        )
+
+    def _get_object(self):
+        """Return native storage object."""
+        return self.wrapped.native_obj
+
+    def _read(self):
+        """Return contents of object."""
+        return b"".join(self._stream(settings.CLOUD_BROWSER_DOCUMENT_CHUNK_SIZE))
+
+    def _stream(self, chunk_size):
+        """Return iterator of object contents in chunks."""
+        return self._record_read(self.wrapped.stream(chunk_size))
+
+    def _stream_range(self, start, end, chunk_size):
+        """Return iterator of a byte range of object contents in chunks."""
+        return self._record_read(self.wrapped.stream_range(start, end, chunk_size))
+
+    def _record_read(self, chunks):
+        """Return iterator of chunks, recording read timings when done."""
+        cassette = self.container.conn.cassette
+        call = ["read", self.container.name, self.name]
+        num_bytes, first_byte = 0, None
+        start = default_timer()
+
+        def _done():
+            cassette.record(
+                call,
+                bytes=num_bytes,
+                first_byte=first_byte or 0,
+                seconds=default_timer() - start,
+            )
+
+        try:
+            for chunk in chunks:
+                if first_byte is None:
+                    first_byte = default_timer() - start
+                num_bytes += len(chunk)
+                yield chunk
+        except GeneratorExit:
+            # Closed early (e.g., client disconnected).
+            _done()
+            raise
+
+        _done()
+
+
+class RecordingContainer(base.CloudContainer):
+    """Recording container wrapper."""
+
+    #: Storage object child class.
+    obj_cls = RecordingObject
+
+    def __init__(self, conn, name=None, count=None, size=None, wrapped=None):
+        """Initializer.
+
+        :param wrapped: Wrapped container (or ``None`` to get on first use).
+        """
+        super(RecordingContainer, self).__init__(conn, name, count, size)
+        self.__wrapped = wrapped
+
+    @property
+    def wrapped(self):
+        """Wrapped container."""
+        if self.__wrapped is None:
+            # pylint: disable=W0212
+            self.__wrapped = self.conn.wrapped._get_container(self.name)
+
+        return self.__wrapped
+
+    def _get_container(self):
+        """Return native container object."""
+        return self.wrapped.native_container
+
+    def _wrap(self, objects):
+        """Return recording objects of wrapped objects."""
+        return [self.obj_cls.from_obj(self, obj) for obj in objects]
+
+    def get_objects(
+        self, path, marker=None, limit=settings.CLOUD_BROWSER_DEFAULT_LIST_LIMIT
+    ):
+        """Get objects."""
+        objects = _record(
+            self.conn.cassette,
+            ["objects", self.name, path, marker, limit],
+            lambda: self.wrapped.get_objects(path, marker, limit),
+            lambda objects: [dump_object(obj) for obj in objects],
+        )
+        return self._wrap(objects)
+
+    def _get_objects_page(self, path, state, limit):
+        """Get objects and paging state for the next page (or ``None``)."""
+        # pylint: disable=W0212
+        objects, state = _record(
+            self.conn.cassette,
+            ["page", self.name, path, state, limit],
+            lambda: self.wrapped._get_objects_page(path, state, limit),
+            lambda page: [[dump_object(obj) for obj in page[0]], page[1]],
+        )
+        return self._wrap(objects), state
+
+    def get_object(self, path):
+        """Get single object."""
+        obj = _record(
+            self.conn.cassette,
+            ["object", self.name, path],
+            lambda: self.wrapped.get_object(path),
+            dump_object,
+        )
+        return self.obj_cls.from_obj(self, obj)
+
+
+class RecordingConnection(base.CloudConnection):
+    """Recording connection wrapper.
+
+    Can be used in front of any datastore connection, e.g.::
+
+        conn = RecordingConnection(
+            FilesystemConnection("/srv/files"), Cassette("/tmp/files.cassette")
+        )
+
+    Other attributes are passed through to the wrapped connection.
+    """
+
+    #: Container child class.
+    cont_cls = RecordingContainer
+
+    def __init__(self, conn, cassette):
+        """Initializer.
+
+        :param conn: Wrapped connection.
+        :type  conn: :class:`cloud_browser.cloud.base.CloudConnection`
+        :param cassette: Cassette to record to.
+        :type  cassette: :class:`Cassette`
+        """
+        super(RecordingConnection, self).__init__(conn.account, conn.secret_key)
+        self.wrapped = conn
+        self.cassette = cassette
+
+    def __getattr__(self, name):
+        """Pass through to wrapped connection."""
+        if name == "wrapped":
+            raise AttributeError(name)
+        return getattr(self.wrapped, name)
+
+    def _get_connection(self):
+        """Return native connection object."""
+        return self.wrapped.native_conn
+
+    @property
+    def cache_id(self):
+        """Unique datastore identifier for shared cache keys."""
+        return self.wrapped.cache_id
+
+    def _get_containers(self, marker=None, limit=None):
+        """Return available containers."""
+        # pylint: disable=W0212
+        containers = _record(
+            self.cassette,
+            ["containers", marker, limit],
+            lambda: self.wrapped._get_containers(marker, limit),
+            lambda containers: [[c.name, c.count, c.size] for c in containers],
+        )
+        return [self._wrap(c) for c in containers]
+
+    def _get_container(self, path):
+        """Return single container."""
+        # pylint: disable=W0212
+        container = _record(
+            self.cassette,
+            ["container", path],
+            lambda: self.wrapped._get_container(path),
+            lambda c: [c.name, c.count, c.size],
+        )
+        return self._wrap(container)
+
+    def _wrap(self, container):
+        """Return recording container of wrapped container."""
+        return self.cont_cls(
+            self, container.name, container.count, container.size, wrapped=container
+        )
+
+
+###############################################################################
+# Replay
+###############################################################################
+class ReplayObject(base.CloudObject):
+    """Replay object wrapper."""
+
+    __slots__ = ()
+
+    def _get_object(self):
+        """Return native storage object (the read record, if any)."""
+        return self.container.conn.cassette.get(
+            ["read", self.container.name, self.name]
+        )
+
+    def _read(self):
+        """Return contents of object."""
+        return b"".join(self._stream(settings.CLOUD_BROWSER_DOCUMENT_CHUNK_SIZE))
+
+    def _stream(self, chunk_size):
+        """Return iterator of object contents in chunks."""
+        return self._stream_range(0, self.size - 1, chunk_size)
+
+    def _stream_range(self, start, end, chunk_size):
+        """Return iterator of a byte range of object contents in chunks.
+
+        Waits for the recorded time to the first byte, then streams zero
+        bytes at the recorded throughput.
+        """
+        scale = self.container.conn.latency_scale
+        record = self.native_obj or {}
+        seconds_per_byte = 0
+        if record.get("bytes"):
+            transfer = record["seconds"] - record["first_byte"]
+            seconds_per_byte = max(transfer, 0) / record["bytes"]
+
+        if scale:
+            time.sleep(record.get("first_byte", 0) * scale)
+        end = min(end, self.size - 1)
+        for offset in range(start, end + 1, chunk_size):
+            length = min(chunk_size, end + 1 - offset)
+            if scale and seconds_per_byte:
+                time.sleep(length * seconds_per_byte * scale)
+            yield b"\0" * length
+
+
+class ReplayContainer(base.CloudContainer):
+    """Replay container wrapper."""
+
+    #: Storage object child class.
+    obj_cls = ReplayObject
+
+    def _get_container(self):
+        """Return native container object."""
+        return self
+
+    def get_objects(
+        self, path, marker=None, limit=settings.CLOUD_BROWSER_DEFAULT_LIST_LIMIT
+    ):
+        """Get objects."""
+        infos = self.conn.replay(["objects", self.name, path, marker, limit])
+        return [load_object(self, info) for info in infos]
+
+    def _get_objects_page(self, path, state, limit):
+        """Get objects and paging state for the next page (or ``None``)."""
+        infos, state = self.conn.replay(["page", self.name, path, state, limit])
+        return [load_object(self, info) for info in infos], state
+
+    def get_object(self, path):
+        """Get single object."""
+        info = self.conn.replay(["object", self.name, path], errors.NoObjectException)
+        return load_object(self, info)
+
+
+class ReplayConnection(base.CloudConnection):
+    """Replay connection wrapper."""
+
+    #: Container child class.
+    cont_cls = ReplayContainer
+
+    def __init__(self, cassette, latency_scale=1.0):
+        """Initializer.
+
+        :param cassette: Cassette (or cassette file path) to replay.
+        :param latency_scale: Factor for recorded latencies (``0`` to replay
+            without delays).
+        """
+        if not isinstance(cassette, Cassette):
+            cassette = Cassette(cassette)
+
+        super(ReplayConnection, self).__init__(cassette.path, None)
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+
+    def _get_connection(self):
+        """Return native connection object."""
+        return self.cassette
+
+    def replay(self, call, missing_cls=errors.CloudException):
+        """Return recorded result of call after the recorded latency.
+
+        :param call: Call name and arguments.
+        :param missing_cls: Exception class to raise if not recorded.
+        :raises: Recorded error or ``missing_cls`` if not recorded.
+        """
+        record = self.cassette.get(call)
+        if record is None:
+            raise missing_cls("No recording for: %s" % Cassette.key(call))
+
+        if self.latency_scale:
+            time.sleep(record["seconds"] * self.latency_scale)
+
+        if "error" in record:
+            error_cls = getattr(errors, record["error"], errors.CloudException)
+            raise error_cls(record["message"])
+
+        return record["result"]
+
+    def _get_containers(self, marker=None, limit=None):
+        """Return available containers."""
+        infos = self.replay(["containers", marker, limit])
+        return [self.cont_cls(self, *info) for info in infos]
+
+    def _get_container(self, path):
+        """Return single container."""
+        info = self.replay(["container", path], errors.NoContainerException)
+        return self.cont_cls(self, *info)
@@ -0,0 +1,323 @@
+"""Filesystem change watchers.
+
+Watchers report changed directories of a filesystem tree, so that cached
+listings and metadata of the filesystem datastore can be invalidated for
+exactly those directories. This allows long cache timeouts (see
+``CLOUD_BROWSER_OBJECT_CACHE_TIMEOUT``) without serving stale data.
+
+On Linux, changes are received from the kernel with ``inotify``. Elsewhere
+(or if ``inotify`` is unavailable) directory modified times are polled.
+"""
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+
+from cloud_browser.app_settings import settings
+from cloud_browser.cloud.fs import get_dir_index, not_dot, os_to_path, path_to_os
+from cloud_browser.common import SEP
+
+###############################################################################
+# Constants
+###############################################################################
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+#: Events changing directory listings or metadata.
+IN_WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_ONLYDIR
+)
+
+#: ``struct inotify_event`` header (without name).
+EVENT_HEADER = struct.Struct("iIII")
+
+_WATCHERS = {}
+_WATCHERS_LOCK = threading.Lock()
+
+LOGGER = logging.getLogger(__name__)
+
+
+###############################################################################
+# Watchers
+###############################################################################
+class Watcher(object):
+    """Base watcher of a directory tree.
+
+    Runs in a daemon thread, calling ``callback`` with the path (relative to
+    the root, with ``/`` separators) of each changed directory or ``None``
+    if all directories may have changed.
+    """
+
+    def __init__(self, root, callback):
+        """Initializer.
+
+        :param root: Root directory of tree.
+        :param callback: Function called with changed directory paths.
+        """
+        self.root = os.path.abspath(path_to_os(root))
+        self.callback = callback
+        self._stop = threading.Event()
+        self._thread = None
+
+    def relpath(self, os_path):
+        """Return path relative to root."""
+        path = os.path.relpath(os_path, self.root)
+        return "" if path == os.curdir else os_to_path(path)
+
+    def notify(self, changed):
+        """Call callback for changed directory paths."""
+        for path in changed:
+            try:
+                self.callback(path)
+            except Exception:  # pylint: disable=W0703
+                LOGGER.exception("Failed change callback for: %s", path)
+
+    def iter_dirs(self, os_path):
+        """Return iterator of (non-dot) directories in tree at path."""
+        for dir_path, dir_names, _ in os.walk(os_path):
+            dir_names[:] = [name for name in dir_names if not_dot(name)]
+            yield dir_path
+
+    def start(self):
+        """Start watching in a daemon thread."""
+        self._thread = threading.Thread(target=self.run, name=repr(self))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def run(self):
+        """Watch until stopped."""
+        raise NotImplementedError
+
+
+class InotifyWatcher(Watcher):
+    """Linux ``inotify`` watcher.
+
+    Every directory of the tree is watched (subject to the
+    ``fs.inotify.max_user_watches`` system limit), including directories
+    created or moved into the tree while watching.
+    """
+
+    #: Seconds between checks for stopping.
+    poll_timeout = 1.0
+
+    def __init__(self, root, callback):
+        """Initializer.
+
+        :raises: ``OSError`` if ``inotify`` is unavailable.
+        """
+        super(InotifyWatcher, self).__init__(root, callback)
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._check(self._libc.inotify_init1(IN_CLOEXEC))
+        self._paths = {}
+        try:
+            for dir_path in self.iter_dirs(self.root):
+                self.add_watch(dir_path)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    @classmethod
+    def _check(cls, result):
+        """Raise ``OSError`` for failed calls."""
+        if result < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+        return result
+
+    def add_watch(self, os_path):
+        """Watch directory."""
+        encoded = os_path
+        if not isinstance(encoded, bytes):
+            encoded = encoded.encode(sys.getfilesystemencoding())
+
+        watch = self._check(
+            self._libc.inotify_add_watch(self._fd, encoded, IN_WATCH_MASK)
+        )
+        self._paths[watch] = self.relpath(os_path)
+
+    def remove_watches(self, path):
+        """Stop watching directory path and its subdirectories."""
+        prefix = path + SEP
+        for watch, watch_path in list(self._paths.items()):
+            if watch_path == path or watch_path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, watch)
+                del self._paths[watch]
+
+    def run(self):
+        """Watch until stopped."""
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([self._fd], [], [], self.poll_timeout)
+                if ready:
+                    self._handle(os.read(self._fd, 64 * 1024))
+        finally:
+            os.close(self._fd)
+
+    def _handle(self, data):
+        """Handle buffer of events."""
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            watch, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            name = name.decode(sys.getfilesystemencoding(), "replace")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost.
+                changed.add(None)
+                continue
+
+            path = self._paths.get(watch)
+            if path is None:
+                continue
+
+            if mask & IN_IGNORED:
+                del self._paths[watch]
+                continue
+
+            changed.add(path)
+            if mask & IN_ISDIR and not_dot(name):
+                child = SEP.join((path, name)).strip(SEP)
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    self.remove_watches(child)
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_tree(child, changed)
+
+        self.notify(changed)
+
+    def _add_tree(self, path, changed):
+        """Watch new directory tree, which may have contents already."""
+        for dir_path in self.iter_dirs(os.path.join(self.root, path_to_os(path))):
+            try:
+                self.add_watch(dir_path)
+            except OSError:
+                # Removed again (or out of watches).
+                continue
+            changed.add(self.relpath(dir_path))
+
+
+class PollingWatcher(Watcher):
+    """Directory modified time polling watcher.
+
+    Directories are stat'ed every ``interval`` seconds, so files changed in
+    place (without changing their directory) are not detected.
+    """
+
+    def __init__(self, root, callback, interval=5):
+        """Initializer."""
+        super(PollingWatcher, self).__init__(root, callback)
+        self.interval = interval
+        self._mtimes = self._scan()
+
+    def _scan(self):
+        """Return modified times of directories in tree."""
+        mtimes = {}
+        for dir_path in self.iter_dirs(self.root):
+            try:
+                mtimes[self.relpath(dir_path)] = os.stat(dir_path).st_mtime
+            except OSError:
+                continue
+
+        return mtimes
+
+    def run(self):
+        """Watch until stopped."""
+        while not self._stop.wait(self.interval):
+            mtimes = self._scan()
+            changed = set(
+                path
+                for path in set(mtimes) | set(self._mtimes)
+                if mtimes.get(path) != self._mtimes.get(path)
+            )
+            self._mtimes = mtimes
+            self.notify(changed)
+
+
+def get_watcher(root, callback, interval=5):
+    """Return ``inotify`` watcher, falling back to a polling watcher."""
+    try:
+        return InotifyWatcher(root, callback)
+    except (AttributeError, OSError, TypeError):
+        return PollingWatcher(root, callback, interval)
+
+
+###############################################################################
+# Cache invalidation
+###############################################################################
+def watch_connection(conn, interval=None, pools=()):
+    """Start watcher invalidating caches of filesystem connection.
+
+    Invalidates the listings and metadata of changed directories in the
+    connection (if a :class:`cloud_browser.cloud.cache.CachedConnection`),
+    their directory indexes and, for root changes, indexed and cached
+    containers. Only one watcher is started per datastore.
+
+    :param conn: Filesystem connection.
+    :param interval: Seconds between polls, if polling (defaults to
+        ``CLOUD_BROWSER_FILESYSTEM_WATCH_INTERVAL``).
+    :param pools: Connection pools (of connections sharing the caches of
+        ``conn``), to also invalidate indexed containers of their connections.
+    """
+
+    def _changed(path):
+        if not path:
+            # Always invalidate the shared cache, as the pool may be empty.
+            conn.invalidate_containers()
+            for pool in pools:
+                pool.invalidate_containers()
+
+        if hasattr(conn, "invalidate"):
+            if path is None:
+                conn.invalidate()
+            elif path:
+                container, _, sub_path = path.partition(SEP)
+                conn.invalidate(container, sub_path)
+
+        index = get_dir_index()
+        if index is not None:
+            index.invalidate(None if path is None else SEP.join((conn.abs_root, path)))
+
+    if interval is None:
+        interval = settings.CLOUD_BROWSER_FILESYSTEM_WATCH_INTERVAL
+
+    with _WATCHERS_LOCK:
+        if conn.cache_id not in _WATCHERS:
+            watcher = get_watcher(conn.abs_root, _changed, interval)
+            watcher.start()
+            _WATCHERS[conn.cache_id] = watcher
+
+        return _WATCHERS[conn.cache_id]
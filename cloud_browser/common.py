@@ -3,10 +3,17 @@
 Because cloud operations are OS agnostic, we don't use any of :mod:`os` or
 :mod:`os.path`.
 """
+import threading
+from calendar import timegm
 from datetime import datetime
 
 from django.core.exceptions import ImproperlyConfigured
 
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None  # pylint: disable=C0103
+
 ###############################################################################
 # Constants.
 ###############################################################################
@@ -16,6 +23,9 @@ SEP = "/"
 #: Parent path phrase.
 PARENT = ".."
 
+_EXECUTORS = {}
+_EXECUTORS_LOCK = threading.Lock()
+
 
 ###############################################################################
 # General.
@@ -72,6 +82,45 @@ def requires(module, name=""):
     return wrapped
 
 
+def get_executor(name, max_workers):
+    """Return shared, bounded thread pool (or ``None`` if unavailable).
+
+    Pools are created once per name and live for the life of the process.
+
+    :param name: Pool name.
+    :type  name: ``string``
+    :param max_workers: Maximum number of threads.
+    :type  max_workers: ``int``
+    :rtype: :class:`concurrent.futures.ThreadPoolExecutor` or ``None``
+    """
+    if ThreadPoolExecutor is None or not max_workers:
+        return None
+
+    with _EXECUTORS_LOCK:
+        if name not in _EXECUTORS:
+            _EXECUTORS[name] = ThreadPoolExecutor(max_workers=max_workers)
+
+        return _EXECUTORS[name]
+
+
+def thread_map(function, items, executor=None):
+    """Return list of function results for items, in order.
+
+    Calls are run concurrently in the executor, if any and if there is more
+    than one item. Exceptions are raised in the calling thread.
+
+    :param function: Function of one item.
+    :param items: Iterable of items.
+    :param executor: Thread pool or ``None`` to call serially.
+    :rtype: ``list``
+    """
+    items = list(items)
+    if executor is None or len(items) < 2:
+        return [function(item) for item in items]
+
+    return list(executor.map(function, items))
+
+
 ###############################################################################
 # Date / Time.
 ###############################################################################
@@ -129,6 +178,20 @@ def dt_from_header(date_str):
     return None
 
 
+def dt_to_timestamp(value):
+    """Convert datetime object to POSIX timestamp.
+
+    Naive datetimes are assumed to be in UTC, which is what the cloud
+    datastores return.
+
+    :param value: Date time.
+    :type  value: :class:`datetime.datetime`
+    :return: Seconds since the epoch.
+    :rtype:  ``int``
+    """
+    return timegm(value.utctimetuple())
+
+
 ###############################################################################
 # Path helpers.
 ###############################################################################
@@ -0,0 +1 @@
+"""Cloud browser management."""
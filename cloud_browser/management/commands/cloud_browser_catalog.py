@@ -0,0 +1,45 @@
+"""Build or refresh the filesystem catalog."""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cloud_browser.app_settings import settings
+
+
+class Command(BaseCommand):
+    """Build or refresh the filesystem catalog.
+
+    Scans ``CLOUD_BROWSER_FILESYSTEM_ROOT`` into the SQLite catalog at
+    ``CLOUD_BROWSER_FILESYSTEM_CATALOG``, only re-scanning directories that
+    changed since the last refresh (unless ``--full``).
+    """
+
+    help = "Build or refresh the filesystem catalog."
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            default=False,
+            help="Re-scan all directories, including unchanged ones.",
+        )
+
+    def handle(self, *args, **options):
+        """Refresh catalog."""
+        from cloud_browser.cloud.catalog import Catalog
+
+        root = settings.CLOUD_BROWSER_FILESYSTEM_ROOT
+        db_path = settings.CLOUD_BROWSER_FILESYSTEM_CATALOG
+        if not (root and db_path):
+            raise CommandError(
+                "CLOUD_BROWSER_FILESYSTEM_ROOT and CLOUD_BROWSER_FILESYSTEM_CATALOG "
+                "must be set."
+            )
+
+        start = time.time()
+        dirs, scanned = Catalog(db_path, root).refresh(full=options["full"])
+        self.stdout.write(
+            "Refreshed %s: scanned %s of %s directories in %.1f seconds."
+            % (db_path, scanned, dirs, time.time() - start)
+        )
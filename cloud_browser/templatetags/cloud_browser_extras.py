@@ -3,12 +3,45 @@ import os
 
 from django import template
 from django.template import Node, TemplateSyntaxError
-from django.template.defaultfilters import stringfilter
+from django.template.defaultfilters import date, filesizeformat, stringfilter, urlencode
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
 
 from cloud_browser.app_settings import settings
 
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote  # pylint: disable=ungrouped-imports
+
+try:
+    from django.utils.http import RFC3986_SUBDELIMS
+except ImportError:
+    RFC3986_SUBDELIMS = "!$&'()*+,;="
+
 register = template.Library()  # pylint: disable=C0103
 
+#: Characters left unquoted in reversed URL arguments (as by ``reverse()``).
+URL_ARG_SAFE = RFC3986_SUBDELIMS + "/~:@"
+
+#: Placeholder argument for reversing URL prefixes.
+URL_PLACEHOLDER = "cloud-browser-path"
+
+#: Browser object table row.
+OBJECT_ROW = (
+    "<tr>\n"
+    '  <td><img src="{icon}" /></td>\n'
+    '  <td><a href="{url}"{link_class}>{name}</a></td>\n'
+    "  <td>{content_type}</td>\n"
+    "  <td>{encoding}</td>\n"
+    "  <td>{size}</td>\n"
+    "  <td>{date}</td>\n"
+    "</tr>\n"
+)
+
+#: Empty cell value.
+EMPTY_CELL = "--"
+
 
 @register.filter
 @stringfilter
@@ -91,3 +124,79 @@ class MediaUrlNode(Node):
         return reverse(
             "cloud_browser_media", args=[self.rel_path], current_app="cloud_browser"
         )
+
+
+def _reverse_parts(view_name):
+    """Return URL prefix and suffix around the path argument of a view."""
+    try:
+        from django.core.urlresolvers import reverse
+    except ImportError:
+        # pylint: disable=no-name-in-module, import-error
+        from django.urls import reverse
+
+    url = reverse(view_name, args=[URL_PLACEHOLDER])
+    prefix, _, suffix = url.partition(URL_PLACEHOLDER)
+    return prefix, suffix
+
+
+@register.simple_tag(takes_context=True)
+def cloud_browser_object_rows(context, objects):
+    """Render browser table rows for objects.
+
+    Produces the same markup as rendering a row template per object, but
+    resolves URL prefixes and icon URLs once per page and formats rows
+    directly, which dominates render time for large pages.
+
+    For example::
+
+        <tbody>{% cloud_browser_object_rows objects %}</tbody>
+    """
+    doc_prefix, doc_suffix = _reverse_parts("cloud_browser_document")
+    dir_prefix, dir_suffix = _reverse_parts("cloud_browser_browser")
+    file_icon = MediaUrlNode("img/tango/16x16/mimetypes/text-x-generic.png")
+    dir_icon = MediaUrlNode("img/tango/16x16/places/folder.png")
+    file_icon, dir_icon = file_icon.render(context), dir_icon.render(context)
+
+    # Objects often share sizes and dates (e.g., bulk uploads).
+    sizes, dates = {}, {}
+    rows = []
+    for obj in objects:
+        # Template URL arguments are encoded by the filter, then reversed.
+        path = quote(urlencode(obj.path), safe=URL_ARG_SAFE)
+        if obj.is_file:
+            url = doc_prefix + path + doc_suffix
+            link_class = ""
+        else:
+            url = dir_prefix + path + dir_suffix
+            link_class = ' class="cloud-browser-document-link"'
+
+        size = EMPTY_CELL
+        if obj.is_file or obj.size > 0:
+            size = sizes.get(obj.size)
+            if size is None:
+                size = sizes[obj.size] = filesizeformat(obj.size)
+
+        last_modified = obj.last_modified
+        modified = EMPTY_CELL
+        if last_modified:
+            modified = dates.get(last_modified)
+            if modified is None:
+                modified = escape(date(last_modified, "DATETIME_FORMAT"))
+                dates[last_modified] = modified
+
+        content_type = obj.smart_content_type
+        encoding = obj.smart_content_encoding
+        rows.append(
+            OBJECT_ROW.format(
+                icon=escape(dir_icon if obj.is_subdir else file_icon),
+                url=escape(url),
+                link_class=link_class,
+                name=escape(obj.basename),
+                content_type=escape(content_type) if content_type else EMPTY_CELL,
+                encoding=escape(encoding) if encoding else EMPTY_CELL,
+                size=size,
+                date=modified,
+            )
+        )
+
+    return mark_safe("".join(rows))
@@ -1 +0,0 @@
-"""Cloud browser tests."""
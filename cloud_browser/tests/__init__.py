@@ -0,0 +1,19 @@
+"""Cloud browser tests.
+
+Run with ``invoke test`` (views are tested against a filesystem datastore in
+a temporary directory, see :mod:`cloud_browser.tests.settings`).
+"""
+import os
+
+
+def write_object(container, name, data):
+    """Write object to the filesystem datastore of the tests."""
+    from django.conf import settings
+
+    path = os.path.join(
+        settings.CLOUD_BROWSER_FILESYSTEM_ROOT, container, *name.split("/")
+    )
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as file_obj:
+        file_obj.write(data)
@@ -0,0 +1,36 @@
+"""Cloud browser test settings."""
+import atexit
+import shutil
+import tempfile
+
+SECRET_KEY = "cloud_browser_tests"
+
+DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+
+INSTALLED_APPS = (
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "cloud_browser",
+)
+
+MIDDLEWARE = []
+MIDDLEWARE_CLASSES = ()
+
+ROOT_URLCONF = "cloud_browser.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": ["django.template.context_processors.request"]
+        },
+    }
+]
+
+CLOUD_BROWSER_DATASTORE = "Filesystem"
+CLOUD_BROWSER_FILESYSTEM_ROOT = tempfile.mkdtemp(prefix="cloud_browser_tests_")
+atexit.register(shutil.rmtree, CLOUD_BROWSER_FILESYSTEM_ROOT, True)
+
+# Also test listing containers in background threads (off by default).
+CLOUD_BROWSER_QUERY_THREADS = 2
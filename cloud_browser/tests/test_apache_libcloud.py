@@ -0,0 +1,236 @@
+"""ApacheLibcloud datastore tests (with stubbed drivers)."""
+from unittest import skipIf
+from xml.etree import ElementTree
+
+from django.test import SimpleTestCase
+
+from cloud_browser.cloud import apache_libcloud
+
+try:
+    from libcloud.storage.base import Container, Object
+    from libcloud.storage.drivers.s3 import S3StorageDriver
+except ImportError:
+    S3StorageDriver = None
+
+BUCKET = "bucket"
+KEYS = ["a.txt", "b/c.txt", "b/d.txt", "b0.txt", "e/f/g.txt", "h.txt"]
+
+#: Listing of the bucket root.
+LISTING = [("a.txt", False), ("b", True), ("b0.txt", False), ("e", True)]
+LISTING.append(("h.txt", False))
+
+S3_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">
+  <Name>bucket</Name>
+  <IsTruncated>%(truncated)s</IsTruncated>%(next_marker)s%(contents)s%(prefixes)s
+</ListBucketResult>
+"""
+
+S3_CONTENTS_XML = """
+  <Contents>
+    <Key>%s</Key>
+    <LastModified>2020-01-01T00:00:00.000Z</LastModified>
+    <ETag>"etag"</ETag>
+    <Size>4</Size>
+  </Contents>"""
+
+S3_PREFIX_XML = """
+  <CommonPrefixes><Prefix>%s</Prefix></CommonPrefixes>"""
+
+
+class S3Response(object):
+    """Stubbed S3 response."""
+
+    status = 200
+
+    def __init__(self, body):
+        self.object = ElementTree.fromstring(body)
+
+    @classmethod
+    def success(cls):
+        return True
+
+
+class S3Connection(object):
+    """Stubbed S3 connection listing keys with a delimiter.
+
+    Returns at most ``max_entries`` keys and common prefixes per response.
+    Some S3-compatible datastores return the common prefix given as marker
+    again, which is simulated with ``echo``.
+    """
+
+    def __init__(self, keys, max_entries=1000, echo=False):
+        self.keys = sorted(keys)
+        self.max_entries = max_entries
+        self.echo = echo
+        self.requests = []
+
+    def request(self, action, params=None):
+        self.requests.append(dict(params))
+        prefix = params.get("prefix", "")
+        marker = params.get("marker", "")
+        delimiter = params["delimiter"]
+
+        entries = []
+        for key in self.keys:
+            if not key.startswith(prefix) or key <= marker:
+                continue
+            rest, sep, _ = key[len(prefix) :].partition(delimiter)
+            if not sep:
+                entries.append((key, False))
+                continue
+
+            common = prefix + rest + sep
+            if entries and entries[-1][0] == common:
+                continue
+            if common > marker or self.echo:
+                entries.append((common, True))
+
+        max_keys = min(params["max-keys"], self.max_entries)
+        truncated = len(entries) > max_keys
+        entries = entries[:max_keys]
+        next_marker = ""
+        if truncated:
+            next_marker = "\n  <NextMarker>%s</NextMarker>" % entries[-1][0]
+
+        return S3Response(
+            S3_XML
+            % {
+                "truncated": "true" if truncated else "false",
+                "next_marker": next_marker,
+                "contents": "".join(
+                    S3_CONTENTS_XML % name for name, is_dir in entries if not is_dir
+                ),
+                "prefixes": "".join(
+                    S3_PREFIX_XML % name for name, is_dir in entries if is_dir
+                ),
+            }
+        )
+
+
+class ScanDriver(object):
+    """Stubbed driver without delimiter or marker support."""
+
+    def __init__(self, keys):
+        self.keys = sorted(keys)
+        self.scans = 0
+
+    def get_container(self, name):
+        return Container(name, {}, self)
+
+    def iterate_container_objects(self, container, prefix=None):
+        self.scans += 1
+        for key in self.keys:
+            if key.startswith(prefix or ""):
+                yield Object(key, 4, "etag", {}, {}, container, self)
+
+
+class StubConnection(apache_libcloud.ApacheLibcloudConnection):
+    """Connection to a stubbed driver."""
+
+    def __init__(self, driver):
+        super(StubConnection, self).__init__("s3", "account", "secret")
+        self.driver = driver
+
+    def _get_connection(self):
+        return self.driver
+
+
+@skipIf(S3StorageDriver is None, "libcloud is not installed")
+class LibcloudTestCase(SimpleTestCase):
+    """Test case with a container of a stubbed driver."""
+
+    def get_container(self, driver):
+        return apache_libcloud.ApacheLibcloudContainer(StubConnection(driver), BUCKET)
+
+    @classmethod
+    def rows(cls, objects):
+        return [(obj.name, obj.is_subdir) for obj in objects]
+
+    def pages(self, container, path, limit):
+        rows, token = [], None
+        while True:
+            objects, token = container.get_objects_page(path, token, limit)
+            rows.append(self.rows(objects))
+            if token is None:
+                return rows
+
+
+class S3ListingTest(LibcloudTestCase):
+    """Tests for S3 delimiter and marker listings."""
+
+    def get_container(self, driver=None, **kwargs):
+        driver = S3StorageDriver("account", "secret")
+        driver.connection = S3Connection(KEYS, **kwargs)
+        driver.get_container = lambda name: Container(name, {}, driver)
+        return super(S3ListingTest, self).get_container(driver)
+
+    def test_listing(self):
+        container = self.get_container()
+        objects = container.get_objects("")
+        self.assertEqual(self.rows(objects), LISTING)
+        self.assertEqual(objects[0].etag, "etag")
+        self.assertEqual(objects[0].size, 4)
+
+        requests = container.conn.native_conn.connection.requests
+        self.assertEqual(requests, [{"delimiter": "/", "max-keys": 21}])
+
+    def test_prefix(self):
+        container = self.get_container()
+        self.assertEqual(
+            self.rows(container.get_objects("b")),
+            [("b/c.txt", False), ("b/d.txt", False)],
+        )
+        self.assertEqual(self.rows(container.get_objects("e")), [("e/f", True)])
+
+        requests = container.conn.native_conn.connection.requests
+        self.assertEqual([r["prefix"] for r in requests], ["b/", "e/"])
+
+    def test_marker(self):
+        container = self.get_container()
+        rows = self.rows(container.get_objects("", marker="b", limit=2))
+        self.assertEqual(rows, LISTING[2:4])
+        self.assertEqual(
+            container.conn.native_conn.connection.requests[0]["marker"], "b"
+        )
+
+    def test_paging(self):
+        for echo in (False, True):
+            container = self.get_container(echo=echo)
+            pages = self.pages(container, "", 2)
+            self.assertEqual(pages, [LISTING[0:2], LISTING[2:4], LISTING[4:]], echo)
+
+            # Pages continue from the native name of implied subdirectories.
+            requests = container.conn.native_conn.connection.requests
+            self.assertEqual([r.get("marker") for r in requests], [None, "b/", "e/"])
+
+    def test_truncated(self):
+        container = self.get_container(max_entries=2)
+        self.assertEqual(self.rows(container.get_objects("")), LISTING)
+
+        # Truncated responses continue from the next marker.
+        requests = container.conn.native_conn.connection.requests
+        self.assertEqual([r.get("marker") for r in requests], [None, "b/", "e/"])
+
+    def test_truncated_echo(self):
+        container = self.get_container(max_entries=2, echo=True)
+        self.assertEqual(self.pages(container, "", 3), [LISTING[0:3], LISTING[3:]])
+
+
+class ScannedListingTest(LibcloudTestCase):
+    """Tests for listings of drivers without delimiter or marker support."""
+
+    def test_listing(self):
+        driver = ScanDriver(KEYS)
+        container = self.get_container(driver)
+        self.assertEqual(self.rows(container.get_objects("")), LISTING)
+        self.assertEqual(self.rows(container.get_objects("e")), [("e/f", True)])
+        self.assertEqual(driver.scans, 2)
+
+    def test_paging(self):
+        container = self.get_container(ScanDriver(KEYS))
+        self.assertEqual(
+            self.pages(container, "", 2), [LISTING[0:2], LISTING[2:4], LISTING[4:]]
+        )
+        rows = self.rows(container.get_objects("", marker="b", limit=2))
+        self.assertEqual(rows, LISTING[2:4])
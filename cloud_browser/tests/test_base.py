@@ -0,0 +1,293 @@
+"""Datastore base abstraction tests."""
+# pylint: disable=protected-access
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from django.test import SimpleTestCase, override_settings
+
+from cloud_browser.app_settings import settings
+from cloud_browser.cloud import errors
+from cloud_browser.cloud.base import ObjectPage, page_by_name
+from cloud_browser.cloud.fs import FilesystemConnection
+from cloud_browser.cloud.memory import MemoryConnection, MemoryContainer
+from cloud_browser.tests import write_object
+
+CONTAINER = "base"
+NAMES = ["key-%02d" % i for i in range(25)]
+
+Item = namedtuple("Item", "name")
+
+
+class ContainerTestCase(SimpleTestCase):
+    """Test case with filesystem containers in a temporary directory."""
+
+    containers = ["a", "b"]
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="cloud_browser_tests_")
+        self.addCleanup(shutil.rmtree, self.root)
+        for name in self.containers:
+            os.mkdir(os.path.join(self.root, name))
+        self.conn = FilesystemConnection(self.root)
+
+    def names(self, conn=None):
+        return [c.name for c in (conn or self.conn).get_containers()]
+
+
+@override_settings(CLOUD_BROWSER_CONTAINER_CACHE_TIMEOUT=60)
+class ContainerCacheTest(ContainerTestCase):
+    """Tests for container listings in the shared Django cache."""
+
+    def test_cached(self):
+        self.assertEqual(self.names(), ["a", "b"])
+        os.mkdir(os.path.join(self.root, "c"))
+
+        # Cached for all connections to the datastore.
+        self.assertEqual(self.names(), ["a", "b"])
+        self.assertEqual(self.names(FilesystemConnection(self.root)), ["a", "b"])
+        self.assertIs(self.conn.get_containers()[0].conn, self.conn)
+
+    def test_invalidate(self):
+        self.assertEqual(self.names(), ["a", "b"])
+        os.mkdir(os.path.join(self.root, "c"))
+
+        # Stale entries are dropped for all connections to the datastore.
+        FilesystemConnection(self.root).invalidate_containers()
+        self.assertEqual(self.names(), ["a", "b", "c"])
+
+    def test_other_datastore(self):
+        self.assertEqual(self.names(), ["a", "b"])
+        other = tempfile.mkdtemp(prefix="cloud_browser_tests_")
+        self.addCleanup(shutil.rmtree, other)
+        os.mkdir(os.path.join(other, "x"))
+        self.assertEqual(self.names(FilesystemConnection(other)), ["x"])
+
+    @override_settings(CLOUD_BROWSER_CONTAINER_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        self.assertEqual(self.names(), ["a", "b"])
+        os.mkdir(os.path.join(self.root, "c"))
+        self.assertEqual(self.names(), ["a", "b", "c"])
+
+
+class ContainerPagingTest(ContainerTestCase):
+    """Tests for container listing pages."""
+
+    containers = ["a", "b", "c", "d", "e"]
+
+    def page(self, marker=None, limit=None):
+        return [c.name for c in self.conn.get_containers(marker, limit)]
+
+    def test_page_by_name(self):
+        items = [Item("a"), Item("b")]
+        self.assertEqual(page_by_name(items), items)
+        self.assertEqual(page_by_name(items, "a"), items[1:])
+        self.assertEqual(page_by_name(items, None, 1), items[:1])
+        self.assertEqual(page_by_name(iter(items), "b", 1), [])
+
+    def test_paging(self):
+        self.assertEqual(self.page(limit=2), ["a", "b"])
+        self.assertEqual(self.page(marker="b", limit=2), ["c", "d"])
+        self.assertEqual(self.page(marker="d", limit=2), ["e"])
+        self.assertEqual(self.page(marker="e"), [])
+        self.assertEqual(self.page(marker="bb"), ["c", "d", "e"])
+
+    def test_refill_filtered(self):
+        # Container lists are only read once from settings.
+        self.addCleanup(setattr, settings, "_Settings__container_blacklist", None)
+        settings._Settings__container_blacklist = set(["b", "c"])
+        self.assertEqual(self.page(limit=2), ["a", "d"])
+        self.assertEqual(self.page(marker="a", limit=2), ["d", "e"])
+
+    @override_settings(CLOUD_BROWSER_CONTAINER_CACHE_TIMEOUT=60)
+    def test_cached_pages(self):
+        self.assertEqual(self.page(limit=2), ["a", "b"])
+        self.assertEqual(self.page(marker="b", limit=2), ["c", "d"])
+        self.assertEqual(self.page(limit=2), ["a", "b"])
+
+
+class TokenTest(SimpleTestCase):
+    """Tests for signed continuation tokens."""
+
+    @classmethod
+    def setUpClass(cls):
+        super(TokenTest, cls).setUpClass()
+        for name in NAMES + ["dir/child"]:
+            write_object(CONTAINER, name, b"x")
+
+    def setUp(self):
+        conn = FilesystemConnection(settings.CLOUD_BROWSER_FILESYSTEM_ROOT)
+        self.container = conn.get_container(CONTAINER)
+
+    def test_paging(self):
+        names, token, pages = [], None, 0
+        while True:
+            objects, token = self.container.get_objects_page("", token, 10)
+            names.extend(obj.name for obj in objects)
+            pages += 1
+            if token is None:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(names, ["dir"] + NAMES)
+
+    def test_tampered_token(self):
+        _, token = self.container.get_objects_page("", None, 10)
+        tampered = token[:-1] + ("A" if token[-1] != "A" else "B")
+        self.assertRaises(
+            errors.InvalidTokenException,
+            self.container.get_objects_page,
+            "",
+            tampered,
+            10,
+        )
+
+    def test_other_path_token(self):
+        _, token = self.container.get_objects_page("", None, 10)
+        self.assertRaises(
+            errors.InvalidTokenException, self.container.get_objects_page, "dir", token
+        )
+
+    def test_other_secret_key(self):
+        _, token = self.container.get_objects_page("", None, 10)
+        with override_settings(SECRET_KEY="rotated"):
+            self.assertRaises(
+                errors.InvalidTokenException,
+                self.container.get_objects_page,
+                "",
+                token,
+                10,
+            )
+
+    def test_marker_overrides_token(self):
+        _, token = self.container.get_objects_page("", None, 10)
+        objects, _ = self.container.get_objects_page("", token, 2, marker="key-19")
+        self.assertEqual([obj.name for obj in objects], ["key-20", "key-21"])
+
+    def test_marker_past_end(self):
+        objects, token = self.container.get_objects_page("", None, 10, marker="zzz")
+        self.assertEqual(len(objects), 0)
+        self.assertIsNone(token)
+
+    def test_last_full_page(self):
+        objects, token = self.container.get_objects_page("", None, 5, marker="key-19")
+        self.assertEqual(len(objects), 5)
+        self.assertIsNone(token)
+
+    def test_view_invalid_token(self):
+        response = self.client.get(
+            "/api/browser/%s" % CONTAINER,
+            {"token": "invalid", "marker": "key-04", "limit": 2},
+        )
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content.decode("utf-8"))
+        self.assertEqual([obj["name"] for obj in data["objects"]], ["key-05", "key-06"])
+        self.assertEqual(data["marker"], "key-06")
+        self.assertIsNotNone(data["token"])
+
+
+class ObjectPageTest(SimpleTestCase):
+    """Tests for columnar object pages."""
+
+    def setUp(self):
+        self.page = ObjectPage(MemoryContainer(MemoryConnection(), CONTAINER))
+        self.page.append("a.txt", 1, 0)
+        self.page.append("b.txt", 2, 60, etag="b-tag")
+        self.page.append("dir", is_dir=True)
+        self.page.append("c.txt", 3, 120, content_type="text/plain")
+
+    def test_objects(self):
+        self.assertEqual(len(self.page), 4)
+        objects = list(self.page)
+        self.assertEqual(
+            [obj.name for obj in objects], ["a.txt", "b.txt", "dir", "c.txt"]
+        )
+        self.assertEqual([obj.size for obj in objects], [1, 2, 0, 3])
+        self.assertEqual(
+            [obj.is_subdir for obj in objects], [False, False, True, False]
+        )
+        self.assertEqual(objects[1].last_modified, datetime(1970, 1, 1, 0, 1))
+        self.assertIsNone(objects[2].last_modified)
+        self.assertIs(objects[0].container, self.page.container)
+
+    def test_optional_columns(self):
+        self.assertEqual([obj.etag for obj in self.page], [None, "b-tag", None, None])
+        self.assertEqual(
+            [obj.content_type for obj in self.page], [None, None, None, "text/plain"]
+        )
+        self.assertEqual(self.page[0].content_encoding, "")
+
+    def test_index(self):
+        self.assertEqual(self.page[-1].name, "c.txt")
+        self.assertRaises(IndexError, lambda: self.page[4])
+        self.assertRaises(IndexError, lambda: self.page[-5])
+
+    def test_slice(self):
+        page = self.page[1:3]
+        self.assertIsInstance(page, ObjectPage)
+        self.assertEqual([obj.name for obj in page], ["b.txt", "dir"])
+        self.assertEqual([obj.etag for obj in page], ["b-tag", None])
+        self.assertEqual(len(self.page[10:]), 0)
+
+
+class ContainerIndexTest(ContainerTestCase):
+    """Tests for container lookups through the container index."""
+
+    def connect(self):
+        """Return connection counting datastore container lookups."""
+        conn = FilesystemConnection(self.root)
+        get_container = conn._get_container
+        conn.lookups = []
+
+        def _get_container(path):
+            conn.lookups.append(path)
+            return get_container(path)
+
+        conn._get_container = _get_container
+        return conn
+
+    def test_lookup(self):
+        conn = self.connect()
+        container = conn.get_container("a")
+        self.assertIs(conn.get_container("a"), container)
+        self.assertRaises(errors.NoContainerException, conn.get_container, "c")
+        self.assertEqual(conn.lookups, ["a", "c"])
+
+    def test_listing(self):
+        conn = self.connect()
+        containers = conn.get_containers()
+        self.assertIs(conn.get_container("b"), containers[1])
+        self.assertEqual(conn.lookups, [])
+
+        conn.invalidate_containers()
+        self.assertEqual(len(conn.container_index), 0)
+        self.assertIsNot(conn.get_container("b"), containers[1])
+        self.assertEqual(conn.lookups, ["b"])
+
+    @override_settings(CLOUD_BROWSER_CONTAINER_INDEX_SIZE=1)
+    def test_eviction(self):
+        conn = self.connect()
+        for name in ("a", "a", "b", "a"):
+            conn.get_container(name)
+        self.assertEqual(conn.lookups, ["a", "b", "a"])
+
+    @override_settings(CLOUD_BROWSER_CONTAINER_INDEX_TIMEOUT=0.05)
+    def test_timeout(self):
+        conn = self.connect()
+        container = conn.get_container("a")
+        time.sleep(0.1)
+        self.assertIsNot(conn.get_container("a"), container)
+        self.assertEqual(conn.lookups, ["a", "a"])
+
+    @override_settings(CLOUD_BROWSER_CONTAINER_INDEX_SIZE=0)
+    def test_disabled(self):
+        conn = self.connect()
+        self.assertIsNone(conn.container_index)
+        conn.get_containers()
+        conn.get_container("a")
+        conn.get_container("a")
+        self.assertEqual(conn.lookups, ["a", "a"])
@@ -0,0 +1,76 @@
+"""Datastore cache tests."""
+# pylint: disable=protected-access
+from django.test import SimpleTestCase
+
+from cloud_browser.cloud.base import ObjectPage
+from cloud_browser.cloud.cache import CachedConnection, LruCache
+from cloud_browser.cloud.memory import MemoryConnection, get_store
+
+STORE = "cache"
+CONTAINER = "cont"
+KEYS = ["a.txt", "dir/b.txt", "e.txt"]
+
+
+class CachedConnectionTest(SimpleTestCase):
+    """Tests for caches shared between connections."""
+
+    @classmethod
+    def setUpClass(cls):
+        super(CachedConnectionTest, cls).setUpClass()
+        get_store(STORE).put_many(
+            CONTAINER, ((key, b"xx", "text/plain") for key in KEYS)
+        )
+
+    def setUp(self):
+        self.cache = LruCache(max_size=100)
+        self.conn_a = CachedConnection(MemoryConnection(STORE), self.cache)
+        self.conn_b = CachedConnection(MemoryConnection(STORE), self.cache)
+
+    def container(self, conn):
+        return conn.get_container(CONTAINER)
+
+    def assertBound(self, objects, conn):  # pylint: disable=invalid-name
+        for obj in objects:
+            self.assertIs(obj.container.conn, conn.wrapped)
+
+    def test_objects(self):
+        objects = self.container(self.conn_a).get_objects("")
+        self.assertBound(objects, self.conn_a)
+
+        cached = self.container(self.conn_b).get_objects("")
+        self.assertEqual(self.cache.hits, 1)
+        self.assertBound(cached, self.conn_b)
+        self.assertEqual([o.name for o in cached], [o.name for o in objects])
+        self.assertEqual([o.is_subdir for o in cached], [False, True, False])
+        self.assertEqual(cached[0].content_type, "text/plain")
+        self.assertEqual(cached[0].read(), b"xx")
+
+    def test_objects_page(self):
+        objects, token = self.container(self.conn_a).get_objects_page("", limit=2)
+        cached, cached_token = self.container(self.conn_b).get_objects_page("", limit=2)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(cached_token, token)
+        self.assertBound(cached, self.conn_b)
+        self.assertEqual([o.name for o in cached], [o.name for o in objects])
+
+    def test_object(self):
+        obj = self.container(self.conn_a).get_object("a.txt")
+        cached = self.container(self.conn_b).get_object("a.txt")
+        self.assertEqual(self.cache.hits, 1)
+        self.assertBound([cached], self.conn_b)
+        self.assertEqual(cached.size, obj.size)
+        self.assertEqual(cached.etag, obj.etag)
+        self.assertEqual(cached.last_modified, obj.last_modified)
+        self.assertEqual(cached.read(), b"xx")
+
+    def test_object_lists(self):
+        container = self.container(self.conn_a)
+        objects = list(container.wrapped.get_objects(""))
+        page, is_list = container._dump(objects)
+        self.assertIsInstance(page, ObjectPage)
+        self.assertIsNone(page.container)
+
+        cached = self.container(self.conn_b)._load(page, is_list)
+        self.assertIsInstance(cached, list)
+        self.assertBound(cached, self.conn_b)
+        self.assertEqual([o.name for o in cached], KEYS[:1] + ["dir"] + KEYS[2:])
@@ -0,0 +1,124 @@
+"""Filesystem catalog tests."""
+import os
+import shutil
+import tempfile
+import time
+
+from cloud_browser.cloud import errors
+from cloud_browser.cloud.catalog import Catalog
+from cloud_browser.cloud.fs import FilesystemConnection
+from cloud_browser.tests.test_fs import CONTAINER, FILES, FilesystemTestCase
+
+
+class CatalogTestCase(FilesystemTestCase):
+    """Test case with a catalog of the temporary filesystem tree."""
+
+    def setUp(self):
+        super(CatalogTestCase, self).setUp()
+        db_dir = tempfile.mkdtemp(prefix="cloud_browser_tests_")
+        self.addCleanup(shutil.rmtree, db_dir)
+        self.catalog = Catalog(os.path.join(db_dir, "catalog.db"), self.root)
+        self.addCleanup(self.catalog.conn.close)
+        self.catalog.refresh()
+        self.cat_conn = FilesystemConnection(self.root, catalog=self.catalog)
+        self.cat_container = self.cat_conn.get_container(CONTAINER)
+
+
+class CatalogTest(CatalogTestCase):
+    """Tests for listings and metadata from the catalog."""
+
+    @classmethod
+    def rows(cls, container, path, marker=None, limit=None):
+        return [
+            (obj.name, obj.size, obj.is_subdir)
+            for obj in container.get_objects(path, marker, limit)
+        ]
+
+    def test_refresh(self):
+        # Root, container and subdirectory, unchanged since the first scan.
+        self.assertEqual(self.catalog.refresh(), (3, 0))
+        self.assertEqual(self.catalog.refresh(full=True), (3, 3))
+
+    def test_containers(self):
+        containers = self.cat_conn.get_containers()
+        self.assertEqual([c.name for c in containers], [CONTAINER])
+        self.assertEqual((containers[0].count, containers[0].size), (32, 302))
+
+    def test_listing(self):
+        for path in ("", "sub"):
+            self.assertEqual(
+                self.rows(self.cat_container, path, limit=None),
+                self.rows(self.container, path, limit=None),
+            )
+
+    def test_paging(self):
+        names, marker = [], None
+        while True:
+            rows = self.rows(self.cat_container, "", marker, 7)
+            if not rows:
+                break
+            names.extend(row[0] for row in rows)
+            marker = names[-1]
+
+        self.assertEqual(names, sorted(FILES + ["sub"]))
+
+    def test_marker_past_end(self):
+        self.assertEqual(self.rows(self.cat_container, "", "zzz", 10), [])
+        self.assertEqual(self.rows(self.cat_container, "sub", "sub/zzz", 10), [])
+        self.assertEqual(self.rows(self.cat_container, "sub", "z", 10), [])
+
+    def test_object(self):
+        obj = self.cat_container.get_object("sub/a.txt")
+        self.assertEqual((obj.name, obj.size, obj.is_file), ("sub/a.txt", 1, True))
+        self.assertEqual(
+            obj.last_modified, self.container.get_object("sub/a.txt").last_modified
+        )
+        self.assertRaises(
+            errors.NoObjectException, self.cat_container.get_object, "missing.txt"
+        )
+
+
+class CatalogRefreshTest(CatalogTestCase):
+    """Tests for refreshing a changed tree."""
+
+    def test_changes(self):
+        container = os.path.join(self.root, CONTAINER)
+        old = time.time() - 1800
+        self.write(os.path.join(container, "new.txt"), b"new")
+        shutil.rmtree(os.path.join(container, "sub"))
+        os.utime(container, (old, old))
+
+        # Root (unchanged) and re-scanned container.
+        self.assertEqual(self.catalog.refresh(), (2, 1))
+        names = [obj.name for obj in self.cat_container.get_objects("", limit=None)]
+        self.assertEqual(names, sorted(FILES + ["new.txt"]))
+        self.assertEqual(self.catalog.list("sub"), [])
+        self.assertEqual(self.catalog.totals(CONTAINER), (31, 303))
+
+    def test_removed_during_refresh(self):
+        container = os.path.join(self.root, CONTAINER)
+        sub = os.path.join(container, "sub")
+        scan_dir = self.catalog._scan_dir  # pylint: disable=protected-access
+
+        def scan_and_remove(path, os_path):
+            scan_dir(path, os_path)
+            if path == CONTAINER:
+                shutil.rmtree(sub)
+                if replace:
+                    self.write(sub, b"sub")
+
+        self.catalog._scan_dir = scan_and_remove
+        for replace in (False, True):
+            if not os.path.isdir(sub):
+                os.mkdir(sub)
+            self.catalog.refresh(full=True)
+
+            # Entries are removed (or replaced) on the next parent refresh.
+            self.assertIsNone(self.catalog.get(CONTAINER + "/sub"))
+            self.assertEqual(self.catalog.list(CONTAINER + "/sub"), [])
+            sizes = [
+                os.path.getsize(os.path.join(container, name))
+                for name in os.listdir(container)
+                if name != "sub" and not name.startswith(".")
+            ]
+            self.assertEqual(self.catalog.totals(CONTAINER), (len(sizes), sum(sizes)))
@@ -0,0 +1,188 @@
+"""Filesystem datastore tests."""
+# pylint: disable=protected-access
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from cloud_browser.cloud import fs
+from cloud_browser.cloud.fs import DirectoryIndex, FilesystemConnection, page_names
+
+CONTAINER = "cont"
+FILES = ["f%02d.txt" % i for i in range(30)]
+SUB_FILES = ["a.txt", "b.txt"]
+
+
+class FilesystemTestCase(SimpleTestCase):
+    """Test case with a temporary filesystem tree.
+
+    The container has files, a subdirectory with files and a dot file, all
+    modified an hour ago (so that directory indexes are cached).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super(FilesystemTestCase, cls).setUpClass()
+        cls.root = tempfile.mkdtemp(prefix="cloud_browser_tests_")
+        container = os.path.join(cls.root, CONTAINER)
+        os.makedirs(os.path.join(container, "sub"))
+        for name in FILES + [".hidden"]:
+            cls.write(os.path.join(container, name), b"x" * 10)
+        for name in SUB_FILES:
+            cls.write(os.path.join(container, "sub", name), b"y")
+
+        old = time.time() - 3600
+        for dir_path, _, names in os.walk(cls.root):
+            for name in names:
+                os.utime(os.path.join(dir_path, name), (old, old))
+            os.utime(dir_path, (old, old))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.root)
+        super(FilesystemTestCase, cls).tearDownClass()
+
+    @classmethod
+    def write(cls, path, data):
+        with open(path, "wb") as file_obj:
+            file_obj.write(data)
+
+    def setUp(self):
+        self.conn = FilesystemConnection(self.root)
+        self.container = self.conn.get_container(CONTAINER)
+
+
+class PageNamesTest(SimpleTestCase):
+    """Tests for paging sorted directory entry names."""
+
+    names = ["a", "b", "c", "d"]
+
+    def test_no_marker(self):
+        self.assertEqual(page_names(self.names, "dir"), self.names)
+        self.assertEqual(page_names(self.names, "dir", limit=2), ["a", "b"])
+
+    def test_marker_in_directory(self):
+        self.assertEqual(page_names(self.names, "dir", "dir/b"), ["c", "d"])
+        self.assertEqual(page_names(self.names, "dir", "dir/bb", 1), ["c"])
+        self.assertEqual(page_names(self.names, "", "b"), ["c", "d"])
+
+    def test_marker_past_end(self):
+        self.assertEqual(page_names(self.names, "dir", "dir/z"), [])
+        self.assertEqual(page_names(self.names, "dir", "dis"), [])
+
+    def test_marker_before_directory(self):
+        self.assertEqual(page_names(self.names, "dir", "a"), self.names)
+
+
+class DirectoryIndexTest(FilesystemTestCase):
+    """Tests for the directory index."""
+
+    def setUp(self):
+        super(DirectoryIndexTest, self).setUp()
+        self.index = DirectoryIndex(10)
+        self.path = os.path.join(self.root, CONTAINER)
+
+    def test_names(self):
+        names = self.index.names(self.path)
+        self.assertEqual(names, sorted(FILES + ["sub"]))
+        self.assertIs(self.index.names(self.path), names)
+
+    def test_changed_directory(self):
+        path = os.path.join(self.root, "changed")
+        os.makedirs(path)
+        self.addCleanup(shutil.rmtree, path)
+        old = time.time() - 3600
+        os.utime(path, (old, old))
+        self.assertEqual(self.index.names(path), [])
+
+        self.write(os.path.join(path, "new.txt"), b"")
+        os.utime(path, (old + 1, old + 1))
+        self.assertEqual(self.index.names(path), ["new.txt"])
+
+    def test_unsettled_directory(self):
+        path = os.path.join(self.root, "unsettled")
+        os.makedirs(path)
+        self.addCleanup(shutil.rmtree, path)
+        self.index.names(path)
+        self.assertEqual(len(self.index.cache), 0)
+
+    def test_invalidate(self):
+        self.index.names(self.path)
+        self.index.invalidate(self.path + "/")
+        self.assertEqual(len(self.index.cache), 0)
+
+
+class ListingTest(FilesystemTestCase):
+    """Tests for paged listings, with and without a directory index."""
+
+    def setUp(self):
+        super(ListingTest, self).setUp()
+        self.addCleanup(setattr, fs, "_DIR_INDEX", fs._DIR_INDEX)
+        self.stats = []
+        stat = fs.stat
+        self.addCleanup(setattr, fs, "stat", stat)
+
+        def _stat(path):
+            self.stats.append(path)
+            return stat(path)
+
+        fs.stat = _stat
+
+    def check(self, function):
+        """Run check with and without directory index."""
+        fs._DIR_INDEX = DirectoryIndex(10)
+        function()
+        fs._DIR_INDEX = None
+        with override_settings(CLOUD_BROWSER_FILESYSTEM_INDEX_SIZE=0):
+            function()
+
+    def names(self, path, marker=None, limit=None):
+        return [obj.name for obj in self.container.get_objects(path, marker, limit)]
+
+    def test_listing(self):
+        def _check():
+            objects = list(self.container.get_objects("", limit=None))
+            self.assertEqual([obj.name for obj in objects], sorted(FILES + ["sub"]))
+            self.assertEqual([obj.name for obj in objects if obj.is_subdir], ["sub"])
+            self.assertEqual(objects[0].size, 10)
+
+        self.check(_check)
+
+    def test_paging(self):
+        def _check():
+            names, marker = [], None
+            while True:
+                page = self.names("", marker, 7)
+                if not page:
+                    break
+                names.extend(page)
+                marker = page[-1]
+            self.assertEqual(names, sorted(FILES + ["sub"]))
+
+        self.check(_check)
+
+    def test_subdirectory(self):
+        def _check():
+            self.assertEqual(self.names("sub"), ["sub/a.txt", "sub/b.txt"])
+            self.assertEqual(self.names("sub", "sub/a.txt"), ["sub/b.txt"])
+
+        self.check(_check)
+
+    def test_marker_past_end(self):
+        def _check():
+            self.assertEqual(self.names("", "zzz", 10), [])
+            self.assertEqual(self.names("sub", "sub/zzz", 10), [])
+            self.assertEqual(self.names("sub", "z", 10), [])
+
+        self.check(_check)
+
+    def test_only_page_stated(self):
+        def _check():
+            del self.stats[:]
+            self.assertEqual(len(self.names("", "f09.txt", 5)), 5)
+            # Page objects (plus the directory, if indexed).
+            self.assertEqual(len(self.stats), 5 + (fs.get_dir_index() is not None))
+
+        self.check(_check)
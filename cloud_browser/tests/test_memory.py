@@ -0,0 +1,89 @@
+"""In-memory datastore tests."""
+from django.test import SimpleTestCase
+
+from cloud_browser.cloud import errors
+from cloud_browser.cloud.memory import MemoryConnection, MemoryStore, get_store
+
+KEYS = ["a.txt", "dir/b.txt", "dir/sub/c.txt", "dir2/d.txt", "e.txt"]
+
+
+class MemoryStoreTest(SimpleTestCase):
+    """Tests for the sorted key space."""
+
+    def setUp(self):
+        self.store = MemoryStore()
+        self.store.put_many("cont", ((key, b"xx", None) for key in KEYS))
+        self.bucket = self.store.buckets["cont"]
+
+    def keys(self, prefix="", marker=None, delimiter="/"):
+        return [key for key, _ in self.bucket.list(prefix, marker, delimiter)]
+
+    def test_list(self):
+        self.assertEqual(self.keys(), ["a.txt", "dir/", "dir2/", "e.txt"])
+        self.assertEqual(self.keys(delimiter=None), KEYS)
+        self.assertEqual(self.keys("dir/"), ["dir/b.txt", "dir/sub/"])
+
+    def test_list_marker(self):
+        self.assertEqual(self.keys(marker="a.txt"), ["dir/", "dir2/", "e.txt"])
+        self.assertEqual(self.keys("dir/", "dir/b.txt"), ["dir/sub/"])
+        self.assertEqual(self.keys("dir/", "a"), ["dir/b.txt", "dir/sub/"])
+
+    def test_list_marker_past_end(self):
+        self.assertEqual(self.keys(marker="z"), [])
+        self.assertEqual(self.keys("dir/", "dir/z"), [])
+
+    def test_put_delete(self):
+        self.assertEqual(self.bucket.size, 10)
+        self.store.put("cont", "a.txt", b"xxxx")
+        self.store.put("cont", "f.txt", b"x")
+        self.assertEqual(self.bucket.size, 13)
+        self.assertEqual(self.bucket.keys, sorted(KEYS + ["f.txt"]))
+
+        self.store.delete("cont", "a.txt")
+        self.store.delete("cont", "missing")
+        self.assertEqual(self.bucket.size, 9)
+        self.assertNotIn("a.txt", self.bucket.keys)
+
+
+class MemoryConnectionTest(SimpleTestCase):
+    """Tests for the memory datastore."""
+
+    @classmethod
+    def setUpClass(cls):
+        super(MemoryConnectionTest, cls).setUpClass()
+        store = get_store("memory_tests")
+        for name in ("c1", "c2", "c3"):
+            store.put_many(name, ((key, b"xx", "text/plain") for key in KEYS))
+
+    def setUp(self):
+        self.conn = MemoryConnection("memory_tests")
+
+    def test_containers(self):
+        containers = self.conn.get_containers()
+        self.assertEqual([c.name for c in containers], ["c1", "c2", "c3"])
+        self.assertEqual((containers[0].count, containers[0].size), (5, 10))
+        names = [c.name for c in self.conn.get_containers("c1", 1)]
+        self.assertEqual(names, ["c2"])
+        self.assertRaises(errors.NoContainerException, self.conn.get_container, "x")
+
+    def test_objects(self):
+        container = self.conn.get_container("c1")
+        objects = container.get_objects("")
+        self.assertEqual([o.name for o in objects], ["a.txt", "dir", "dir2", "e.txt"])
+        self.assertEqual([o.is_subdir for o in objects], [False, True, True, False])
+        self.assertEqual(objects[0].content_type, "text/plain")
+
+        names = [o.name for o in container.get_objects("dir", "dir/b.txt")]
+        self.assertEqual(names, ["dir/sub"])
+        self.assertEqual(len(container.get_objects("", "z")), 0)
+
+    def test_object(self):
+        container = self.conn.get_container("c1")
+        obj = container.get_object("dir/b.txt")
+        self.assertEqual((obj.size, obj.read()), (2, b"xx"))
+        self.assertEqual(b"".join(obj.stream_range(1, 5)), b"x")
+        self.assertRaises(errors.NoObjectException, container.get_object, "dir")
+
+    def test_error_rate(self):
+        conn = MemoryConnection("memory_tests", error_rate=1)
+        self.assertRaises(errors.CloudException, conn.get_containers)
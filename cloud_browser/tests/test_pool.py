@@ -0,0 +1,139 @@
+"""Connection pool tests."""
+# pylint: disable=protected-access
+import threading
+import time
+
+from django.core import signals
+from django.test import SimpleTestCase
+
+from cloud_browser.cloud import errors
+from cloud_browser.cloud.config import Config
+from cloud_browser.cloud.pool import ConnectionPool
+from cloud_browser.tests import write_object
+
+
+class FakeConnection(object):
+    """Connection recording health checks."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.usable = True
+        self.checks = []
+
+    def check(self):
+        # Record whether the pool lock was free during the check.
+        free = self.pool._cond.acquire(False)
+        if free:
+            self.pool._cond.release()
+        self.checks.append(free)
+        return self.usable
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """Tests for the bounded connection pool."""
+
+    def setUp(self):
+        self.pool = ConnectionPool(
+            lambda: FakeConnection(self.pool), max_size=2, timeout=0.1
+        )
+
+    def test_reuse(self):
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        self.assertIs(self.pool.acquire(), conn)
+        self.assertEqual(conn.checks, [True])
+        self.assertEqual(len(self.pool), 1)
+
+    def test_bounded(self):
+        self.pool.acquire()
+        self.pool.acquire()
+        start = time.time()
+        self.assertRaises(errors.CloudException, self.pool.acquire)
+        self.assertGreaterEqual(time.time() - start, 0.1)
+        self.assertEqual(len(self.pool), 2)
+
+    def test_wait_for_release(self):
+        self.pool.timeout = 5
+        conn = self.pool.acquire()
+        self.pool.acquire()
+        timer = threading.Timer(0.05, self.pool.release, (conn,))
+        timer.start()
+        self.assertIs(self.pool.acquire(), conn)
+        timer.join()
+
+    def test_discard(self):
+        conn = self.pool.acquire()
+        self.pool.release(conn, discard=True)
+        self.assertEqual(len(self.pool), 0)
+        self.assertIsNot(self.pool.acquire(), conn)
+
+    def test_unusable(self):
+        conn = self.pool.acquire()
+        conn.usable = False
+        self.pool.release(conn)
+        self.assertIsNot(self.pool.acquire(), conn)
+        self.assertEqual(len(self.pool), 1)
+
+    def test_idle_eviction(self):
+        self.pool.idle_timeout = 0.05
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        time.sleep(0.1)
+        self.assertIsNot(self.pool.acquire(), conn)
+        self.assertEqual(conn.checks, [])
+        self.assertEqual(len(self.pool), 1)
+
+    def test_dead_thread_lease(self):
+        thread = threading.Thread(target=self.pool.get)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(self.pool._leases), 1)
+
+        # Both connections are available again.
+        self.pool.acquire()
+        self.pool.acquire()
+        self.assertEqual(self.pool._leases, {})
+        self.assertEqual(len(self.pool), 2)
+
+    def test_connection_errors(self):
+        with self.assertRaises(errors.CloudException):
+            with self.pool.connection() as conn:
+                raise errors.NoObjectException("missing")
+        self.assertIs(self.pool._idle[-1][0], conn)
+
+        with self.assertRaises(ValueError):
+            with self.pool.connection() as conn:
+                raise ValueError("socket error")
+        self.assertNotIn(conn, self.pool._connections)
+
+    def test_thread_lease(self):
+        conn = self.pool.get()
+        self.assertIs(self.pool.get(), conn)
+        self.pool.release_thread()
+        self.assertEqual(self.pool._leases, {})
+        self.assertIs(self.pool._idle[-1][0], conn)
+
+
+class RequestPoolTest(SimpleTestCase):
+    """Tests for connections borrowed by requests."""
+
+    def setUp(self):
+        self.pool = Config.get_connection_pool()
+        write_object("pool", "a.txt", b"x")
+
+    def test_request_finished(self):
+        for _ in range(3):
+            response = self.client.get("/browser/pool")
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.pool._leases, {})
+        self.assertTrue(self.pool._idle)
+
+    def test_request_failed(self):
+        conn = self.pool.get()
+        try:
+            raise ValueError("socket error")
+        except ValueError:
+            signals.got_request_exception.send(sender=None, request=None)
+        signals.request_finished.send(sender=None)
+        self.assertEqual(self.pool._leases, {})
+        self.assertNotIn(conn, self.pool._connections)
@@ -0,0 +1,53 @@
+"""Record and replay datastore tests."""
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from cloud_browser.cloud.cache import CachedConnection, LruCache
+from cloud_browser.cloud.fs import FilesystemConnection
+from cloud_browser.cloud.replay import Cassette, RecordingConnection, ReplayConnection
+
+CONTAINER = "cont"
+DATA = b"0123456789"
+
+
+class RecordingTest(SimpleTestCase):
+    """Tests for recording a filesystem datastore."""
+
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp(prefix="cloud_browser_tests_")
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.root = os.path.join(tmp_dir, "root")
+        os.makedirs(os.path.join(self.root, CONTAINER, "sub"))
+        with open(os.path.join(self.root, CONTAINER, "a.txt"), "wb") as file_obj:
+            file_obj.write(DATA)
+
+        self.path = os.path.join(tmp_dir, "test.cassette")
+        self.conn = RecordingConnection(
+            FilesystemConnection(self.root), Cassette(self.path)
+        )
+
+    def test_record(self):
+        container = self.conn.get_container(CONTAINER)
+        names = [obj.name for obj in container.get_objects("")]
+        self.assertEqual(names, ["a.txt", "sub"])
+        self.assertEqual(container.get_object("a.txt").read(), DATA)
+
+        conn = ReplayConnection(self.path, latency_scale=0)
+        container = conn.get_container(CONTAINER)
+        self.assertEqual([obj.name for obj in container.get_objects("")], names)
+        self.assertEqual(container.get_object("a.txt").read(), b"\0" * len(DATA))
+
+    def test_cached(self):
+        cache = LruCache(max_size=100)
+        conn = CachedConnection(self.conn, cache)
+        for _ in range(2):
+            container = conn.get_container(CONTAINER)
+            self.assertEqual(container.get_object("a.txt").read(), DATA)
+            self.assertEqual(container.get_objects("")[0].read(), DATA)
+        self.assertEqual(cache.hits, 2)
+
+        record = Cassette(self.path).get(["read", CONTAINER, "a.txt"])
+        self.assertEqual(record["bytes"], len(DATA))
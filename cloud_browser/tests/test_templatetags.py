@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Template tag tests."""
+import re
+from datetime import datetime
+
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from cloud_browser.cloud.memory import MemoryConnection, get_store
+
+STORE = "templatetags"
+CONTAINER = "tags"
+
+#: Browser table rows as rendered by a row template per object.
+ROWS_TEMPLATE = """{% load cloud_browser_extras %}
+{% for obj in objects %}
+  <tr>
+    {% if obj.is_subdir %}
+        <td><img src="{% cloud_browser_media_url 'DIR_ICON' %}" /></td>
+    {% else %}
+        <td><img src="{% cloud_browser_media_url 'FILE_ICON' %}" /></td>
+    {% endif %}
+    {% if obj.is_file %}
+    <td><a href="{% url 'cloud_browser_document' obj.path|urlencode %}"
+        >{{ obj.basename }}</a></td>
+    {% else %}
+    <td><a href="{% url 'cloud_browser_browser' obj.path|urlencode %}"
+           class="cloud-browser-document-link"
+        >{{ obj.basename }}</a></td>
+    {% endif %}
+    {% with content_type=obj.smart_content_type encoding=obj.smart_content_encoding %}
+    <td>
+        {% if content_type %}
+            {{ content_type }}
+        {% else %}--{% endif %}
+    </td>
+    <td>
+        {% if encoding %}
+            {{ encoding }}
+        {% else %}--{% endif %}
+    </td>
+    {% endwith %}
+    <td>
+        {% if obj.is_file or obj.size > 0 %}
+            {{ obj.size|filesizeformat }}
+        {% else %}--{% endif %}
+    </td>
+    <td>
+        {% if obj.last_modified %}
+            {{ obj.last_modified|date:'DATETIME_FORMAT' }}
+        {% else %}--{% endif %}
+    </td>
+  </tr>
+{% endfor %}
+"""
+ROWS_TEMPLATE = ROWS_TEMPLATE.replace(
+    "DIR_ICON", "img/tango/16x16/places/folder.png"
+).replace("FILE_ICON", "img/tango/16x16/mimetypes/text-x-generic.png")
+
+
+class ObjectRowsTest(SimpleTestCase):
+    """Tests for rendering browser table rows."""
+
+    @classmethod
+    def setUpClass(cls):
+        super(ObjectRowsTest, cls).setUpClass()
+        store = get_store(STORE)
+        for name, data, content_type, last_modified in (
+            ("a.txt", b"x" * 2048, None, datetime(2020, 1, 2, 3, 4, 5)),
+            ("b.txt.gz", b"", "application/x-gzip", datetime(2020, 1, 2, 3, 4, 5)),
+            (u"<b>&amp;'\"+%.html", b"x", "text/html", datetime(2021, 6, 7)),
+            (u"d\xefr with space/中.txt", b"x", None, None),
+            (u"\xe9t\xe9 #?.bin", b"x" * 10 ** 7, None, datetime(1999, 12, 31)),
+        ):
+            store.put(CONTAINER, name, data, content_type, last_modified)
+
+    @classmethod
+    def render(cls, source, objects):
+        html = Template(source).render(Context({"objects": objects}))
+        html = re.sub(r"\s*([<>])\s*", r"\1", html)
+        return re.sub(r"\s+", " ", html).strip()
+
+    def test_rows(self):
+        container = MemoryConnection(STORE).get_container(CONTAINER)
+        for path in ("", u"d\xefr with space"):
+            objects = container.get_objects(path)
+            rows = self.render(
+                "{% load cloud_browser_extras %}"
+                "{% cloud_browser_object_rows objects %}",
+                objects,
+            )
+            self.assertEqual(rows, self.render(ROWS_TEMPLATE, objects))
+            self.assertEqual(rows.count("<tr>"), len(objects))
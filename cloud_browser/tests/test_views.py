@@ -0,0 +1,357 @@
+"""View tests."""
+# pylint: disable=protected-access
+import json
+
+from django.http.response import FileResponse
+from django.test import SimpleTestCase, override_settings
+
+from cloud_browser.app_settings import settings
+from cloud_browser.cloud.config import Config
+from cloud_browser.tests import write_object
+from cloud_browser.views import _parse_byte_range
+
+CONTAINER = "views"
+DATA = b"0123456789" * 10
+
+
+class DocumentTestCase(SimpleTestCase):
+    """Document view test case with a stored object."""
+
+    path = "/document/%s/data.bin" % CONTAINER
+
+    @classmethod
+    def setUpClass(cls):
+        super(DocumentTestCase, cls).setUpClass()
+        write_object(CONTAINER, "data.bin", DATA)
+
+    def get(self, method="get", **headers):
+        return getattr(self.client, method)(self.path, **headers)
+
+    @classmethod
+    def content(cls, response):
+        if response.streaming:
+            return b"".join(response.streaming_content)
+        return response.content
+
+
+class ParseByteRangeTest(SimpleTestCase):
+    """Tests for ``Range`` header parsing."""
+
+    def test_ranges(self):
+        self.assertEqual(_parse_byte_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(_parse_byte_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(_parse_byte_range("bytes=-5", 100), (95, 99))
+        self.assertEqual(_parse_byte_range("bytes=-500", 100), (0, 99))
+        self.assertEqual(_parse_byte_range("bytes=95-200", 100), (95, 99))
+
+    def test_ignored(self):
+        for header in ("bytes=abc", "bytes=-", "bytes=0-1,5-6", "bytes=5-1", "x=0-1"):
+            self.assertIsNone(_parse_byte_range(header, 100), header)
+
+    def test_unsatisfiable(self):
+        self.assertRaises(ValueError, _parse_byte_range, "bytes=100-", 100)
+        self.assertRaises(ValueError, _parse_byte_range, "bytes=0-", 0)
+        self.assertRaises(ValueError, _parse_byte_range, "bytes=-5", 0)
+
+
+class BrowserTest(DocumentTestCase):
+    """Tests for the browser view."""
+
+    def test_query_pool(self):
+        request_pool = Config.get_connection_pool()
+        query_pool = Config.get_connection_pool(Config.QUERY_POOL)
+        self.assertIsNot(query_pool, request_pool)
+        self.assertEqual(query_pool.max_size, settings.CLOUD_BROWSER_QUERY_THREADS)
+
+    def test_browser(self):
+        response = self.client.get("/browser/%s" % CONTAINER)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "data.bin")
+        self.assertEqual(Config.get_connection_pool()._leases, {})
+
+
+class DocumentRangeTest(DocumentTestCase):
+    """Tests for byte range requests."""
+
+    def test_full(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(self.content(response), DATA)
+
+    def test_range(self):
+        response = self.get(HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 10-19/100")
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(self.content(response), DATA[10:20])
+
+    def test_suffix_range(self):
+        response = self.get(HTTP_RANGE="bytes=-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 95-99/100")
+        self.assertEqual(self.content(response), DATA[-5:])
+
+    def test_range_past_end(self):
+        response = self.get(HTTP_RANGE="bytes=90-1000")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 90-99/100")
+        self.assertEqual(self.content(response), DATA[90:])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE="bytes=100-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */100")
+
+    def test_ignored_range(self):
+        for header in ("bytes=abc", "bytes=0-1,5-6"):
+            response = self.get(HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.content(response), DATA)
+
+    def test_if_range_etag(self):
+        etag = self.get()["ETag"]
+        response = self.get(HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.content(response), DATA[:2])
+
+        # Stale or weak entity tags get the full object.
+        for if_range in ('"stale"', "W/" + etag):
+            response = self.get(HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE=if_range)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.content(response), DATA)
+
+    def test_if_range_date(self):
+        last_modified = self.get()["Last-Modified"]
+        response = self.get(HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE=last_modified)
+        self.assertEqual(response.status_code, 206)
+
+        response = self.get(
+            HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE="Thu, 01 Jan 2015 00:00:00 GMT"
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class DocumentConditionalTest(DocumentTestCase):
+    """Tests for conditional and ``HEAD`` requests."""
+
+    def test_if_none_match(self):
+        etag = self.get()["ETag"]
+        for if_none_match in (etag, "W/" + etag, '"other", ' + etag, "*"):
+            response = self.get(HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(response.status_code, 304, if_none_match)
+            self.assertEqual(response["ETag"], etag)
+            self.assertEqual(response.content, b"")
+
+        response = self.get(HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since(self):
+        last_modified = self.get()["Last-Modified"]
+        response = self.get(HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["Last-Modified"], last_modified)
+
+        for since in ("Thu, 01 Jan 2015 00:00:00 GMT", "invalid"):
+            response = self.get(HTTP_IF_MODIFIED_SINCE=since)
+            self.assertEqual(response.status_code, 200, since)
+
+    def test_if_none_match_precedence(self):
+        last_modified = self.get()["Last-Modified"]
+        response = self.get(
+            HTTP_IF_NONE_MATCH='"other"', HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_head(self):
+        response = self.get("head", HTTP_RANGE="bytes=0-1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(self.content(response), b"")
+
+        etag = response["ETag"]
+        response = self.get("head", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class BrowserContainerPagingTest(SimpleTestCase):
+    """Tests for container pages in the browser view."""
+
+    @classmethod
+    def setUpClass(cls):
+        super(BrowserContainerPagingTest, cls).setUpClass()
+        for name in ("page-a", "page-b", "page-c"):
+            write_object(name, "data.txt", b"x")
+
+    def test_page(self):
+        response = self.client.get(
+            "/browser/page-c", {"cont_marker": "page-a", "cont_limit": 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        containers = [c.name for c in response.context["containers"]]
+        self.assertEqual(containers, ["page-b"])
+        self.assertEqual(response.context["cont_next_marker"], "page-b")
+
+        # Containers not on the page are looked up directly.
+        self.assertEqual(response.context["container"].name, "page-c")
+        self.assertContains(response, "data.txt")
+
+    def test_missing_container(self):
+        response = self.client.get("/browser/page-x", {"cont_limit": 1})
+        self.assertEqual(response.status_code, 404)
+
+
+class JsonTestCase(SimpleTestCase):
+    """JSON view test case with stored objects."""
+
+    container = "api"
+    names = ["a.txt", "b.txt", "c.txt", "dir/d.txt"]
+
+    @classmethod
+    def setUpClass(cls):
+        super(JsonTestCase, cls).setUpClass()
+        for name in cls.names:
+            write_object(cls.container, name, b"json")
+
+    def get_json(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content.decode("utf-8"))
+
+
+class BrowserJsonTest(JsonTestCase):
+    """Tests for JSON object listings."""
+
+    def test_listing(self):
+        data = self.get_json("/api/browser/api")
+        self.assertEqual((data["container"], data["object_path"]), ("api", ""))
+        self.assertIsNone(data["marker"])
+
+        objects = data["objects"]
+        self.assertEqual(
+            [obj["name"] for obj in objects], ["a.txt", "b.txt", "c.txt", "dir"]
+        )
+        self.assertEqual(
+            [obj["type"] for obj in objects], ["file", "file", "file", "subdirectory"]
+        )
+        self.assertEqual(objects[0]["path"], "api/a.txt")
+        self.assertEqual(objects[0]["size"], 4)
+        self.assertEqual(objects[0]["content_type"], "text/plain")
+        self.assertIsNotNone(objects[0]["last_modified"])
+
+    def test_paging(self):
+        data = self.get_json("/api/browser/api", limit=2)
+        self.assertEqual([obj["name"] for obj in data["objects"]], ["a.txt", "b.txt"])
+        self.assertEqual(data["marker"], "b.txt")
+
+        data = self.get_json("/api/browser/api", limit=2, marker="b.txt")
+        self.assertEqual([obj["name"] for obj in data["objects"]], ["c.txt", "dir"])
+        self.assertIsNone(data["marker"])
+
+    def test_subdirectory(self):
+        data = self.get_json("/api/browser/api/dir")
+        self.assertEqual(data["object_path"], "dir")
+        self.assertEqual([obj["name"] for obj in data["objects"]], ["dir/d.txt"])
+
+    def test_missing_container(self):
+        self.assertEqual(self.client.get("/api/browser/missing").status_code, 404)
+
+
+class DocumentJsonTest(JsonTestCase):
+    """Tests for JSON object metadata."""
+
+    def test_document(self):
+        data = self.get_json("/api/document/api/dir/d.txt")
+        self.assertEqual((data["name"], data["basename"]), ("dir/d.txt", "d.txt"))
+        self.assertEqual((data["type"], data["size"]), ("file", 4))
+
+    def test_missing(self):
+        self.assertEqual(self.client.get("/api/document/api/x.txt").status_code, 404)
+        self.assertEqual(self.client.get("/api/document/missing/x").status_code, 404)
+
+
+@override_settings(CLOUD_BROWSER_EXPORT_PAGE_SIZE=2)
+class ExportTest(JsonTestCase):
+    """Tests for newline-delimited JSON exports."""
+
+    container = "export"
+    names = ["a.txt", "b/c.txt", "b/d/e.txt", "b/f.txt", "g.txt", "h.txt"]
+
+    def export(self, path, **params):
+        response = self.client.get("/api/export/%s" % path, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        return [json.loads(line)["name"] for line in lines]
+
+    def test_export(self):
+        self.assertEqual(self.export("export"), ["a.txt", "b", "g.txt", "h.txt"])
+        self.assertEqual(self.export("export/b"), ["b/c.txt", "b/d", "b/f.txt"])
+
+    def test_recursive(self):
+        self.assertEqual(
+            self.export("export", recursive=1),
+            ["a.txt", "b", "b/c.txt", "b/d", "b/d/e.txt", "b/f.txt", "g.txt", "h.txt"],
+        )
+
+    def test_missing_container(self):
+        self.assertEqual(self.client.get("/api/export/missing").status_code, 404)
+
+
+class DocumentSendfileTest(DocumentTestCase):
+    """Tests for serving local files."""
+
+    path = "/document/%s/sp%%20ace/%%C3%%A9.bin" % CONTAINER
+
+    @classmethod
+    def setUpClass(cls):
+        super(DocumentSendfileTest, cls).setUpClass()
+        write_object(CONTAINER, u"sp ace/\xe9.bin", DATA)
+
+    def test_file_response(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, FileResponse)
+        self.assertFalse(response.has_header("Content-Disposition"))
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(self.content(response), DATA)
+        response.close()
+
+        # Ranges and ``HEAD`` requests are not served from the file.
+        response = self.get(HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertNotIsInstance(response, FileResponse)
+        self.assertEqual(self.content(response), DATA[10:20])
+
+        response = self.get("head")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(response.content, b"")
+
+    @override_settings(CLOUD_BROWSER_FILESYSTEM_SENDFILE="X-Sendfile")
+    def test_x_sendfile(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(
+            response["X-Sendfile"],
+            settings.CLOUD_BROWSER_FILESYSTEM_ROOT.rstrip("/")
+            + "/%s/sp%%20ace/%%C3%%A9.bin" % CONTAINER,
+        )
+        self.assertTrue(response.has_header("ETag"))
+
+        # The web server answers ``HEAD`` requests and ranges on ``GET``.
+        self.assertFalse(self.get("head").has_header("X-Sendfile"))
+
+    @override_settings(
+        CLOUD_BROWSER_FILESYSTEM_SENDFILE="X-Accel-Redirect",
+        CLOUD_BROWSER_FILESYSTEM_SENDFILE_URL="/files/",
+    )
+    def test_x_accel_redirect(self):
+        response = self.get(HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/files/%s/sp%%20ace/%%C3%%A9.bin" % CONTAINER
+        )
@@ -0,0 +1,136 @@
+"""Filesystem change watcher tests."""
+# pylint: disable=protected-access
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from cloud_browser.cloud import watch
+from cloud_browser.cloud.cache import CachedConnection, LruCache
+from cloud_browser.cloud.fs import FilesystemConnection
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+CONTAINER = "cont"
+
+#: Seconds to wait for changes.
+TIMEOUT = 10
+
+
+class WatchTestCase(SimpleTestCase):
+    """Test case with a temporary filesystem tree modified an hour ago."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="cloud_browser_tests_")
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, CONTAINER, "sub"))
+
+        old = time.time() - 3600
+        for dir_path, _, _ in os.walk(self.root):
+            os.utime(dir_path, (old, old))
+
+        self.changed = queue.Queue()
+
+    def write(self, path, data=b"x"):
+        with open(os.path.join(self.root, path), "wb") as file_obj:
+            file_obj.write(data)
+
+    def start(self, watcher):
+        watcher.start()
+        self.addCleanup(watcher.stop)
+        return watcher
+
+    def wait_for(self, path):
+        deadline = time.time() + TIMEOUT
+        while time.time() < deadline:
+            try:
+                if self.changed.get(timeout=0.05) == path:
+                    return
+            except queue.Empty:
+                continue
+
+        self.fail("No change of: %s" % path)
+
+    def wait_until(self, func):
+        deadline = time.time() + TIMEOUT
+        while not func():
+            if time.time() > deadline:
+                self.fail("No change")
+            time.sleep(0.05)
+
+
+class PollingWatcherTest(WatchTestCase):
+    """Tests for the polling watcher."""
+
+    def test_changes(self):
+        self.start(watch.PollingWatcher(self.root, self.changed.put, 0.05))
+        self.write(os.path.join(CONTAINER, "sub", "a.txt"))
+        self.wait_for(CONTAINER + "/sub")
+
+        shutil.rmtree(os.path.join(self.root, CONTAINER, "sub"))
+        self.wait_for(CONTAINER)
+
+
+class InotifyWatcherTest(WatchTestCase):
+    """Tests for the ``inotify`` watcher."""
+
+    def setUp(self):
+        super(InotifyWatcherTest, self).setUp()
+        try:
+            self.watcher = watch.InotifyWatcher(self.root, self.changed.put)
+        except (AttributeError, OSError, TypeError):
+            self.skipTest("inotify is unavailable")
+        self.watcher.poll_timeout = 0.05
+
+    def test_changes(self):
+        self.start(self.watcher)
+        self.write(os.path.join(CONTAINER, "sub", "a.txt"))
+        self.wait_for(CONTAINER + "/sub")
+
+        # New directories are watched.
+        os.mkdir(os.path.join(self.root, CONTAINER, "new"))
+        self.wait_for(CONTAINER)
+        self.write(os.path.join(CONTAINER, "new", "b.txt"))
+        self.wait_for(CONTAINER + "/new")
+
+    def test_overflow(self):
+        self.watcher.notify = self.changed.put
+        self.watcher._handle(watch.EVENT_HEADER.pack(-1, watch.IN_Q_OVERFLOW, 0, 0))
+        self.assertEqual(self.changed.get_nowait(), set([None]))
+
+
+@override_settings(
+    CLOUD_BROWSER_CONTAINER_CACHE_TIMEOUT=60,
+    CLOUD_BROWSER_FILESYSTEM_WATCH_INTERVAL=0.05,
+)
+class WatchConnectionTest(WatchTestCase):
+    """Tests for invalidating caches of changed directories."""
+
+    def setUp(self):
+        super(WatchConnectionTest, self).setUp()
+        self.conn = CachedConnection(FilesystemConnection(self.root), LruCache(100))
+        self.watcher = watch.watch_connection(self.conn)
+        self.addCleanup(watch._WATCHERS.pop, self.conn.cache_id)
+        self.addCleanup(self.watcher.stop)
+
+    def names(self, path):
+        container = self.conn.get_container(CONTAINER)
+        return [obj.name for obj in container.get_objects(path)]
+
+    def test_single_watcher(self):
+        self.assertIs(watch.watch_connection(self.conn), self.watcher)
+
+    def test_objects(self):
+        self.assertEqual(self.names("sub"), [])
+        self.write(os.path.join(CONTAINER, "sub", "a.txt"))
+        self.wait_until(lambda: self.names("sub") == ["sub/a.txt"])
+
+    def test_containers(self):
+        self.assertEqual([c.name for c in self.conn.get_containers()], [CONTAINER])
+        os.mkdir(os.path.join(self.root, "new"))
+        self.wait_until(lambda: len(self.conn.get_containers()) == 2)
@@ -2,14 +2,25 @@
 from django.conf.urls import url
 from django.views.static import serve
 
+from cloud_browser import views
 from cloud_browser.app_settings import settings
-from cloud_browser.views import browser, document, index
 
 # pylint: disable=invalid-name
 urlpatterns = [
-    url(r"^$", index, name="cloud_browser_index"),
-    url(r"^browser/(?P<path>.*)$", browser, name="cloud_browser_browser"),
-    url(r"^document/(?P<path>.*)$", document, name="cloud_browser_document"),
+    url(r"^$", views.index, name="cloud_browser_index"),
+    url(r"^browser/(?P<path>.*)$", views.browser, name="cloud_browser_browser"),
+    url(r"^document/(?P<path>.*)$", views.document, name="cloud_browser_document"),
+    url(
+        r"^api/browser/(?P<path>.*)$",
+        views.browser_json,
+        name="cloud_browser_browser_json",
+    ),
+    url(
+        r"^api/document/(?P<path>.*)$",
+        views.document_json,
+        name="cloud_browser_document_json",
+    ),
+    url(r"^api/export/(?P<path>.*)$", views.export, name="cloud_browser_export"),
 ]
 
 if settings.app_media_url is None:
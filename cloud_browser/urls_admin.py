@@ -2,20 +2,31 @@
 from django.conf.urls import url
 from django.views.static import serve
 
+from cloud_browser import views
 from cloud_browser.app_settings import settings
-from cloud_browser.views import browser, document, index
 
 # pylint: disable=invalid-name
 
 urlpatterns = [
-    url(r"^$", index, name="cloud_browser_index"),
+    url(r"^$", views.index, name="cloud_browser_index"),
     url(
         r"^browser/(?P<path>.*)$",
-        browser,
+        views.browser,
         name="cloud_browser_browser",
         kwargs={"template": "cloud_browser/admin/browser.html"},
     ),
-    url(r"^document/(?P<path>.*)$", document, name="cloud_browser_document"),
+    url(r"^document/(?P<path>.*)$", views.document, name="cloud_browser_document"),
+    url(
+        r"^api/browser/(?P<path>.*)$",
+        views.browser_json,
+        name="cloud_browser_browser_json",
+    ),
+    url(
+        r"^api/document/(?P<path>.*)$",
+        views.document_json,
+        name="cloud_browser_document_json",
+    ),
+    url(r"^api/export/(?P<path>.*)$", views.export, name="cloud_browser_export"),
 ]
 
 if settings.app_media_url is None:
@@ -1,12 +1,14 @@
 """Cloud browser views."""
 import json
+import re
 
-from django.http import Http404, HttpResponse
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.http.response import FileResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
-from django.utils.http import urlencode
+from django.utils.http import http_date, parse_http_date_safe, urlencode
 
 from cloud_browser.app_settings import settings
-from cloud_browser.cloud import errors, get_connection, get_connection_cls
+from cloud_browser.cloud import errors, get_connection, get_connection_cls, submit_query
 from cloud_browser.common import get_int, path_join, path_parts, path_yield, relpath
 
 try:
@@ -16,12 +18,16 @@ except ImportError:
     from importlib import import_module
 
 try:
-    from urllib.parse import unquote_to_bytes as unquote
+    from urllib.parse import quote, unquote_to_bytes as unquote
 except ImportError:
-    from urllib import unquote
+    from urllib import quote, unquote
 
 
 MAX_LIMIT = get_connection_cls().cont_cls.max_list
+MAX_CONTAINER_LIMIT = get_connection_cls().max_list
+
+#: Single byte range ``Range`` header.
+BYTE_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
 
 
 def settings_view_decorator(function):
@@ -66,6 +72,205 @@ def _breadcrumbs(path):
     return crumbs
 
 
+def _parse_byte_range(header, size):
+    """Return inclusive ``(start, end)`` byte range from ``Range`` header.
+
+    Only single byte ranges are supported, as the ``Range`` header may be
+    ignored for anything else.
+
+    :param header: ``Range`` header value.
+    :param size: Object size in bytes.
+    :return: Byte range or ``None`` if the full object should be returned.
+    :rtype:  ``tuple`` of ``int``, ``int`` or ``None``
+    :raises: :class:`ValueError` if the range is not satisfiable.
+    """
+    match = BYTE_RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            return None
+    else:
+        # Suffix range of the last N bytes.
+        start = max(size - int(last), 0)
+        end = size - 1
+
+    end = min(end, size - 1)
+    if start > end:
+        raise ValueError("Unsatisfiable range: %s" % header)
+
+    return start, end
+
+
+def _get_etag(storage_obj):
+    """Return quoted entity tag for object (or ``None``).
+
+    Uses the datastore entity tag if available, otherwise falls back to one
+    derived from the last modified timestamp and size of the object.
+    """
+    if storage_obj.etag:
+        return '"%s"' % storage_obj.etag.strip('"')
+
+    timestamp = storage_obj.last_modified_timestamp
+    if timestamp is None:
+        return None
+
+    return '"%x-%x"' % (timestamp, storage_obj.size)
+
+
+def _etags_match(header, etag, weak=True):
+    """Return whether or not entity tag matches a list of entity tags.
+
+    :param header: Comma-separated entity tags header value (or ``*``).
+    :param etag: Quoted entity tag.
+    :param weak: Use weak comparison (else strong).
+    :rtype: ``bool``
+    """
+    tags = [tag.strip() for tag in header.split(",")]
+    if "*" in tags:
+        return True
+
+    if not weak:
+        return not etag.startswith("W/") and etag in tags
+
+    def _opaque(tag):
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return _opaque(etag) in set(_opaque(tag) for tag in tags)
+
+
+def _is_not_modified(request, etag, timestamp):
+    """Return whether or not conditional headers match current object."""
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match is not None:
+        return etag is not None and _etags_match(if_none_match, etag)
+
+    if_modified_since = request.META.get("HTTP_IF_MODIFIED_SINCE")
+    if if_modified_since is not None and timestamp is not None:
+        since = parse_http_date_safe(if_modified_since)
+        return since is not None and timestamp <= since
+
+    return False
+
+
+def _if_range_matches(request, etag, timestamp):
+    """Return whether or not ``If-Range`` permits a partial response."""
+    header = request.META.get("HTTP_IF_RANGE")
+    if header is None:
+        return True
+
+    if header.startswith(("W/", '"')):
+        return etag is not None and _etags_match(header, etag, weak=False)
+
+    since = parse_http_date_safe(header)
+    return since is not None and since == timestamp
+
+
+def _get_byte_range(request, storage_obj, etag, timestamp):
+    """Return requested byte range for object or ``None`` for full object."""
+    header = request.META.get("HTTP_RANGE")
+    if request.method != "GET" or header is None:
+        return None
+
+    if not _if_range_matches(request, etag, timestamp):
+        return None
+
+    return _parse_byte_range(header, storage_obj.size)
+
+
+class _FileResponse(FileResponse):
+    """File response with the same headers as streamed documents.
+
+    Newer Django versions guess the content type and add a
+    ``Content-Disposition`` from the file name, which is skipped here.
+    """
+
+    def set_headers(self, filelike):
+        """Skip setting headers from file."""
+
+
+def _quote_path(path):
+    """Return percent-encoded path for web server offload headers."""
+    if not isinstance(path, bytes):
+        path = path.encode("utf-8")
+    return quote(path)
+
+
+def _get_limit(incoming):
+    """Return object listing limit from request inputs."""
+    limit_default = settings.CLOUD_BROWSER_DEFAULT_LIST_LIMIT
+
+    def limit_test(num):
+        return num > 0 and (MAX_LIMIT is None or num <= MAX_LIMIT - 1)
+
+    return get_int(incoming.get("limit", limit_default), limit_default, limit_test)
+
+
+def _get_container(conn, container_path):
+    """Return container or raise 404."""
+    try:
+        return conn.get_container(container_path)
+    except errors.NoContainerException:
+        raise Http404("No container at: %s" % container_path)
+    except errors.NotPermittedException:
+        raise Http404("Access denied for container at: %s" % container_path)
+
+
+def _get_objects_page(container, object_path, marker, limit, token=None):
+    """Return page of objects, plus marker and continuation token for the
+    next page (or ``None``).
+
+    Invalid tokens (e.g., from a rotated ``SECRET_KEY``) fall back to paging
+    from the marker.
+    """
+    try:
+        objects, token = container.get_objects_page(object_path, token, limit, marker)
+    except errors.InvalidTokenException:
+        objects, token = container.get_objects_page(object_path, None, limit, marker)
+
+    marker = objects[-1].name if token is not None and objects else None
+    return objects, marker, token
+
+
+def _walk_objects(container, object_path, recursive, limit):
+    """Yield all objects under path, paging through the datastore.
+
+    Only a single page per directory level is held in memory.
+    """
+    marker = token = None
+    while True:
+        objects, marker, token = _get_objects_page(
+            container, object_path, marker, limit, token
+        )
+        for obj in objects:
+            yield obj
+            if recursive and obj.is_subdir:
+                for child in _walk_objects(container, obj.name, recursive, limit):
+                    yield child
+
+        if token is None:
+            break
+
+
+def _object_dict(obj):
+    """Return JSON-serializable dictionary of object metadata."""
+    last_modified = obj.last_modified
+    return {
+        "name": obj.name,
+        "basename": obj.basename,
+        "path": obj.path,
+        "type": obj.type,
+        "size": obj.size,
+        "content_type": obj.smart_content_type,
+        "content_encoding": obj.smart_content_encoding,
+        "last_modified": last_modified.isoformat() if last_modified else None,
+    }
+
+
 def _get_context_data(request):
     try:
         return json.loads(request.session["context_data"])
@@ -101,15 +306,6 @@ def browser(request, path="", template="cloud_browser/browser.html"):
     :param template: Template to render.
     """
 
-    from itertools import islice
-
-    try:
-        # pylint: disable=redefined-builtin
-        from future_builtins import filter
-    except ImportError:
-        # pylint: disable=import-error
-        from builtins import filter
-
     # Inputs.
     path = unquote(path).decode("utf-8").replace("+", " ")
     container_path, object_path = path_parts(path)
@@ -119,46 +315,58 @@ def browser(request, path="", template="cloud_browser/browser.html"):
     marker_part = incoming.get("marker_part", None)
     if marker_part:
         marker = path_join(object_path, marker_part)
+    token = incoming.get("token", None) or None
 
     # Get and adjust listing limit.
-    limit_default = settings.CLOUD_BROWSER_DEFAULT_LIST_LIMIT
+    limit = _get_limit(incoming)
 
-    def limit_test(num):
-        return num > 0 and (MAX_LIMIT is None or num <= MAX_LIMIT - 1)
+    # Get container page marker and limit.
+    cont_marker = incoming.get("cont_marker", None) or None
+    cont_limit_default = settings.CLOUD_BROWSER_DEFAULT_CONTAINER_LIST_LIMIT
 
-    limit = get_int(incoming.get("limit", limit_default), limit_default, limit_test)
+    def cont_limit_test(num):
+        return num > 0 and (
+            MAX_CONTAINER_LIMIT is None or num <= MAX_CONTAINER_LIMIT - 1
+        )
+
+    cont_limit = get_int(
+        incoming.get("cont_limit", cont_limit_default),
+        cont_limit_default,
+        cont_limit_test,
+    )
 
-    # Q1: Get all containers.
-    #     We optimize here by not individually looking up containers later,
-    #     instead going through this in-memory list.
-    # TODO: Should page listed containers with a ``limit`` and ``marker``.
+    # Q1: Get page of containers, plus one to check "next". Runs in the
+    # background, if enabled, so that the object listing does not wait on it.
     conn = get_connection()
-    containers = conn.get_containers()
+    containers_future = None
+    if container_path != "":
+        containers_future = submit_query(
+            lambda query_conn: query_conn.get_containers(cont_marker, cont_limit + 1)
+        )
+    if containers_future is None:
+        containers = conn.get_containers(cont_marker, cont_limit + 1)
 
     marker_part = None
     container = None
     objects = None
     if container_path != "":
-        # Find marked container from list.
-        def cont_eq(container):
-            return container.name == container_path
-
-        filtered_conts = filter(cont_eq, containers)
-        cont_list = list(islice(filtered_conts, 1))
-        if not cont_list:
-            raise Http404("No container at: %s" % container_path)
-
-        # Q2: Get objects for instant list, plus one to check "next".
-        container = cont_list[0]
-        objects = container.get_objects(object_path, marker, limit + 1)
-        marker = None
-
-        # If over limit, strip last item and set marker.
-        if len(objects) == limit + 1:
-            objects = objects[:limit]
-            marker = objects[-1].name
+        container = _get_container(conn, container_path)
+
+        # Q2: Get objects for instant list.
+        objects, marker, token = _get_objects_page(
+            container, object_path, marker, limit, token
+        )
+        if marker is not None:
             marker_part = relpath(marker, object_path)
 
+    if containers_future is not None:
+        containers = containers_future.result()
+
+    cont_next_marker = None
+    if len(containers) == cont_limit + 1:
+        containers = containers[:cont_limit]
+        cont_next_marker = containers[-1].name
+
     return render(
         request,
         template,
@@ -166,10 +374,14 @@ def browser(request, path="", template="cloud_browser/browser.html"):
             "path": path,
             "marker": marker,
             "marker_part": marker_part,
+            "token": token,
             "limit": limit,
             "breadcrumbs": _breadcrumbs(path),
             "container_path": container_path,
             "containers": containers,
+            "cont_marker": cont_marker,
+            "cont_next_marker": cont_next_marker,
+            "cont_limit": cont_limit,
             "container": container,
             "object_path": object_path,
             "objects": objects,
@@ -186,13 +398,7 @@ def document(request, path=""):
     """
     path = unquote(path).decode("utf-8").replace("+", " ")
     container_path, object_path = path_parts(path)
-    conn = get_connection()
-    try:
-        container = conn.get_container(container_path)
-    except errors.NoContainerException:
-        raise Http404("No container at: %s" % container_path)
-    except errors.NotPermittedException:
-        raise Http404("Access denied for container at: %s" % container_path)
+    container = _get_container(get_connection(), container_path)
 
     try:
         storage_obj = container.get_object(object_path)
@@ -206,11 +412,159 @@ def document(request, path=""):
         params.update(_get_context_data(request))
         return redirect(custom_view + separator + urlencode(params))
 
+    # Get validators and answer conditional requests from metadata alone.
+    etag = _get_etag(storage_obj)
+    timestamp = storage_obj.last_modified_timestamp
+    validators = {}
+    if etag is not None:
+        validators["ETag"] = etag
+    if timestamp is not None:
+        validators["Last-Modified"] = http_date(timestamp)
+
+    if request.method in ("GET", "HEAD") and _is_not_modified(request, etag, timestamp):
+        response = HttpResponseNotModified()
+        for header, value in validators.items():
+            response[header] = value
+        return response
+
     # Get content-type and encoding.
     content_type = storage_obj.smart_content_type
     encoding = storage_obj.smart_content_encoding
-    response = HttpResponse(content=storage_obj.read(), content_type=content_type)
+
+    # Offload local files to the web server, which also handles ranges.
+    local_path = storage_obj.local_path
+    sendfile = settings.CLOUD_BROWSER_FILESYSTEM_SENDFILE
+    if local_path is not None and sendfile and request.method == "GET":
+        response = HttpResponse(content_type=content_type)
+        if sendfile == "X-Accel-Redirect":
+            prefix = settings.CLOUD_BROWSER_FILESYSTEM_SENDFILE_URL.rstrip("/")
+            response[sendfile] = prefix + "/" + _quote_path(storage_obj.path)
+        else:
+            response[sendfile] = _quote_path(local_path)
+        for header, value in validators.items():
+            response[header] = value
+        if encoding not in (None, ""):
+            response["Content-Encoding"] = encoding
+        return response
+
+    # Get byte range, if any.
+    size = storage_obj.size
+    try:
+        byte_range = _get_byte_range(request, storage_obj, etag, timestamp)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = "bytes */%s" % size
+        return response
+
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type)
+        response["Content-Length"] = size
+    elif byte_range is None and local_path is not None:
+        # WSGI servers may send file responses with ``os.sendfile``.
+        response = _FileResponse(open(local_path, "rb"), content_type=content_type)
+        if not response.has_header("Content-Length"):
+            response["Content-Length"] = size
+    elif byte_range is None:
+        response = StreamingHttpResponse(
+            storage_obj.stream(), content_type=content_type
+        )
+        if size:
+            response["Content-Length"] = size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            storage_obj.stream_range(start, end), content_type=content_type, status=206
+        )
+        response["Content-Range"] = "bytes %s-%s/%s" % (start, end, size)
+        response["Content-Length"] = end - start + 1
+
+    response["Accept-Ranges"] = "bytes"
+    for header, value in validators.items():
+        response[header] = value
     if encoding not in (None, ""):
         response["Content-Encoding"] = encoding
 
     return response
+
+
+@settings_view_decorator
+def browser_json(request, path=""):
+    """List a page of objects in a file path as JSON.
+
+    Takes the same ``marker``, ``token`` and ``limit`` parameters as
+    :func:`browser`, but skips listing containers and rendering templates.
+    The response contains the ``objects`` and the continuation ``token`` to
+    request the next page with (or ``null`` on the last page).
+
+    :param request: The request.
+    :param path: Path to resource, including container as first part of path.
+    """
+    path = unquote(path).decode("utf-8").replace("+", " ")
+    container_path, object_path = path_parts(path)
+    incoming = request.POST or request.GET or {}
+
+    marker = incoming.get("marker", None) or None
+    token = incoming.get("token", None) or None
+    limit = _get_limit(incoming)
+
+    container = _get_container(get_connection(), container_path)
+    objects, marker, token = _get_objects_page(
+        container, object_path, marker, limit, token
+    )
+
+    return JsonResponse(
+        {
+            "path": path,
+            "container": container_path,
+            "object_path": object_path,
+            "limit": limit,
+            "marker": marker,
+            "token": token,
+            "objects": [_object_dict(obj) for obj in objects],
+        }
+    )
+
+
+@settings_view_decorator
+def document_json(request, path=""):
+    """View single document metadata from path as JSON.
+
+    :param request: The request.
+    :param path: Path to resource, including container as first part of path.
+    """
+    path = unquote(path).decode("utf-8").replace("+", " ")
+    container_path, object_path = path_parts(path)
+    container = _get_container(get_connection(), container_path)
+
+    try:
+        storage_obj = container.get_object(object_path)
+    except errors.NoObjectException:
+        raise Http404("No object at: %s" % object_path)
+
+    return JsonResponse(_object_dict(storage_obj))
+
+
+@settings_view_decorator
+def export(request, path=""):
+    """Stream all objects in a file path as newline-delimited JSON.
+
+    Rows are written as the datastore is paged through, so the response
+    starts immediately and memory use does not depend on the number of
+    objects. Pass ``recursive=1`` to descend into subdirectories.
+
+    :param request: The request.
+    :param path: Path to resource, including container as first part of path.
+    """
+    path = unquote(path).decode("utf-8").replace("+", " ")
+    container_path, object_path = path_parts(path)
+    recursive = request.GET.get("recursive", "") in ("1", "true", "True")
+
+    limit = settings.CLOUD_BROWSER_EXPORT_PAGE_SIZE
+    if MAX_LIMIT is not None:
+        limit = min(limit, MAX_LIMIT - 1)
+
+    container = _get_container(get_connection(), container_path)
+    objects = _walk_objects(container, object_path, recursive, limit)
+    rows = (json.dumps(_object_dict(obj)) + "\n" for obj in objects)
+
+    return StreamingHttpResponse(rows, content_type="application/x-ndjson")
@@ -19,10 +19,11 @@ ROOT_DIR = os.path.dirname(__file__)
 MOD = "cloud_browser"
 PROJ = "cloud_browser_project"
 PROJ_SETTINGS = ".".join((PROJ, "settings"))
+TEST_SETTINGS = ".".join((MOD, "tests", "settings"))
 
 DEV_DB_DIR = os.path.join(PROJ, "db")
 
-CHECK_INCLUDES = ("tasks.py", "setup.py", MOD, PROJ)
+CHECK_INCLUDES = ("tasks.py", "setup.py", MOD, PROJ, "bench")
 PYLINT_CFG = os.path.join("dev", "pylint.cfg")
 FLAKE8_CFG = os.path.join("dev", "flake8.cfg")
 ISORT_CFG = os.path.join("dev", ".isort.cfg")
@@ -165,12 +166,35 @@ def black(context):
         context.run("black --check %s" % (" ".join(CHECK_INCLUDES)))
 
 
-@task(flake8, isort, black, pylint)
+@task
+def test(context):
+    """Run unit tests."""
+    context.run("django-admin test %s --settings=%s" % (MOD, TEST_SETTINGS))
+
+
+@task(flake8, isort, black, pylint, test)
 def check(_):
     """Run all checkers."""
     pass
 
 
+###############################################################################
+# Benchmarks
+###############################################################################
+@task
+def bench(context, sizes=None, baseline=None, output=None):
+    """Run benchmarks (optionally comparing with a baseline JSON file)."""
+    args = ["python", os.path.join("bench", "benchmark.py")]
+    if sizes:
+        args += ["--sizes", sizes]
+    if baseline:
+        args += ["--baseline", baseline]
+    if output:
+        args += ["--output", output]
+
+    context.run(" ".join(args))
+
+
 ###############################################################################
 # Documentation
 ###############################################################################